@@ -0,0 +1,320 @@
+"""
+Library interface to trackie, e.g. for a long-running web service.
+
+Nothing here prints or exits: results are the frozen models of
+trackie.work.models and problems raise subclasses of TrackieException.
+The configuration is passed in, no config file is read behind the
+caller's back.
+
+All functions may be called from many threads at once. Parsed files are
+shared read-only through a cache, so a file is only parsed again after
+it changed.
+"""
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+import datetime as dt
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+import threading
+import tomllib
+from typing import cast, Literal
+
+from trackie.cache import get_cache_dir, get_mirror_path
+from trackie.conf import (
+    Config,
+    date_pattern,
+    get_config,
+    get_line_patterns,
+    Params,
+)
+from trackie.repositories.file_edit import get_all_sources
+from trackie.repositories.registry import (
+    get_client_url,
+    get_repository,
+    get_repository_name,
+)
+from trackie.utils import TrackieConfigException
+from trackie.work.logic import (
+    get_date_minutes,
+    get_interval_stats,
+    get_period_stat,
+)
+from trackie.work.models import DayStat, PeriodStat, WeekStat, WorkUnit
+from trackie.work.workdays import parse_calendar
+
+MAX_CACHED_FILES = 32
+
+
+@dataclass(frozen=True)
+class ParsedFile:
+    """
+    All work units of one version of a tracking file, ordered by date.
+    """
+    work_units: tuple[WorkUnit, ...]
+    # date ordinals of the work units for bisection
+    ordinals: tuple[int, ...]
+
+    def between(
+        self,
+        start_date: dt.date,
+        end_date: dt.date,
+    ) -> tuple[WorkUnit, ...]:
+        return self.work_units[
+            bisect_left(self.ordinals, start_date.toordinal()):
+            bisect_right(self.ordinals, end_date.toordinal())
+        ]
+
+
+def parse_file(params: Params) -> ParsedFile:
+    """
+    Read and validate the whole file, entries of a date keep their order.
+    """
+    params = replace(
+        params,
+        start_date=dt.date.min,
+        end_date=dt.date.max,
+        validate='full',
+        # the validation cache is written by the command line interface
+        cache_dir=None,
+        metrics=None,
+    )
+    work_units = tuple(sorted(
+        get_repository(
+            params.data_path, params.repository).get_work_units(params),
+        key=lambda work_unit: work_unit.date,
+    ))
+    return ParsedFile(
+        work_units,
+        tuple(work_unit.date.toordinal() for work_unit in work_units),
+    )
+
+
+class ParseCache:
+    """
+    Thread-safe cache of parsed files dropping the least recently used.
+
+    Files are keyed by path and the size and modification time of all
+    files holding the client's data. Each version of a file is parsed by
+    one thread, other threads asking for it meanwhile wait for that
+    result.
+    """
+    def __init__(self, max_files: int = MAX_CACHED_FILES) -> None:
+        self.max_files = max_files
+        self.lock = threading.Lock()
+        self.files: OrderedDict[tuple, ParsedFile] = OrderedDict()
+        self.loading: dict[tuple, threading.Lock] = {}
+
+    def get(self, params: Params) -> ParsedFile:
+        if params.url is not None:
+            # files on a web server are revalidated on every call
+            from trackie.repositories.remote import sync_client
+            sync_client(params)
+        path = params.data_path.resolve()
+        try:
+            versions = tuple(
+                (source.name, stat.st_size, stat.st_mtime_ns)
+                for source in get_all_sources(path)
+                for stat in [source.stat()]
+            )
+        except OSError as e:
+            raise TrackieConfigException(
+                f'Cannot read {params.data_path}: {e.strerror}') from e
+        key = (
+            str(path), versions,
+            params.description_pattern.pattern,
+            params.duration_pattern.pattern,
+            params.chronological,
+            params.repository,
+        )
+        with self.lock:
+            parsed = self.files.get(key)
+            if parsed is not None:
+                self.files.move_to_end(key)
+                return parsed
+            loading = self.loading.setdefault(key, threading.Lock())
+
+        try:
+            with loading:
+                with self.lock:
+                    parsed = self.files.get(key)
+                if parsed is None:
+                    parsed = parse_file(params)
+                    self.store(key, parsed)
+        finally:
+            with self.lock:
+                self.loading.pop(key, None)
+        return parsed
+
+    def store(self, key: tuple, parsed: ParsedFile) -> None:
+        with self.lock:
+            # older versions of the file are not asked for anymore
+            for old_key in [
+                old_key for old_key in self.files if old_key[0] == key[0]
+            ]:
+                del self.files[old_key]
+            self.files[key] = parsed
+            while len(self.files) > self.max_files:
+                self.files.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.files.clear()
+
+
+parse_cache = ParseCache()
+
+
+def load_config(path: str | Path | None = None) -> Config:
+    """
+    Read a config file, by default ~/.trackie.toml.
+    """
+    try:
+        return get_config(str(path) if path else None)
+    except OSError as e:
+        raise TrackieConfigException(
+            f'Cannot read config file: {e}') from e
+    except tomllib.TOMLDecodeError as e:
+        raise TrackieConfigException(f'Invalid config file: {e}') from e
+
+
+def get_params(
+    config: Config,
+    client: str,
+    *,
+    start_date: dt.date | None = None,
+    end_date: dt.date | None = None,
+    interval: Literal['day', 'week'] | None = None,
+) -> Params:
+    """
+    Params for a client of config, checked like the command line does.
+
+    start_date defaults to the configured one or the first of the month,
+    end_date to today.
+    """
+    if config.abbr and client in config.abbr:
+        client = config.abbr[client]
+    if not config.clients or client not in config.clients:
+        raise TrackieConfigException(f'Client "{client}" not found.')
+    url = get_client_url(config, client)
+    if url:
+        data_path = get_mirror_path(
+            Path(config.cache_dir).expanduser() if config.cache_dir
+            else get_cache_dir(),
+            url,
+        )
+    else:
+        data_path = Path(config.clients[client]).expanduser()
+
+    if start_date is None:
+        start_date = config.start_date
+    if start_date is None:
+        today = dt.date.today()
+        start_date = dt.date(today.year, today.month, 1)
+    if end_date is not None and end_date < start_date:
+        raise TrackieConfigException(
+            f'End date {end_date} is before start date {start_date}.')
+
+    hourly_wage = None
+    if config.hourly_wages and config.hourly_wages.get(client):
+        try:
+            hourly_wage = Decimal(config.hourly_wages[client])
+        except InvalidOperation as e:
+            raise TrackieConfigException(
+                f'Hourly wage of "{client}" is not a number.') from e
+
+    description_pattern, duration_pattern = get_line_patterns(config)
+    return Params(
+        client=client,
+        data_path=data_path,
+        mode='list',
+        start_date=start_date,
+        end_date=end_date,
+        interval=interval or config.interval,
+        csv=False,
+        date_pattern=date_pattern,
+        description_pattern=description_pattern,
+        duration_pattern=duration_pattern,
+        minutes_per_day=config.minutes_per_day,
+        minutes_per_week=config.minutes_per_week,
+        hourly_wage=hourly_wage,
+        display_hours=bool(config.display_hours),
+        currency_sign=config.currency_sign,
+        validate='full',
+        chronological=config.chronological,
+        calendar=parse_calendar(config.calendar),
+        repository=get_repository_name(config, client, data_path),
+        url=url,
+    )
+
+
+def read_work_units(
+    params: Params,
+    cache: ParseCache = parse_cache,
+) -> tuple[WorkUnit, ...]:
+    """
+    Work units within the date range of params, ordered by date.
+    """
+    return cache.get(params).between(
+        params.start_date, params.end_date or dt.date.today())
+
+
+def get_work_units(
+    config: Config,
+    client: str,
+    *,
+    start_date: dt.date | None = None,
+    end_date: dt.date | None = None,
+    cache: ParseCache = parse_cache,
+) -> tuple[WorkUnit, ...]:
+    params = get_params(
+        config, client, start_date=start_date, end_date=end_date)
+    return read_work_units(params, cache)
+
+
+def get_stats(
+    config: Config,
+    client: str,
+    *,
+    interval: Literal['day', 'week'] | None = None,
+    start_date: dt.date | None = None,
+    end_date: dt.date | None = None,
+    cache: ParseCache = parse_cache,
+) -> tuple[DayStat, ...] | tuple[WeekStat, ...]:
+    """
+    Balance of work per day or week, as in aggregate mode.
+    """
+    params = get_params(
+        config, client,
+        start_date=start_date, end_date=end_date, interval=interval)
+    if params.interval == 'week' and not params.minutes_per_week:
+        raise TrackieConfigException(
+            '"minutes_per_week" must be set for interval "week".')
+    if params.interval == 'day' and not params.minutes_per_day:
+        raise TrackieConfigException(
+            '"minutes_per_day" must be set for interval "day".')
+    stats = get_interval_stats(
+        get_date_minutes(read_work_units(params, cache)), params)
+    return cast(tuple[DayStat, ...] | tuple[WeekStat, ...], tuple(stats))
+
+
+def get_totals(
+    config: Config,
+    client: str,
+    *,
+    start_date: dt.date | None = None,
+    end_date: dt.date | None = None,
+    cache: ParseCache = parse_cache,
+) -> PeriodStat:
+    """
+    Work, work units, days worked and expected work of a period.
+    """
+    params = get_params(
+        config, client, start_date=start_date, end_date=end_date)
+    last_day = params.end_date or dt.date.today()
+    return get_period_stat(
+        get_date_minutes(read_work_units(params, cache)),
+        params,
+        params.start_date,
+        last_day,
+    )
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import os
+from pathlib import Path, PurePosixPath
+from typing import Any
+from urllib.parse import urlsplit
+
+
+def get_cache_dir() -> Path:
+    """
+    Directory where trackie keeps derived data between runs.
+
+    Honors XDG_CACHE_HOME, defaults to ~/.cache/trackie.
+    """
+    base = os.environ.get('XDG_CACHE_HOME')
+    if base:
+        return Path(base) / 'trackie'
+    return Path.home() / '.cache' / 'trackie'
+
+
+def content_hash(data: str | bytes) -> str:
+    if isinstance(data, str):
+        data = data.encode()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def get_cache_path(
+    cache_dir: Path,
+    namespace: str,
+    data_path: Path,
+    suffix: str = '.json',
+) -> Path:
+    """
+    Path of the cache file for a tracking file within a namespace.
+
+    The name is derived from the resolved path of the tracking file so
+    different files never share cached data.
+    """
+    key = content_hash(str(data_path.resolve()))
+    return cache_dir / namespace / f'{data_path.stem}-{key}{suffix}'
+
+
+def get_mirror_path(cache_dir: Path, url: str) -> Path:
+    """
+    Where the file at url is mirrored, with the file's name and suffix.
+    """
+    name = PurePosixPath(urlsplit(url).path)
+    return (
+        cache_dir / 'mirrors'
+        / f'{name.stem or "index"}-{content_hash(url)}{name.suffix}'
+    )
+
+
+def load_json(path: Path) -> Any:
+    """
+    Read cached JSON data, None if missing or unreadable.
+
+    A broken cache file is never an error, the data gets recomputed.
+    """
+    try:
+        with path.open() as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def store_json(path: Path, data: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with tmp_path.open('w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
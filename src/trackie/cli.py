@@ -1,27 +1,92 @@
+import dataclasses
 import datetime as dt
 from decimal import Decimal, InvalidOperation
 from pathlib import Path
 import re
+import tomllib
 from typing import cast, Literal
 from typing_extensions import Annotated
 
+import click
 import typer
+from typer.core import TyperGroup
 
+from trackie.ansi_colors import GREEN, RESET
+from trackie.cache import get_cache_dir, get_mirror_path
 from trackie.conf import (
-    config,
     Config,
     Params,
+    CheckFormat,
+    GroupDimension,
+    ValidationLevel,
+    check_formats,
+    group_dimensions,
+    validation_levels,
     date_pattern,
-    tabs_description_pattern,
-    tabs_duration_pattern,
-    spaces_description_pattern,
-    spaces_duration_pattern,
+    get_config,
+    get_line_patterns,
 )
-from trackie.repositories.file_edit import FileEditRepository
-from trackie.utils import error
-from trackie.work.logic import handle_command
+from trackie.filters import compile_filter, Filter
+from trackie.metrics import RunMetrics, write_metrics
+from trackie.repositories.file_edit import archive_before, FileEditRepository
+from trackie.repositories.formatting import format_file
+from trackie.repositories.partitions import get_partitions
+from trackie.repositories.registry import (
+    get_client_url,
+    get_repository,
+    get_repository_name,
+    JOURNAL_SUFFIX,
+)
+from trackie.repositories.segments import (
+    ARCHIVE_SUFFIXES,
+    Compression,
+    compressions,
+)
+from trackie.utils import error, TrackieException, TrackieFormatException
+from trackie.work.logic import (
+    handle_analyze,
+    handle_batch,
+    handle_check,
+    handle_command,
+    handle_incremental_export,
+    handle_dashboard,
+    handle_search,
+    handle_team,
+    handle_timeline,
+)
+from trackie.work.team import get_member_names, get_team_files
+from trackie.work.workdays import parse_calendar, WorkCalendar
+
+
+class RunByDefaultGroup(TyperGroup):
+    """
+    Invoke the `run` command when no other command is named.
+
+    Keeps `wtrack [CLIENT] [OPTIONS]` working next to the subcommands.
+    """
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        if not args or (
+            args[0] not in self.commands
+            and args[0] not in ctx.help_option_names
+            and args[0] not in ('--install-completion', '--show-completion')
+        ):
+            args.insert(0, 'run')
+        return super().parse_args(ctx, args)
 
-app = typer.Typer()
+
+class App(typer.Typer):
+    """
+    Report errors raised by the library as messages instead of tracebacks.
+    """
+    def __call__(self, *args, **kwargs):
+        try:
+            return super().__call__(*args, **kwargs)
+        except TrackieException as e:
+            error(f'{e.args[0]}')
+
+
+config = get_config()
+app = App(cls=RunByDefaultGroup)
 
 no_default_client_message = (
     'No default client is set in the config file, '
@@ -32,47 +97,86 @@ client_not_found_message = (
     'in YAML config file.'
 )
 file_does_not_exist_message = 'Error: File "{}" does not exist.'
+file_exists_message = 'Error: File "{}" already exists.'
 invalid_start_date_format_message = (
     'Format of start date is invalid: {start}. '
     'Must match YYYY-MM-DD'
 )
+invalid_end_date_format_message = (
+    'Format of end date is invalid: {end}. '
+    'Must match YYYY-MM-DD'
+)
+end_before_start_message = 'End date {end} is before start date {start}.'
+invalid_last_message = (
+    'Invalid value for --last: {last}. '
+    'Format: N days or Nw weeks, e.g. 7 or 2w'
+)
+last_with_dates_message = '--last cannot be combined with --start or --end.'
+invalid_group_by_message = (
+    'Invalid group-by dimension: {dimension}. '
+    'Possible values: tag | prefix | weekday'
+)
+invalid_line_range_message = (
+    'Invalid line range: {lines}. Format: FIRST:LAST, either may be omitted'
+)
+invalid_check_format_message = (
+    'Invalid output format: {output_format}. '
+    'Possible values: text | quickfix | json'
+)
+no_files_to_check_message = (
+    'Nothing to check, only .otl files are checked, not journals.'
+)
+invalid_conversion_message = (
+    'Cannot convert {source} to {target}. '
+    'Convert .otl files to {suffix} journals or the other way round.'
+)
+report_keys = ('name', 'mode', 'interval', 'start', 'end', 'csv', 'group_by')
+invalid_report_message = (
+    'Invalid report: {report}. Use comma separated key=value pairs with '
+    'keys name, mode, interval, start, end, csv and group_by, '
+    'e.g. mode=aggregate,interval=week,csv=true'
+)
+invalid_period_message = (
+    'Invalid period: {period}. Format: YYYY-MM-DD..YYYY-MM-DD, '
+    'periods to compare are separated by commas'
+)
+invalid_compression_message = (
+    'Invalid compression: {compression}. Possible values: gz | zst'
+)
+open_year_message = (
+    'Cannot archive entries of {year} or later, the year is not over yet.'
+)
+incremental_mode_message = (
+    'Incremental exports list work units, use mode "list".')
+incremental_file_message = (
+    'Incremental exports need a tracking file to append to: {}')
+invalid_validation_level_message = (
+    'Invalid validation level: {validate}. '
+    'Possible values: full | fast | off'
+)
 
 
-def evaluate_input(
-    *,
-    client: str | None,
-    mode: str | None,
-    start: str | None,
-    interval: str | None,
-    csv: bool,
-    config: Config,
-) -> Params:
-    """
-    Validate and check cli args and config values.
-
-    Return a dataclass with all needed values after sorting out
-    all possible inconsistencies and dependencies.
-    """
-    if config.abbr and client in config.abbr:
-        client = config.abbr[client]
-
-    # `client` is the only value that gets already handled with a
-    # default_factory for the argument in typer
-    if client is None:
-        error(no_default_client_message)
-    client = cast(str, client)
-
+def get_data_path(client: str, config: Config) -> Path:
     if config.clients and client:
         try:
             data_path = Path(config.clients[client])
         except KeyError:
             error(client_not_found_message.format(client))
 
+    url = get_client_url(config, client)
+    if url:
+        # fetched into the mirror when read
+        return get_mirror_path(get_config_cache_dir(config), url)
     if not data_path.exists():
         error(file_does_not_exist_message.format(data_path))
+    return data_path
 
-    mode = mode or config.mode or 'list'
 
+def get_date_range(
+    start: str | None,
+    end: str | None,
+    config: Config,
+) -> tuple[dt.date, dt.date | None]:
     if start is None:
         start_date = config.start_date
         if start_date is None:
@@ -84,37 +188,86 @@ def evaluate_input(
         except ValueError:
             error(invalid_start_date_format_message.format(start=start))
 
-    if config.spaces:
-        description_pattern = re.compile(
-            spaces_description_pattern.format(' ' * config.spaces))
-        duration_pattern = re.compile(
-            spaces_duration_pattern.format(' ' * config.spaces * 2))
-    else:
-        description_pattern = tabs_description_pattern
-        duration_pattern = tabs_duration_pattern
+    end_date = None
+    if end is not None:
+        try:
+            end_date = dt.datetime.strptime(end, '%Y-%m-%d').date()
+        except ValueError:
+            error(invalid_end_date_format_message.format(end=end))
+        if end_date < start_date:
+            error(end_before_start_message.format(end=end, start=start_date))
+    return cast(dt.date, start_date), end_date
 
-    interval = interval or config.interval
 
-    if (
-        mode == 'aggregate'
-        and interval == 'week'
-        and not config.minutes_per_week
-    ):
+last_pattern = re.compile(r'([1-9]\d*)([dw]?)')
+
+
+def get_last_start(last: str, start: str | None, end: str | None) -> str:
+    """
+    First day of the last N days (e.g. "7" or "7d") or weeks ("2w") up to
+    today as start option. Weeks start on Monday.
+    """
+    if start or end:
+        error(last_with_dates_message)
+    match = last_pattern.fullmatch(last.strip().lower())
+    if match is None:
+        error(invalid_last_message.format(last=last))
+    count = int(match[1])
+    today = dt.date.today()
+    if match[2] == 'w':
+        monday = today - dt.timedelta(days=today.weekday())
+        return (monday - dt.timedelta(weeks=count - 1)).isoformat()
+    return (today - dt.timedelta(days=count - 1)).isoformat()
+
+
+def check_minutes_config(interval: str | None, config: Config) -> None:
+    if interval == 'week' and not config.minutes_per_week:
         error(
             '"minutes_per_week" config value must be set in'
             ' config file when using interval "week"'
         )
 
-    if (
-        mode == 'aggregate'
-        and interval == 'day'
-        and not config.minutes_per_day
-    ):
+    if interval == 'day' and not config.minutes_per_day:
         error(
             '"minutes_per_day" config value must be set in'
             ' config file when using interval "day"'
         )
 
+
+def get_calendar(config: Config) -> WorkCalendar | None:
+    try:
+        return parse_calendar(config.calendar)
+    except TrackieFormatException as e:
+        error(f'{e.args[0]}')
+
+
+def get_where(where: list[str] | None) -> Filter | None:
+    if not where:
+        return None
+    try:
+        return compile_filter(where)
+    except ValueError as e:
+        error(str(e))
+
+
+def get_validation_level(
+    validate: str | None,
+    config: Config,
+) -> ValidationLevel:
+    validate = validate or config.validate
+    if validate not in validation_levels:
+        error(invalid_validation_level_message.format(validate=validate))
+    return cast(ValidationLevel, validate)
+
+
+def get_config_cache_dir(config: Config) -> Path:
+    if config.cache_dir:
+        return Path(config.cache_dir).expanduser()
+    return get_cache_dir()
+
+
+def get_hourly_wage(client: str, config: Config) -> Decimal | None:
+    hourly_wage = None
     if config.hourly_wages:
         hourly_wage = config.hourly_wages.get(client)
 
@@ -125,9 +278,62 @@ def evaluate_input(
             error(
                 'Please provide a numerical value for hourly wages.'
             )
+    return hourly_wage or None
+
+
+def evaluate_input(
+    *,
+    client: str | None,
+    mode: str | None,
+    start: str | None,
+    interval: str | None,
+    csv: bool,
+    config: Config,
+    validate: str | None = None,
+    group_by: list[str] | None = None,
+    end: str | None = None,
+    where: list[str] | None = None,
+    last: str | None = None,
+) -> Params:
+    """
+    Validate and check cli args and config values.
+
+    Return a dataclass with all needed values after sorting out
+    all possible inconsistencies and dependencies.
+    """
+    if config.abbr and client in config.abbr:
+        client = config.abbr[client]
+
+    # `client` is the only value that gets already handled with a
+    # default_factory for the argument in typer
+    if client is None:
+        error(no_default_client_message)
+    client = cast(str, client)
+
+    data_path = get_data_path(client, config)
+
+    mode = mode or config.mode or 'list'
+
+    if last:
+        start = get_last_start(last, start, end)
+    start_date, end_date = get_date_range(start, end, config)
+
+    description_pattern, duration_pattern = get_line_patterns(config)
+
+    interval = interval or config.interval
+
+    if mode == 'aggregate':
+        check_minutes_config(interval, config)
+
+    hourly_wage = get_hourly_wage(client, config)
+
+    for dimension in group_by or []:
+        if dimension not in group_dimensions:
+            error(invalid_group_by_message.format(dimension=dimension))
 
     if (
         mode == 'list'
+        and not group_by
         and not hourly_wage
     ):
         error(
@@ -135,10 +341,12 @@ def evaluate_input(
             ' the config file when using "list" mode'
         )
 
+    validate = get_validation_level(validate, config)
+    cache_dir = get_config_cache_dir(config)
+
     client = cast(str, client)  # just for mypy, params.client has type str
     mode = cast(Literal['list', 'aggregate'], mode)
     interval = cast(Literal['day', 'week'], interval)
-    start_date = cast(dt.date, start_date)
     display_hours = cast(bool, config.display_hours)
 
     params = Params(
@@ -156,10 +364,362 @@ def evaluate_input(
         hourly_wage=hourly_wage,
         display_hours=display_hours,
         currency_sign=config.currency_sign,
+        validate=validate,
+        cache_dir=cache_dir,
+        group_by=cast(list[GroupDimension] | None, group_by),
+        end_date=end_date,
+        chronological=config.chronological,
+        tail=bool(last),
+        calendar=get_calendar(config),
+        repository=get_repository_name(config, client, data_path),
+        url=get_client_url(config, client),
+        where=get_where(where),
     )
     return params
 
 
+no_team_files_message = 'No tracking files found at "{}".'
+
+
+def evaluate_team_input(
+    *,
+    location: str,
+    start: str | None,
+    end: str | None,
+    interval: str | None,
+    csv: bool,
+    config: Config,
+    validate: str | None = None,
+) -> list[Params]:
+    """
+    Params for each tracking file of a team, named after the member by
+    get_member_names.
+    """
+    data_paths = get_team_files(location)
+    if not data_paths:
+        error(no_team_files_message.format(location))
+
+    start_date, end_date = get_date_range(start, end, config)
+    interval = interval or config.interval
+    check_minutes_config(interval, config)
+    description_pattern, duration_pattern = get_line_patterns(config)
+    calendar = get_calendar(config)
+
+    return [
+        Params(
+            client=member,
+            data_path=data_path,
+            mode='aggregate',
+            start_date=start_date,
+            end_date=end_date,
+            interval=cast(Literal['day', 'week'], interval),
+            csv=csv,
+            date_pattern=date_pattern,
+            description_pattern=description_pattern,
+            duration_pattern=duration_pattern,
+            minutes_per_day=config.minutes_per_day,
+            minutes_per_week=config.minutes_per_week,
+            hourly_wage=None,
+            display_hours=cast(bool, config.display_hours),
+            currency_sign=config.currency_sign,
+            validate=get_validation_level(validate, config),
+            cache_dir=get_config_cache_dir(config),
+            chronological=config.chronological,
+            calendar=calendar,
+        )
+        for member, data_path in zip(get_member_names(data_paths), data_paths)
+    ]
+
+
+def evaluate_timeline_input(
+    *,
+    clients: list[str] | None,
+    mode: str | None,
+    start: str | None,
+    end: str | None,
+    interval: str | None,
+    csv: bool,
+    config: Config,
+    validate: str | None = None,
+    where: list[str] | None = None,
+    last: str | None = None,
+) -> list[Params]:
+    """
+    Params for each client of a timeline, by default all clients.
+
+    Clients without hourly wage are listed without cost.
+    """
+    names = [
+        config.abbr.get(client, client) if config.abbr else client
+        for client in clients or list(config.clients or [])
+    ]
+    if not names:
+        error(no_default_client_message)
+
+    mode = mode or config.mode or 'list'
+    if last:
+        start = get_last_start(last, start, end)
+    start_date, end_date = get_date_range(start, end, config)
+    interval = interval or config.interval
+    if mode == 'aggregate':
+        check_minutes_config(interval, config)
+    description_pattern, duration_pattern = get_line_patterns(config)
+    validate = get_validation_level(validate, config)
+    cache_dir = get_config_cache_dir(config)
+    calendar = get_calendar(config)
+    compiled_where = get_where(where)
+
+    data_paths = {name: get_data_path(name, config) for name in names}
+    return [
+        Params(
+            client=name,
+            data_path=data_paths[name],
+            mode=cast(Literal['list', 'aggregate'], mode),
+            start_date=start_date,
+            end_date=end_date,
+            interval=cast(Literal['day', 'week'], interval),
+            csv=csv,
+            date_pattern=date_pattern,
+            description_pattern=description_pattern,
+            duration_pattern=duration_pattern,
+            minutes_per_day=config.minutes_per_day,
+            minutes_per_week=config.minutes_per_week,
+            hourly_wage=get_hourly_wage(name, config),
+            display_hours=cast(bool, config.display_hours),
+            currency_sign=config.currency_sign,
+            validate=validate,
+            cache_dir=cache_dir,
+            chronological=config.chronological,
+            tail=bool(last),
+            calendar=calendar,
+            repository=get_repository_name(config, name, data_paths[name]),
+            url=get_client_url(config, name),
+            where=compiled_where,
+        )
+        for name in names
+    ]
+
+
+def get_check_params(client: str, config: Config) -> Params:
+    """
+    Params to read all data of a client for checks, no report options.
+    """
+    if config.abbr and client in config.abbr:
+        client = config.abbr[client]
+    return get_file_params(client, get_data_path(client, config), config)
+
+
+def get_file_params(client: str, data_path: Path, config: Config) -> Params:
+    """
+    Params to read all data of a file, no report options.
+    """
+    description_pattern, duration_pattern = get_line_patterns(config)
+    return Params(
+        client=client,
+        data_path=data_path,
+        mode='list',
+        start_date=dt.date.min,
+        end_date=dt.date.max,
+        interval=config.interval,
+        csv=False,
+        date_pattern=date_pattern,
+        description_pattern=description_pattern,
+        duration_pattern=duration_pattern,
+        minutes_per_day=config.minutes_per_day,
+        minutes_per_week=config.minutes_per_week,
+        hourly_wage=None,
+        display_hours=cast(bool, config.display_hours),
+        currency_sign=config.currency_sign,
+        validate='full',
+        cache_dir=get_config_cache_dir(config),
+        chronological=config.chronological,
+        repository=get_repository_name(config, client, data_path),
+        url=get_client_url(config, client),
+    )
+
+
+def get_partition_params(params: Params) -> list[Params]:
+    """
+    Params for each partition of a client's directory, or params as is.
+    """
+    if not params.data_path.is_dir():
+        return [params]
+    return [
+        dataclasses.replace(params, data_path=partition.path)
+        for partition in get_partitions(params.data_path)
+    ]
+
+
+def parse_report_csv(value: str | bool, report: str | dict) -> bool:
+    """
+    The csv value of a report, a bool or a string like "true" or "no".
+    """
+    if isinstance(value, bool):
+        return value
+    if not isinstance(value, str) or value.lower() not in (
+        '1', 'true', 'yes', '0', 'false', 'no',
+    ):
+        error(invalid_report_message.format(report=report))
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def parse_report_option(report: str) -> dict:
+    """
+    Parse a --report value like "mode=aggregate,interval=week,csv=true".
+    """
+    spec: dict = {}
+    for item in report.split(','):
+        key, separator, value = item.partition('=')
+        key = key.strip().replace('-', '_')
+        value = value.strip()
+        if not separator or key not in report_keys:
+            error(invalid_report_message.format(report=report))
+        if key == 'csv':
+            spec[key] = parse_report_csv(value, report)
+        elif key == 'group_by':
+            spec[key] = value.split('+')
+        else:
+            spec[key] = value
+    return spec
+
+
+def parse_period(period: str | list) -> tuple[dt.date, dt.date]:
+    """
+    Parse a period like "2025-01-01..2025-01-31" or a [first, last] list.
+    """
+    if isinstance(period, str):
+        days = period.split('..')
+    else:
+        days = [str(day) for day in period]
+    try:
+        first_day, last_day = (dt.date.fromisoformat(day) for day in days)
+    except ValueError:
+        error(invalid_period_message.format(period=period))
+    if last_day < first_day:
+        error(invalid_period_message.format(period=period))
+    return first_day, last_day
+
+
+def parse_comparison(comparison: str) -> tuple[tuple[dt.date, dt.date], ...]:
+    periods = tuple(
+        parse_period(period.strip()) for period in comparison.split(','))
+    if len(periods) < 2:
+        error(invalid_period_message.format(period=comparison))
+    return periods
+
+
+def read_report_spec(path: Path) -> tuple[list[dict], list]:
+    """
+    Reports and comparisons from a TOML file with [[report]] and
+    [[compare]] tables.
+    """
+    try:
+        with path.expanduser().open('rb') as f:
+            spec = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        error(f'Cannot read report spec {path}: {e}')
+    reports = []
+    for report in spec.get('report', []):
+        unknown = set(report) - set(report_keys)
+        if unknown:
+            error(invalid_report_message.format(report=report))
+        values = {
+            key: str(value) if key in ('start', 'end') else value
+            for key, value in report.items()
+        }
+        if 'csv' in values:
+            values['csv'] = parse_report_csv(values['csv'], report)
+        group_by = values.get('group_by')
+        if isinstance(group_by, str):
+            values['group_by'] = group_by.split('+')
+        elif group_by is not None and not isinstance(group_by, list):
+            error(invalid_report_message.format(report=report))
+        reports.append(values)
+    comparisons = [
+        tuple(parse_period(period) for period in compare.get('periods', []))
+        for compare in spec.get('compare', [])
+    ]
+    return reports, comparisons
+
+
+def get_report_params(
+    params: Params,
+    report: dict,
+    config: Config,
+) -> Params:
+    """
+    Params of a single report of a batch, checked like evaluate_input.
+    """
+    mode = report.get('mode') or config.mode or 'list'
+    if mode not in ('list', 'aggregate'):
+        error(invalid_report_message.format(report=report))
+    interval = report.get('interval') or config.interval
+    if interval not in ('day', 'week'):
+        error(invalid_report_message.format(report=report))
+    if mode == 'aggregate':
+        check_minutes_config(interval, config)
+
+    group_by = report.get('group_by') or None
+    for dimension in group_by or []:
+        if dimension not in group_dimensions:
+            error(invalid_group_by_message.format(dimension=dimension))
+    if mode == 'list' and not group_by and not params.hourly_wage:
+        error(
+            f'Please provide a hourly wage value for "{params.client}" in '
+            ' the config file when using "list" mode'
+        )
+
+    start_date, end_date = get_date_range(
+        report.get('start'), report.get('end'), config)
+    return dataclasses.replace(
+        params,
+        mode=cast(Literal['list', 'aggregate'], mode),
+        interval=cast(Literal['day', 'week'], interval),
+        start_date=start_date,
+        end_date=end_date,
+        csv=bool(report.get('csv', False)),
+        group_by=cast(list[GroupDimension] | None, group_by),
+    )
+
+
+def get_report_names(reports: list[Params], names: list[str | None]):
+    """
+    Unique names of reports for CSV file names, e.g. "aggregate-week".
+    """
+    unique_names: list[str] = []
+    for params, name in zip(reports, names):
+        if not name:
+            name = params.mode
+            if params.group_by:
+                name = f'group-{"-".join(params.group_by)}'
+            elif params.mode == 'aggregate':
+                name = f'{params.mode}-{params.interval}'
+        candidate = name
+        number = 2
+        while candidate in unique_names:
+            candidate = f'{name}-{number}'
+            number += 1
+        unique_names.append(candidate)
+    return unique_names
+
+
+def get_line_range(lines: str | None) -> tuple[int | None, int | None]:
+    if lines is None:
+        return None, None
+    first, separator, last = lines.partition(':')
+    try:
+        line_range = (
+            int(first) if first else None,
+            int(last) if last else None,
+        )
+    except ValueError:
+        error(invalid_line_range_message.format(lines=lines))
+    if separator == '' or any(
+            number is not None and number < 1 for number in line_range):
+        error(invalid_line_range_message.format(lines=lines))
+    return line_range
+
+
 def get_default_client() -> str | None:
     if config.default and 'client' in config.default:
         return config.default['client']
@@ -189,6 +749,11 @@ def run(
             "Default: from start of current month or start_date "
             "in config file if set"
         ))] = None,
+    end: Annotated[str | None, typer.Option(
+        help=(
+            "Use data until this date (inclusive). Format: YYYY-MM-DD. "
+            "Default: today"
+        ))] = None,
     interval: Annotated[str | None, typer.Option(
         help=(
             "Show data aggregated per day or per week. Possible values: "
@@ -200,6 +765,43 @@ def run(
             "Export data to CSV file in your home directory. The file's name "
             "will contain the client's name and the current time"
         ))] = False,
+    validate: Annotated[str | None, typer.Option(
+        help=(
+            "Format check of the tracking file. \"fast\" only checks "
+            "entries changed since the last run. Possible values: "
+            "full|fast|off"
+        ))] = None,
+    group_by: Annotated[list[str] | None, typer.Option(
+        help=(
+            "Sum up work per #tag, description prefix (ticket id or "
+            "'label:') or weekday instead. May be given several times. "
+            "Possible values: tag|prefix|weekday"
+        ))] = None,
+    metrics: Annotated[Path | None, typer.Option(
+        help=(
+            "Record file size, counts and stage timings of this run. A .prom "
+            "file is kept up to date for Prometheus' textfile collector, "
+            "other files get one JSON line per run appended"
+        ))] = None,
+    where: Annotated[list[str] | None, typer.Option(
+        help=(
+            "Only use work units matching a filter, e.g. "
+            "'weekday != sat,sun and minutes >= 30' or "
+            "'description ~ review'. Fields: date, weekday, minutes, "
+            "description. May be given several times, all must match"
+        ))] = None,
+    last: Annotated[str | None, typer.Option(
+        help=(
+            "Use data of the last N days up to today, e.g. 7, or of the "
+            "last N weeks, e.g. 2w. Chronological files are read backwards "
+            "from their end. Instead of --start and --end"
+        ))] = None,
+    incremental: Annotated[bool, typer.Option(
+        help=(
+            "Append the work units added since the last incremental export "
+            "to a CSV file in your home directory named after the client, "
+            "ignoring --end. Edits to exported entries are reported"
+        ))] = False,
 ):
     """
     Aggregate, display and export work time statistics.
@@ -211,11 +813,567 @@ def run(
         interval=interval,
         csv=csv,
         config=config,
+        validate=validate,
+        group_by=group_by,
+        end=end,
+        where=where,
+        last=last,
     )
 
-    repository = FileEditRepository
+    if incremental:
+        if params.mode != 'list' or params.group_by:
+            error(incremental_mode_message)
+        if params.repository != 'file_edit' or params.data_path.is_dir():
+            error(incremental_file_message.format(params.data_path))
+        handle_incremental_export(params)
+        return
+
+    if metrics:
+        params.metrics = RunMetrics(params.client)
+
+    repository = get_repository(params.data_path, params.repository)
     handle_command(params, repository)
 
+    if metrics and params.metrics:
+        params.metrics.finish()
+        write_metrics(params.metrics, metrics.expanduser())
+
+
+@app.command()
+def batch(
+    client: Annotated[str, typer.Argument(
+        default_factory=get_default_client,
+        help=(
+            "May be omitted if a default client is set in config file"
+            " or there is only one client in config's clients table"
+        )
+    )],
+    report: Annotated[list[str] | None, typer.Option(
+        help=(
+            "A report as comma separated key=value pairs with keys name, "
+            "mode, interval, start, end, csv and group_by (joined by +), "
+            "e.g. mode=aggregate,interval=week,csv=true. "
+            "May be given several times"
+        ))] = None,
+    spec: Annotated[Path | None, typer.Option(
+        help=(
+            "TOML file with [[report]] tables using the same keys and "
+            "[[compare]] tables with a list of periods"
+        ))] = None,
+    compare: Annotated[list[str] | None, typer.Option(
+        help=(
+            "Compare periods side by side, e.g. "
+            "2025-01-01..2025-01-31,2025-02-01..2025-02-28. "
+            "May be given several times"
+        ))] = None,
+    csv: Annotated[bool, typer.Option(
+        help="Export period comparisons to CSV files")] = False,
+    validate: Annotated[str | None, typer.Option(
+        help=(
+            "Format check of the tracking file. \"fast\" only checks "
+            "entries changed since the last run. Possible values: "
+            "full|fast|off"
+        ))] = None,
+):
+    """
+    Output several reports and period comparisons from a single parse.
+    """
+    if client is None:
+        error(no_default_client_message)
+    reports = [parse_report_option(text) for text in report or []]
+    comparisons = [parse_comparison(text) for text in compare or []]
+    if spec:
+        spec_reports, spec_comparisons = read_report_spec(spec)
+        reports.extend(spec_reports)
+        comparisons.extend(spec_comparisons)
+    if not reports and not comparisons:
+        error('Please provide at least one --report, --compare or --spec.')
+
+    params = dataclasses.replace(
+        get_check_params(client, config),
+        hourly_wage=get_hourly_wage(client, config),
+        validate=get_validation_level(validate, config),
+        calendar=get_calendar(config),
+        csv=csv,
+    )
+    report_params = [
+        get_report_params(params, report, config) for report in reports]
+    names = get_report_names(
+        report_params, [report.get('name') for report in reports])
+
+    # read the data once for the date ranges of all reports
+    today = dt.date.today()
+    first_days = [report.start_date for report in report_params]
+    last_days = [report.end_date or today for report in report_params]
+    for periods in comparisons:
+        first_days.extend(first_day for first_day, _ in periods)
+        last_days.extend(last_day for _, last_day in periods)
+    params = dataclasses.replace(
+        params, start_date=min(first_days), end_date=max(last_days))
+
+    handle_batch(
+        params,
+        get_repository(params.data_path, params.repository),
+        list(zip(names, report_params)),
+        comparisons,
+    )
+
+
+@app.command()
+def analyze(
+    client: Annotated[str, typer.Argument(
+        default_factory=get_default_client,
+        help=(
+            "May be omitted if a default client is set in config file"
+            " or there is only one client in config's clients table"
+        )
+    )],
+    start: Annotated[str | None, typer.Option(
+        help=(
+            "Use data after this date. Format: YYYY-MM-DD. "
+            "Default: from start of current month or start_date "
+            "in config file if set"
+        ))] = None,
+    end: Annotated[str | None, typer.Option(
+        help=(
+            "Use data until this date (inclusive). Format: YYYY-MM-DD. "
+            "Default: today"
+        ))] = None,
+    csv: Annotated[bool, typer.Option(
+        help=(
+            "Export data to CSV files in your home directory. The files' "
+            "names will contain the client's name and the current time"
+        ))] = False,
+    validate: Annotated[str | None, typer.Option(
+        help=(
+            "Format check of the tracking file. \"fast\" only checks "
+            "entries changed since the last run. Possible values: "
+            "full|fast|off"
+        ))] = None,
+):
+    """
+    Show percentiles of daily work, overtime streaks and 4-week averages.
+    """
+    params = evaluate_input(
+        client=client,
+        mode='aggregate',
+        start=start,
+        interval=None,
+        csv=csv,
+        config=config,
+        validate=validate,
+        end=end,
+    )
+
+    repository = get_repository(params.data_path, params.repository)
+    handle_analyze(params, repository)
+
+
+@app.command()
+def dashboard(
+    clients: Annotated[list[str] | None, typer.Argument(
+        help=(
+            "Clients to include. Default: all clients in config's "
+            "clients table"
+        )
+    )] = None,
+    start: Annotated[str | None, typer.Option(
+        help=(
+            "Use data after this date. Format: YYYY-MM-DD. "
+            "Default: from start of current month or start_date "
+            "in config file if set"
+        ))] = None,
+    end: Annotated[str | None, typer.Option(
+        help=(
+            "Use data until this date (inclusive). Format: YYYY-MM-DD. "
+            "Default: today"
+        ))] = None,
+    output: Annotated[Path | None, typer.Option(
+        help=(
+            "Path of the HTML file. Default: a file in your home directory "
+            "named after the current time"
+        ))] = None,
+    validate: Annotated[str | None, typer.Option(
+        help=(
+            "Format check of the tracking file. \"fast\" only checks "
+            "entries changed since the last run. Possible values: "
+            "full|fast|off"
+        ))] = None,
+):
+    """
+    Write an offline HTML dashboard with heatmap, balance and clients.
+    """
+    params_list = [
+        evaluate_input(
+            client=client,
+            mode='aggregate',
+            start=start,
+            interval='week',
+            csv=False,
+            config=config,
+            validate=validate,
+            end=end,
+        )
+        for client in clients or list(config.clients or [])
+    ]
+    if not params_list:
+        error(no_default_client_message)
+
+    handle_dashboard(
+        [
+            (params, get_repository(params.data_path, params.repository))
+            for params in params_list
+        ],
+        output_path=output.expanduser() if output else None,
+    )
+
+
+@app.command()
+def timeline(
+    clients: Annotated[list[str] | None, typer.Argument(
+        help=(
+            "Clients to include. Default: all clients in config's "
+            "clients table"
+        )
+    )] = None,
+    mode: Annotated[str | None, typer.Option(
+        help=(
+            "List work units or aggregate over interval. Possible values: "
+            "list | aggregate"
+        )
+    )] = None,
+    start: Annotated[str | None, typer.Option(
+        help=(
+            "Use data after this date. Format: YYYY-MM-DD. "
+            "Default: from start of current month or start_date "
+            "in config file if set"
+        ))] = None,
+    end: Annotated[str | None, typer.Option(
+        help=(
+            "Use data until this date (inclusive). Format: YYYY-MM-DD. "
+            "Default: today"
+        ))] = None,
+    interval: Annotated[str | None, typer.Option(
+        help=(
+            "Show data aggregated per day or per week. Possible values: "
+            "day|week"
+        )
+    )] = None,
+    csv: Annotated[bool, typer.Option(
+        help=(
+            "Export data to CSV file in your home directory."
+        ))] = False,
+    validate: Annotated[str | None, typer.Option(
+        help=(
+            "Format check of the tracking files. \"fast\" only checks "
+            "entries changed since the last run. Possible values: "
+            "full|fast|off"
+        ))] = None,
+    where: Annotated[list[str] | None, typer.Option(
+        help=(
+            "Only use work units matching a filter, e.g. "
+            "'weekday != sat,sun and minutes >= 30' or "
+            "'description ~ review'. Fields: date, weekday, minutes, "
+            "description. May be given several times, all must match"
+        ))] = None,
+    last: Annotated[str | None, typer.Option(
+        help=(
+            "Use data of the last N days up to today, e.g. 7, or of the "
+            "last N weeks, e.g. 2w. Chronological files are read backwards "
+            "from their end. Instead of --start and --end"
+        ))] = None,
+):
+    """
+    List or aggregate the work of several clients as one timeline.
+    """
+    params_list = evaluate_timeline_input(
+        clients=clients,
+        mode=mode,
+        start=start,
+        end=end,
+        interval=interval,
+        csv=csv,
+        config=config,
+        validate=validate,
+        where=where,
+        last=last,
+    )
+    handle_timeline([
+        (params, get_repository(params.data_path, params.repository))
+        for params in params_list
+    ])
+
+
+@app.command()
+def search(
+    query: Annotated[str, typer.Argument(
+        help=(
+            "Words that must all occur in the work description, "
+            "case is ignored"
+        )
+    )],
+    client: Annotated[str, typer.Option(
+        default_factory=get_default_client,
+        help=(
+            "May be omitted if a default client is set in config file"
+            " or there is only one client in config's clients table"
+        )
+    )],
+    start: Annotated[str | None, typer.Option(
+        help=(
+            "Use data after this date. Format: YYYY-MM-DD. "
+            "Default: search all data"
+        ))] = None,
+    end: Annotated[str | None, typer.Option(
+        help=(
+            "Use data until this date (inclusive). Format: YYYY-MM-DD. "
+            "Default: today"
+        ))] = None,
+    csv: Annotated[bool, typer.Option(
+        help=(
+            "Export matching work units to CSV file in your home directory."
+        ))] = False,
+):
+    """
+    Find work units by description and sum up their duration and cost.
+    """
+    params = evaluate_input(
+        client=client,
+        mode='list',
+        start=start or dt.date.min.isoformat(),
+        interval=None,
+        csv=csv,
+        config=config,
+        end=end,
+    )
+    handle_search(params, query)
+
+
+@app.command()
+def check(
+    client: Annotated[str, typer.Argument(
+        default_factory=get_default_client,
+        help=(
+            "May be omitted if a default client is set in config file"
+            " or there is only one client in config's clients table"
+        )
+    )],
+    overlaps: Annotated[bool, typer.Option(
+        help=(
+            "Find work units with time ranges (HH:MM-HH:MM) that overlap"
+        ))] = False,
+    all_clients: Annotated[bool, typer.Option(
+        help=(
+            "Check the files of all clients in the config's clients table, "
+            "overlaps are searched across all of them"
+        ))] = False,
+    lines: Annotated[str | None, typer.Option(
+        help=(
+            "Only check the date entries touching this line range. "
+            "Format: FIRST:LAST, e.g. 120:140 or 120:"
+        ))] = None,
+    output_format: Annotated[str, typer.Option(
+        '--format',
+        help=(
+            "Output format of errors. Possible values: text|quickfix|json. "
+            "quickfix prints path:line:column: message lines for editors"
+        ))] = 'text',
+):
+    """
+    Check the format of tracking files and find double-booked time.
+    """
+    if all_clients:
+        clients = list(config.clients or [])
+    else:
+        if client is None:
+            error(no_default_client_message)
+        clients = [client]
+    if output_format not in check_formats:
+        error(invalid_check_format_message.format(
+            output_format=output_format))
+    line_range = get_line_range(lines)
+    params_list = [
+        partition_params
+        for params in (get_check_params(client, config) for client in clients)
+        for partition_params in get_partition_params(params)
+        # only tracking files have a format to check, e.g. journals are
+        # machine-written
+        if partition_params.repository == 'file_edit'
+        and partition_params.data_path.suffix not in ARCHIVE_SUFFIXES
+    ]
+    if not params_list:
+        error(no_files_to_check_message)
+
+    repository = FileEditRepository
+    if not handle_check(
+        params_list,
+        repository,
+        overlaps=overlaps,
+        line_range=line_range,
+        output_format=cast(CheckFormat, output_format),
+    ):
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def convert(
+    source: Annotated[Path, typer.Argument(
+        help="Tracking file (.otl) or journal (.otj) to read")],
+    target: Annotated[Path, typer.Argument(
+        help="Journal (.otj) or tracking file (.otl) to create")],
+):
+    """
+    Convert a tracking file to an append-only journal or back.
+    """
+    source = source.expanduser()
+    target = target.expanduser()
+    if not source.is_file():
+        error(file_does_not_exist_message.format(source))
+    if (source.suffix == JOURNAL_SUFFIX) == (target.suffix == JOURNAL_SUFFIX):
+        error(invalid_conversion_message.format(
+            source=source, target=target, suffix=JOURNAL_SUFFIX))
+    if target.exists():
+        error(file_exists_message.format(target))
+
+    # only imported when needed, like any other backend
+    from trackie.repositories.journal import (
+        convert_journal_to_otl,
+        convert_otl_to_journal,
+    )
+
+    if target.suffix == JOURNAL_SUFFIX:
+        params = get_file_params(source.stem, source, config)
+        count = convert_otl_to_journal(params, target)
+    else:
+        count = convert_journal_to_otl(source, target, spaces=config.spaces)
+    print(GREEN + f'Converted {count} work units to {target}' + RESET)
+
+
+@app.command()
+def fmt(
+    client: Annotated[str, typer.Argument(
+        default_factory=get_default_client,
+        help=(
+            "May be omitted if a default client is set in config file"
+            " or there is only one client in config's clients table"
+        )
+    )],
+):
+    """
+    Sort a tracking file by date, merge entries of the same date and
+    normalize indentation.
+    """
+    if client is None:
+        error(no_default_client_message)
+    params = get_check_params(client, config)
+    if params.repository != 'file_edit':
+        error(f'Only tracking files can be formatted: {params.data_path}')
+    indent = ' ' * config.spaces if config.spaces else '\t'
+    for partition_params in get_partition_params(params):
+        if partition_params.data_path.suffix in ARCHIVE_SUFFIXES:
+            continue
+        result = format_file(partition_params, indent)
+        path = partition_params.data_path
+        if result.changed:
+            print(
+                GREEN + f'Formatted {path}: {result.blocks} entries on '
+                f'{result.dates} dates' + RESET
+            )
+        else:
+            print(f'{path} is formatted already.')
+
+
+@app.command()
+def archive(
+    client: Annotated[str, typer.Argument(
+        default_factory=get_default_client,
+        help=(
+            "May be omitted if a default client is set in config file"
+            " or there is only one client in config's clients table"
+        )
+    )],
+    before: Annotated[int, typer.Option(
+        help="Archive all entries dated before January 1st of this year")],
+    compression: Annotated[str, typer.Option(
+        help="Compression of the archive segment. Possible values: gz|zst"
+    )] = 'gz',
+):
+    """
+    Move closed years of a tracking file into a compressed archive segment.
+    """
+    if client is None:
+        error(no_default_client_message)
+    if compression not in compressions:
+        error(invalid_compression_message.format(compression=compression))
+    if before > dt.date.today().year:
+        error(open_year_message.format(year=before))
+    params = get_check_params(client, config)
+    if params.repository != 'file_edit' or params.data_path.is_dir():
+        error(f'Only tracking files can be archived: {params.data_path}')
+
+    segment_path = archive_before(
+        params, before, cast(Compression, compression))
+    if segment_path is None:
+        print(f'No entries before {before} in {params.data_path}.')
+    else:
+        print(GREEN + f'Archived entries to {segment_path}' + RESET)
+
+
+@app.command()
+def team(
+    location: Annotated[str, typer.Argument(
+        help=(
+            "Directory with one .otl tracking file per team member "
+            "or a glob pattern matching them"
+        )
+    )],
+    start: Annotated[str | None, typer.Option(
+        help=(
+            "Use data after this date. Format: YYYY-MM-DD. "
+            "Default: from start of current month or start_date "
+            "in config file if set"
+        ))] = None,
+    end: Annotated[str | None, typer.Option(
+        help=(
+            "Use data until this date (inclusive). Format: YYYY-MM-DD. "
+            "Default: today"
+        ))] = None,
+    interval: Annotated[str | None, typer.Option(
+        help=(
+            "Show data aggregated per day or per week. Possible values: "
+            "day|week"
+        )
+    )] = None,
+    jobs: Annotated[int | None, typer.Option(
+        help=(
+            "Number of worker processes parsing files. "
+            "Default: number of CPUs"
+        ))] = None,
+    csv: Annotated[bool, typer.Option(
+        help=(
+            "Export team and member statistics to CSV files in your home "
+            "directory."
+        ))] = False,
+    validate: Annotated[str | None, typer.Option(
+        help=(
+            "Format check of the tracking files. Possible values: "
+            "full|fast|off"
+        ))] = None,
+):
+    """
+    Aggregate the tracking files of a whole team into one report.
+    """
+    params_list = evaluate_team_input(
+        location=location,
+        start=start,
+        end=end,
+        interval=interval,
+        csv=csv,
+        config=config,
+        validate=validate,
+    )
+    handle_team(params_list, jobs=jobs)
+
 
 if __name__ == '__main__':
     app()
@@ -4,23 +4,51 @@ from decimal import Decimal
 from pathlib import Path
 import re
 import tomllib
-from typing import Literal, NewType
+from typing import Literal, NewType, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from trackie.filters import Filter
+    from trackie.metrics import RunMetrics
+    from trackie.work.workdays import WorkCalendar
 
 
 MinutesPerDay = NewType('MinutesPerDay', int)
 MinutesPerWeek = NewType('MinutesPerWeek', int)
 
+ValidationLevel = Literal['full', 'fast', 'off']
+validation_levels = ('full', 'fast', 'off')
+
 date_pattern = re.compile(r'''
     ^20[23]\d-  # year
     (01|02|03|04|05|06|07|08|09|10|11|12)-     # month
     (01|02|03|04|05|06|07|08|09|10|11|12|13|14|15|16|17|18|19|20|21|22|23|24|25|26|27|28|29|30|31)$   # day  # noqa: W501
 ''', re.VERBOSE)
 
+# a duration is either minutes or a time range like 9:15-10:30
+time_range = r'([01]?\d|2[0-3]):([0-5]\d)-([01]?\d|2[0-3]):([0-5]\d)'
+time_range_pattern = re.compile(time_range)
+
 tabs_description_pattern = re.compile(r'^\t[^\t].*')
-tabs_duration_pattern = re.compile(r'^\t\t\d+')
+# anchored at the end, so e.g. 30min is reported instead of parsed
+tabs_duration_pattern = re.compile(rf'^\t\t({time_range}|\d+)\s*$')
 
 spaces_description_pattern = r'^{}[^ ].*'
-spaces_duration_pattern = r'^{}\d+'
+spaces_duration_pattern = rf'^{{}}({time_range}|\d+)\s*$'
+
+# dimensions of work descriptions for --group-by
+tag_pattern = re.compile(r'#([\w-]+)')
+prefix_pattern = re.compile(r'''
+    ^\s*(
+        [A-Za-z][A-Za-z0-9]*-\d+  # ticket id, e.g. ABC-123
+        |[^\s:]+(?=:)            # or label followed by a colon
+    )
+''', re.VERBOSE)
+
+GroupDimension = Literal['tag', 'prefix', 'weekday']
+group_dimensions = ('tag', 'prefix', 'weekday')
+
+CheckFormat = Literal['text', 'quickfix', 'json']
+check_formats = ('text', 'quickfix', 'json')
 
 
 @dataclass
@@ -38,6 +66,12 @@ class Config:
     currency_sign: str | None = '€'
     display_hours: bool | None = True
     repository: str = "file_edit"
+    # backend per client, overriding repository
+    repositories: dict[str, str] | None = None
+    validate: ValidationLevel = 'fast'
+    cache_dir: str | None = None
+    chronological: bool = False
+    calendar: dict | None = None
 
 
 @dataclass
@@ -57,6 +91,28 @@ class Params:
     display_hours: bool
     currency_sign: str | None = '€'
     end_date: dt.date | None = None
+    validate: ValidationLevel = 'full'
+    cache_dir: Path | None = None
+    group_by: list[GroupDimension] | None = None
+    # dates in the file never decrease, reading may stop after end_date
+    chronological: bool = False
+    # start_date is close to the end of the file, chronological files are
+    # read backwards from their end to find it
+    tail: bool = False
+    calendar: 'WorkCalendar | None' = None
+    # only work units matching this --where filter are read
+    where: 'Filter | None' = None
+    # name of the storage backend, see trackie.repositories.registry
+    repository: str = 'file_edit'
+    # where data_path is mirrored from, see trackie.repositories.remote
+    url: str | None = None
+    # counters and stage timings of the run are recorded here if set
+    metrics: 'RunMetrics | None' = None
+
+    def __post_init__(self) -> None:
+        # grouping by a dimension twice would count its units twice
+        if self.group_by is not None:
+            self.group_by = list(dict.fromkeys(self.group_by)) or None
 
 
 def get_config(path: str | None = None):
@@ -81,9 +137,27 @@ def get_config(path: str | None = None):
         interval=cfg.get('interval', 'week'),
         currency_sign=cfg.get('currency_sign', '€'),
         display_hours=cfg.get('display_hours', True),
+        repository=cfg.get('repository', 'file_edit'),
+        repositories=cfg.get('repositories'),
+        validate=cfg.get('validate', 'fast'),
+        cache_dir=cfg.get('cache_dir'),
+        chronological=cfg.get('chronological', False),
+        calendar=cfg.get('calendar'),
     )
 
     return config
 
 
-config = get_config()
+def get_line_patterns(config: Config) -> tuple[re.Pattern, re.Pattern]:
+    """
+    Description and duration patterns for tabs or the configured spaces.
+    """
+    if config.spaces:
+        description_pattern = re.compile(
+            spaces_description_pattern.format(' ' * config.spaces))
+        duration_pattern = re.compile(
+            spaces_duration_pattern.format(' ' * config.spaces * 2))
+    else:
+        description_pattern = tabs_description_pattern
+        duration_pattern = tabs_duration_pattern
+    return description_pattern, duration_pattern
@@ -0,0 +1,157 @@
+import datetime as dt
+import html
+import json
+from pathlib import Path
+
+DASHBOARD_VERSION = 1
+
+# the page draws everything from the embedded aggregates with plain SVG, so
+# it works offline and without any third-party scripts
+TEMPLATE = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; color: #222; }}
+h1 {{ font-size: 1.4em; }}
+h2 {{ font-size: 1.1em; margin-top: 2em; }}
+svg text {{ font-size: 10px; fill: #555; }}
+table {{ border-collapse: collapse; }}
+td, th {{ padding: 0.2em 0.8em; text-align: right; }}
+td:first-child, th:first-child {{ text-align: left; }}
+tr:nth-child(even) {{ background: #f4f4f4; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<p id="range"></p>
+<h2>Calendar</h2>
+<div id="heatmap"></div>
+<h2>Weekly balance</h2>
+<div id="balance"></div>
+<h2>Clients</h2>
+<table id="clients"></table>
+<script type="application/json" id="data">{data}</script>
+<script>
+const data = JSON.parse(document.getElementById('data').textContent);
+const NS = 'http://www.w3.org/2000/svg';
+const EPOCH = 719163;  // ordinal of 1970-01-01
+const toDate = (ordinal) => new Date((ordinal - EPOCH) * 86400000);
+const iso = (ordinal) => toDate(ordinal).toISOString().slice(0, 10);
+const hours = (minutes) => {{
+  const sign = minutes < 0 ? '-' : '';
+  minutes = Math.abs(minutes);
+  return sign + Math.floor(minutes / 60) + ':'
+    + String(minutes % 60).padStart(2, '0');
+}};
+function svg(tag, attributes, parent) {{
+  const element = document.createElementNS(NS, tag);
+  for (const [key, value] of Object.entries(attributes)) {{
+    element.setAttribute(key, value);
+  }}
+  if (parent) parent.appendChild(element);
+  return element;
+}}
+function title(element, text) {{
+  svg('title', {{}}, element).textContent = text;
+}}
+
+document.getElementById('range').textContent =
+  iso(data.start) + ' to ' + iso(data.end);
+
+// sum of all clients per day
+const days = new Map();
+for (const client of Object.values(data.clients)) {{
+  client.days.forEach((ordinal, index) => {{
+    days.set(ordinal, (days.get(ordinal) || 0) + client.minutes[index]);
+  }});
+}}
+const maximum = Math.max(1, ...days.values());
+const cell = 12;
+const firstMonday = data.start - (toDate(data.start).getUTCDay() + 6) % 7;
+const weeks = Math.floor((data.end - firstMonday) / 7) + 1;
+const heatmap = svg('svg', {{
+  width: weeks * cell + 30, height: 7 * cell + 20,
+}}, document.getElementById('heatmap'));
+for (let ordinal = data.start; ordinal <= data.end; ordinal++) {{
+  const minutes = days.get(ordinal) || 0;
+  const offset = ordinal - firstMonday;
+  const rect = svg('rect', {{
+    x: 30 + Math.floor(offset / 7) * cell, y: (offset % 7) * cell,
+    width: cell - 2, height: cell - 2,
+    fill: minutes ? `rgba(38, 166, 65, ${{0.15 + 0.85 * minutes / maximum}})`
+                  : '#ebedf0',
+  }}, heatmap);
+  title(rect, iso(ordinal) + ': ' + hours(minutes));
+}}
+['Mon', 'Wed', 'Fri'].forEach((name, index) => {{
+  svg('text', {{ x: 0, y: index * 2 * cell + 9 }}, heatmap).textContent = name;
+}});
+
+// diff of each week as bars, the carryover as line
+const balance = data.weeks;
+const width = 8;
+const extent = Math.max(
+  1, ...balance.diff.map(Math.abs), ...balance.carryover.map(Math.abs));
+const height = 200;
+const zero = height / 2;
+const scale = (zero - 10) / extent;
+const chart = svg('svg', {{
+  width: balance.labels.length * width + 40, height: height,
+}}, document.getElementById('balance'));
+svg('line', {{
+  x1: 40, x2: 40 + balance.labels.length * width, y1: zero, y2: zero,
+  stroke: '#999',
+}}, chart);
+svg('text', {{ x: 0, y: 12 }}, chart).textContent = hours(extent);
+svg('text', {{ x: 0, y: height - 2 }}, chart).textContent = hours(-extent);
+const points = [];
+balance.labels.forEach((label, index) => {{
+  const diff = balance.diff[index];
+  const bar = svg('rect', {{
+    x: 40 + index * width, y: diff > 0 ? zero - diff * scale : zero,
+    width: width - 1, height: Math.abs(diff) * scale,
+    fill: diff < 0 ? '#d73a49' : '#2188ff',
+  }}, chart);
+  title(bar, label + ': ' + hours(diff) + ', balance '
+    + hours(balance.carryover[index]));
+  points.push(
+    (40 + index * width + width / 2) + ','
+    + (zero - balance.carryover[index] * scale));
+}});
+svg('polyline', {{
+  points: points.join(' '), fill: 'none', stroke: '#222',
+}}, chart);
+
+const table = document.getElementById('clients');
+const total = Object.values(data.clients)
+  .reduce((sum, client) => sum + client.total, 0);
+table.innerHTML = '<tr><th>Client</th><th>Hours</th><th>Share</th>'
+  + '<th>Days worked</th></tr>';
+for (const [name, client] of Object.entries(data.clients)) {{
+  const row = table.insertRow();
+  [
+    name, hours(client.total),
+    (total ? 100 * client.total / total : 0).toFixed(1) + ' %',
+    client.days.length,
+  ].forEach((value) => {{ row.insertCell().textContent = value; }});
+}}
+</script>
+</body>
+</html>
+'''
+
+
+def render_dashboard(data: dict, *, title: str) -> str:
+    """
+    A self-contained HTML page drawing the precomputed aggregates.
+    """
+    # keep "</script>" in client names from ending the script
+    encoded = json.dumps(data, separators=(',', ':')).replace('</', '<\\/')
+    return TEMPLATE.format(title=html.escape(title), data=encoded)
+
+
+def build_dashboard_path() -> Path:
+    now = dt.datetime.now().strftime('%Y-%m-%d-%H-%M')
+    return Path.home() / f'trackie-dashboard-{now}.html'
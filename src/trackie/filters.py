@@ -0,0 +1,340 @@
+"""
+The --where filter language, e.g.
+
+    date >= 2025-01-01 and weekday != sat,sun and minutes >= 30
+    description ~ review or (description =~ "^ABC-\\d+" and not minutes < 15)
+
+Comparisons of date, weekday, minutes and description are combined with
+and, or, not and parentheses. Dates are YYYY-MM-DD, minutes a number or
+H:MM, weekdays mon to sun separated by commas. Descriptions are compared
+with ~ and !~ (contains or not, case is ignored), =~ (regular expression
+search), = and !=. Values with spaces or parentheses need quotes.
+
+An expression is compiled once into a Filter. Repositories test the date
+of an entry before parsing it and a work unit's minutes before its
+description is put together.
+"""
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+import datetime as dt
+import operator
+import re
+
+FIELDS = ('date', 'weekday', 'minutes', 'description')
+WEEKDAY_NAMES = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+ORDERINGS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+token_pattern = re.compile(r'''
+    \s*(?:
+        (?P<paren>[()])
+        |(?P<operator><=|>=|!=|=~|!~|[<>=~])
+        |"(?P<double>(?:[^"\\]|\\.)*)"
+        |'(?P<single>[^']*)'
+        |(?P<word>[^\s()<>=!~"']+)
+    )
+''', re.VERBOSE)
+minutes_pattern = re.compile(r'(\d+)(?::([0-5]\d))?')
+
+# a predicate on the date, minutes and description of a work unit
+Predicate = Callable[[dt.date, int, str], bool]
+# whether any work unit of a date can match, None if that depends on more
+# than the date
+DatePredicate = Callable[[dt.date], bool | None]
+
+
+@dataclass(frozen=True)
+class Filter:
+    """
+    A compiled --where expression.
+    """
+    expression: str
+    matches: Predicate
+    on_date: DatePredicate
+    # description may be passed as '' otherwise
+    needs_description: bool
+
+    def excludes_date(self, date: dt.date) -> bool:
+        return self.on_date(date) is False
+
+
+@dataclass(frozen=True)
+class Token:
+    kind: str
+    value: str
+    # quoted values are never keywords
+    quoted: bool = False
+
+
+def tokenize(expression: str) -> list[Token]:
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = token_pattern.match(expression, position)
+        if match is None or match.end() == position:
+            raise ValueError(
+                f'Unexpected "{expression[position:].strip()}" in filter.')
+        position = match.end()
+        if match['double'] is not None:
+            tokens.append(Token(
+                'value', re.sub(r'\\(["\\])', r'\1', match['double']),
+                True))
+        elif match['single'] is not None:
+            tokens.append(Token('value', match['single'], True))
+        elif match['paren']:
+            tokens.append(Token('paren', match['paren']))
+        elif match['operator']:
+            tokens.append(Token('operator', match['operator']))
+        else:
+            tokens.append(Token('value', match['word']))
+    return tokens
+
+
+def compile_comparison(
+    field: str,
+    op: str,
+    value: str,
+) -> tuple[Predicate, DatePredicate]:
+    def invalid(reason: str) -> ValueError:
+        return ValueError(f'Invalid filter "{field} {op} {value}": {reason}')
+
+    if field == 'date':
+        if op not in ORDERINGS:
+            raise invalid('dates are compared with = != < <= > >=')
+        try:
+            date_value = dt.date.fromisoformat(value)
+        except ValueError:
+            raise invalid('dates are written YYYY-MM-DD') from None
+        compare = ORDERINGS[op]
+        return (
+            lambda date, minutes, description: compare(date, date_value),
+            lambda date: compare(date, date_value),
+        )
+
+    if field == 'weekday':
+        if op not in ('=', '!='):
+            raise invalid('weekdays are compared with = !=')
+        weekdays = set()
+        for name in value.lower().split(','):
+            if name[:3] not in WEEKDAY_NAMES:
+                raise invalid('weekdays are mon, tue, wed, thu, fri, sat, sun')
+            weekdays.add(WEEKDAY_NAMES.index(name[:3]))
+        included = op == '='
+        return (
+            lambda date, minutes, description: (
+                (date.weekday() in weekdays) == included),
+            lambda date: (date.weekday() in weekdays) == included,
+        )
+
+    if field == 'minutes':
+        if op not in ORDERINGS:
+            raise invalid('minutes are compared with = != < <= > >=')
+        match = minutes_pattern.fullmatch(value)
+        if match is None:
+            raise invalid('minutes are a number or H:MM')
+        if match[2] is None:
+            minutes_value = int(match[1])
+        else:
+            minutes_value = int(match[1]) * 60 + int(match[2])
+        compare = ORDERINGS[op]
+        return (
+            lambda date, minutes, description: compare(minutes, minutes_value),
+            lambda date: None,
+        )
+
+    if field == 'description':
+        predicate: Predicate
+        if op in ('~', '!~'):
+            text = value.casefold()
+            contained = op == '~'
+            predicate = (
+                lambda date, minutes, description: (
+                    (text in description.casefold()) == contained))
+        elif op == '=~':
+            try:
+                pattern = re.compile(value)
+            except re.error as e:
+                raise invalid(str(e)) from None
+            predicate = (
+                lambda date, minutes, description: (
+                    pattern.search(description.strip()) is not None))
+        elif op in ('=', '!='):
+            equal = op == '='
+            predicate = (
+                lambda date, minutes, description: (
+                    (description.strip() == value) == equal))
+        else:
+            raise invalid('descriptions are compared with ~ !~ =~ = !=')
+        return predicate, lambda date: None
+
+    raise ValueError(
+        f'Unknown filter field "{field}". '
+        f'Possible values: {" | ".join(FIELDS)}'
+    )
+
+
+def combine_or(
+    operands: Sequence[tuple[Predicate, DatePredicate]],
+) -> tuple[Predicate, DatePredicate]:
+    if len(operands) == 1:
+        return operands[0]
+    predicates = [predicate for predicate, _ in operands]
+    date_predicates = [on_date for _, on_date in operands]
+
+    def on_date(date: dt.date) -> bool | None:
+        results = [predicate(date) for predicate in date_predicates]
+        if True in results:
+            return True
+        if None in results:
+            return None
+        return False
+
+    return (
+        lambda date, minutes, description: any(
+            predicate(date, minutes, description)
+            for predicate in predicates),
+        on_date,
+    )
+
+
+def combine_and(
+    operands: Sequence[tuple[Predicate, DatePredicate]],
+) -> tuple[Predicate, DatePredicate]:
+    if len(operands) == 1:
+        return operands[0]
+    predicates = [predicate for predicate, _ in operands]
+    date_predicates = [on_date for _, on_date in operands]
+
+    def on_date(date: dt.date) -> bool | None:
+        results = [predicate(date) for predicate in date_predicates]
+        if False in results:
+            return False
+        if None in results:
+            return None
+        return True
+
+    return (
+        lambda date, minutes, description: all(
+            predicate(date, minutes, description)
+            for predicate in predicates),
+        on_date,
+    )
+
+
+class Parser:
+    """
+    Recursive descent over the tokens of an expression:
+
+        or := and ("or" and)*
+        and := not ("and" not)*
+        not := "not" not | "(" or ")" | FIELD OPERATOR VALUE
+    """
+    def __init__(self, tokens: Sequence[Token]) -> None:
+        self.tokens = tokens
+        self.position = 0
+        self.fields: set[str] = set()
+
+    def peek(self) -> Token | None:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def take(self) -> Token:
+        token = self.peek()
+        if token is None:
+            raise ValueError('Filter ends too early.')
+        self.position += 1
+        return token
+
+    def is_keyword(self, keyword: str) -> bool:
+        token = self.peek()
+        return (
+            token is not None and token.kind == 'value' and not token.quoted
+            and token.value.lower() == keyword
+        )
+
+    def parse(self) -> tuple[Predicate, DatePredicate]:
+        predicates = self.parse_or()
+        token = self.peek()
+        if token is not None:
+            raise ValueError(f'Unexpected "{token.value}" in filter.')
+        return predicates
+
+    def parse_or(self) -> tuple[Predicate, DatePredicate]:
+        operands = [self.parse_and()]
+        while self.is_keyword('or'):
+            self.take()
+            operands.append(self.parse_and())
+        return combine_or(operands)
+
+    def parse_and(self) -> tuple[Predicate, DatePredicate]:
+        operands = [self.parse_not()]
+        while self.is_keyword('and'):
+            self.take()
+            operands.append(self.parse_not())
+        return combine_and(operands)
+
+    def parse_not(self) -> tuple[Predicate, DatePredicate]:
+        if self.is_keyword('not'):
+            self.take()
+            predicate, date_predicate = self.parse_not()
+
+            def on_date(date: dt.date) -> bool | None:
+                result = date_predicate(date)
+                return None if result is None else not result
+
+            return (
+                lambda date, minutes, description: not predicate(
+                    date, minutes, description),
+                on_date,
+            )
+        token = self.take()
+        if token.kind == 'paren' and token.value == '(':
+            predicates = self.parse_or()
+            token = self.take()
+            if token.kind != 'paren' or token.value != ')':
+                raise ValueError(f'Expected ")" instead of "{token.value}".')
+            return predicates
+        if token.kind != 'value' or token.quoted:
+            raise ValueError(f'Expected a field instead of "{token.value}".')
+        field = token.value.lower()
+        op = self.take()
+        if op.kind != 'operator':
+            raise ValueError(
+                f'Expected a comparison after "{field}" '
+                f'instead of "{op.value}".')
+        value = self.take()
+        if value.kind != 'value':
+            raise ValueError(f'Expected a value instead of "{value.value}".')
+        self.fields.add(field)
+        return compile_comparison(field, op.value, value.value)
+
+
+def compile_filter(expressions: Sequence[str]) -> Filter:
+    """
+    Compile --where expressions, all of which have to match.
+
+    Raises ValueError if an expression is malformed.
+    """
+    operands = []
+    fields: set[str] = set()
+    for expression in expressions:
+        parser = Parser(tokenize(expression))
+        operands.append(parser.parse())
+        fields |= parser.fields
+    matches, on_date = combine_and(operands)
+    return Filter(
+        expression=' and '.join(
+            f'({expression})' for expression in expressions),
+        matches=matches,
+        on_date=on_date,
+        needs_description='description' in fields,
+    )
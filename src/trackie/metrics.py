@@ -0,0 +1,162 @@
+from collections.abc import Generator, Iterable
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
+import json
+from pathlib import Path
+import time
+from typing import TypeVar
+
+STAGES = ('read', 'validate', 'parse', 'aggregate', 'render')
+
+# metric name: (help text, field of RunMetrics)
+GAUGES = {
+    'trackie_last_run_timestamp_seconds': (
+        'Unix time the run started.', 'started'),
+    'trackie_run_duration_seconds': (
+        'Wall time of the whole run.', 'duration'),
+    'trackie_file_bytes': ('Size of the tracking file.', 'file_bytes'),
+    'trackie_file_lines': ('Non-empty lines read.', 'lines'),
+    'trackie_blocks': ('Date entries read.', 'blocks'),
+    'trackie_units_parsed': (
+        'Work units parsed within the date range.', 'units_parsed'),
+    'trackie_units_filtered': (
+        'Work units skipped outside the date range.', 'units_filtered'),
+}
+STAGE_GAUGE = 'trackie_stage_duration_seconds'
+STAGE_HELP = 'Time spent per stage of the run.'
+
+T = TypeVar('T')
+
+NO_STAGE = nullcontext()
+
+
+def no_stage(name: str) -> nullcontext:
+    """
+    Stand-in for RunMetrics.stage when no metrics are recorded.
+    """
+    return NO_STAGE
+
+
+@dataclass
+class RunMetrics:
+    """
+    Counters and stage durations of one run for one client.
+    """
+    client: str
+    command: str = 'run'
+    started: float = field(default_factory=time.time)
+    duration: float = 0.0
+    file_bytes: int = 0
+    lines: int = 0
+    blocks: int = 0
+    units_parsed: int = 0
+    units_filtered: int = 0
+    stages: dict[str, float] = field(
+        default_factory=lambda: dict.fromkeys(STAGES, 0.0))
+
+    @contextmanager
+    def stage(self, name: str) -> Generator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+
+    def timed(self, iterable: Iterable[T], name: str) -> Generator[T]:
+        """
+        Add the time spent producing each item of iterable to a stage.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.stages[name] += time.perf_counter() - start
+            yield item
+
+    def finish(self) -> None:
+        self.duration = time.time() - self.started
+
+
+def escape_label(value: str) -> str:
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+
+
+def get_samples(metrics: RunMetrics) -> dict[str, list[str]]:
+    """
+    Prometheus sample lines of a run by metric name.
+    """
+    labels = (
+        f'client="{escape_label(metrics.client)}",'
+        f'command="{escape_label(metrics.command)}"'
+    )
+    samples = {
+        name: [f'{name}{{{labels}}} {getattr(metrics, attribute)}']
+        for name, (_, attribute) in GAUGES.items()
+    }
+    samples[STAGE_GAUGE] = [
+        f'{STAGE_GAUGE}{{{labels},stage="{stage}"}} {seconds:.6f}'
+        for stage, seconds in metrics.stages.items()
+    ]
+    return samples
+
+
+def update_prometheus_textfile(metrics: RunMetrics, path: Path) -> None:
+    """
+    Replace the samples of this client and command in a textfile for
+    node_exporter's textfile collector, keeping the other clients' ones.
+
+    The file is replaced atomically, so the collector never reads a
+    half-written file.
+    """
+    own_labels = (
+        f'client="{escape_label(metrics.client)}",'
+        f'command="{escape_label(metrics.command)}"'
+    )
+    samples: dict[str, list[str]] = {}
+    try:
+        lines = path.read_text().splitlines()
+    except FileNotFoundError:
+        lines = []
+    for line in lines:
+        if not line or line.startswith('#') or own_labels in line:
+            continue
+        name = line.split('{', 1)[0].split(' ', 1)[0]
+        samples.setdefault(name, []).append(line)
+    for name, new_samples in get_samples(metrics).items():
+        samples.setdefault(name, []).extend(new_samples)
+
+    helps = {
+        name: description for name, (description, _) in GAUGES.items()}
+    helps[STAGE_GAUGE] = STAGE_HELP
+    text = []
+    for name, name_samples in samples.items():
+        if name in helps:
+            text.append(f'# HELP {name} {helps[name]}')
+            text.append(f'# TYPE {name} gauge')
+        text.extend(sorted(name_samples))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_text('\n'.join(text) + '\n')
+    tmp_path.replace(path)
+
+
+def append_json_line(metrics: RunMetrics, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('a') as f:
+        f.write(json.dumps(asdict(metrics), separators=(',', ':')) + '\n')
+
+
+def write_metrics(metrics: RunMetrics, path: Path) -> None:
+    """
+    Record the run in a Prometheus textfile (.prom) or JSON lines file.
+    """
+    if path.suffix == '.prom':
+        update_prometheus_textfile(metrics, path)
+    else:
+        append_json_line(metrics, path)
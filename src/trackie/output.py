@@ -1,34 +1,67 @@
-from collections.abc import Generator, Sequence
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from contextlib import contextmanager
 import csv
 import datetime as dt
 from decimal import Decimal
-from typing import cast
+import json
+from typing import cast, TextIO
 
 from trackie.ansi_colors import GREEN, RED, RESET
-from trackie.conf import Params
-from trackie.utils import daterange_from_week
-from trackie.work.models import DayStat, WeekStat, WorkUnit
+from trackie.conf import CheckFormat, Params
+from trackie.utils import daterange_from_week, FormatError
+from trackie.work.models import (
+    Analysis,
+    DayStat,
+    GroupStat,
+    MemberStat,
+    Overlap,
+    PeriodStat,
+    WeekStat,
+    WorkUnit,
+)
 
 from pathlib import Path
 from rich.console import Console
 from rich.table import Table
 
 
-def build_output_path(params: Params) -> Path:
+def build_output_path(params: Params, kind: str | None = None) -> Path:
     output_filename = [params.client.lower()]
-    output_filename.append(f'-{params.mode}_statistics-')
+    output_filename.append(f'-{kind or params.mode}_statistics-')
     output_filename.append(dt.datetime.now().strftime('%Y-%m-%d-%H-%M'))
     output_filename.append('.csv')
     output_path = Path.home() / ''.join(output_filename)
     return output_path
 
 
+@contextmanager
+def open_csv(path: Path) -> Iterator[TextIO]:
+    """
+    Open a CSV file for writing that only appears once it is complete.
+
+    Rows go to a temporary file next to it, renamed on success and removed
+    if anything fails meanwhile, e.g. a format error in the tracking file
+    read while writing.
+    """
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    try:
+        with tmp_path.open('w', newline='') as f:
+            yield f
+        tmp_path.replace(path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
 def get_unit_balance_signs(
     stat_unit: DayStat | WeekStat,
     minutes_per_unit: int
 ) -> str:
     parts = []
     hours_per_unit = minutes_per_unit // 60
+    if not hours_per_unit:
+        # nothing or less than an hour expected, e.g. on holidays
+        return f'{int(stat_unit.minutes // 60) * "+"}'
     sign = hours_per_unit / 10
 
     hours_done = stat_unit.minutes // 60
@@ -43,8 +76,19 @@ def get_unit_balance_signs(
     return ''.join(parts)
 
 
+def get_expected(stat_unit: DayStat | WeekStat, default: int) -> int:
+    """
+    Minutes expected for the stat unit, from the calendar if there is one.
+    """
+    if stat_unit.expected is None:
+        return default
+    return stat_unit.expected
+
+
 def format_hours(value: int) -> str:
-    return f'{value // 60}:{(value % 60):02d}'
+    sign = '-' if value < 0 else ''
+    value = abs(value)
+    return f'{sign}{value // 60}:{(value % 60):02d}'
 
 
 def format_stat_unit(
@@ -92,10 +136,11 @@ def pretty_print_day_stats(
     minutes_per_day = cast(int, params.minutes_per_day)
 
     for day_stat in day_stats:
-        balance = day_stat.minutes - minutes_per_day
-        signs = get_unit_balance_signs(day_stat, minutes_per_day)
+        expected = get_expected(day_stat, minutes_per_day)
+        balance = day_stat.minutes - expected
+        signs = get_unit_balance_signs(day_stat, expected)
         elapsed, balance_str, carryover = format_stat_unit(
-            day_stat, minutes_per_day, balance, params.display_hours,
+            day_stat, expected, balance, params.display_hours,
             csv=False)
 
         table.add_row(
@@ -106,12 +151,14 @@ def pretty_print_day_stats(
             carryover,
         )
     console.print(table)
+    if not day_stats:
+        return
     carryover = day_stats[-1].carryover
     if params.display_hours:
         print(
             f'Current Balance: {GREEN if carryover >= 0 else RED}'
             f'{"Plus" if carryover > 0 else "Minus"} '
-            f'{carryover // 60}:{(carryover % 60):02d}{RESET}'
+            f'{format_hours(abs(carryover))}{RESET}'
         )
     else:
         print(
@@ -123,25 +170,28 @@ def pretty_print_day_stats(
 def output_stats_csv(
     stat_units: Sequence[DayStat] | Sequence[WeekStat],
     params: Params,
+    kind: str | None = None,
 ) -> Path:
-    output_path = build_output_path(params)
+    output_path = build_output_path(params, kind)
     head_row = [
         "Hours" if params.display_hours else "Minutes", "Balance", "Carryover"
     ]
     # already checked in evaluate_input
     minutes_per_day = cast(int, params.minutes_per_day)
 
-    with open(output_path, 'w', newline='') as csv_file:
+    with open_csv(output_path) as csv_file:
         writer = csv.writer(
             csv_file, dialect='excel', quotechar='"', quoting=csv.QUOTE_MINIMAL
         )
         if params.interval == 'day':
             stat_units = cast(Sequence[DayStat], stat_units)
             head_row.insert(0, 'Day')
+            writer.writerow(head_row)
             for day_stat in stat_units:
-                balance = day_stat.minutes - minutes_per_day
+                expected = get_expected(day_stat, minutes_per_day)
+                balance = day_stat.minutes - expected
                 elapsed, balance_str, carryover = format_stat_unit(
-                    day_stat, minutes_per_day, balance,
+                    day_stat, expected, balance,
                     params.display_hours, csv=True)
 
                 writer.writerow([
@@ -160,9 +210,10 @@ def output_stats_csv(
             for week_stat in stat_units:
                 first_day, last_day = daterange_from_week(
                     week_stat.year, week_stat.week, exclude_weekend=False)
-                balance = week_stat.minutes - minutes_per_week
+                expected = get_expected(week_stat, minutes_per_week)
+                balance = week_stat.minutes - expected
                 elapsed, balance_str, carryover = format_stat_unit(
-                    week_stat, minutes_per_week, balance,
+                    week_stat, expected, balance,
                     params.display_hours, csv=True)
 
                 writer.writerow([
@@ -195,10 +246,11 @@ def pretty_print_week_stats(
         first_day, last_day = daterange_from_week(
             week_stat.year, week_stat.week, exclude_weekend=False)
 
-        balance = week_stat.minutes - minutes_per_week
-        signs = get_unit_balance_signs(week_stat, minutes_per_week)
+        expected = get_expected(week_stat, minutes_per_week)
+        balance = week_stat.minutes - expected
+        signs = get_unit_balance_signs(week_stat, expected)
         elapsed, balance_str, carryover = format_stat_unit(
-            week_stat, minutes_per_week, balance, params.display_hours,
+            week_stat, expected, balance, params.display_hours,
             csv=False)
 
         table.add_row(
@@ -209,12 +261,14 @@ def pretty_print_week_stats(
             carryover,
         )
     console.print(table)
+    if not week_stats:
+        return
     carryover = week_stats[-1].carryover
     if params.display_hours:
         print(
             f'Current Balance: {GREEN if carryover >= 0 else RED}'
             f'{"Plus" if carryover > 0 else "Minus"} '
-            f'{carryover // 60}:{(carryover % 60):02d}{RESET}'
+            f'{format_hours(abs(carryover))}{RESET}'
         )
     else:
         print(
@@ -271,34 +325,483 @@ def pretty_print_work_units(
     console.print(table)
 
 
+def build_export_path(params: Params) -> Path:
+    """
+    The CSV file incremental exports of a client are appended to.
+    """
+    return Path.home() / f'{params.client.lower()}-export.csv'
+
+
+def get_work_units_header(params) -> list[str]:
+    return [
+        "Date",
+        "Work",
+        f"Duration ({'hours' if params.display_hours else 'minutes'})",
+        f"Cost ({params.currency_sign})"
+    ]
+
+
+def get_work_unit_row(work_unit: WorkUnit, params) -> list[str]:
+    cost = round(Decimal(work_unit.minutes / 60) * params.hourly_wage, 2)
+    if params.display_hours:
+        duration = format_hours(work_unit.minutes)
+    else:
+        duration = str(work_unit.minutes)
+    return [
+        work_unit.date.strftime('%Y-%m-%d'),
+        work_unit.description,
+        duration,
+        str(cost)
+    ]
+
+
 def output_work_units_csv(
-    work_units: Generator[WorkUnit],
+    work_units: Iterable[WorkUnit],
     params,
+    kind: str | None = None,
+) -> Path:
+    output_path = build_output_path(params, kind)
+
+    with open_csv(output_path) as csv_file:
+        writer = csv.writer(
+            csv_file, dialect='excel', quotechar='"', quoting=csv.QUOTE_MINIMAL
+        )
+        writer.writerow(get_work_units_header(params))
+        for work_unit in work_units:
+            writer.writerow(get_work_unit_row(work_unit, params))
+    return output_path
+
+
+def get_timeline_cost(
+    work_unit: WorkUnit,
+    hourly_wages: Mapping[str, Decimal | None],
+) -> Decimal | None:
+    hourly_wage = hourly_wages.get(work_unit.client)
+    if hourly_wage is None:
+        return None
+    return round(Decimal(work_unit.minutes / 60) * hourly_wage, 2)
+
+
+def pretty_print_timeline(
+    work_units: Iterable[WorkUnit],
+    params: Params,
+    hourly_wages: Mapping[str, Decimal | None],
+) -> None:
+    """
+    Work units of several clients, clients without hourly wage have no
+    cost.
+    """
+    total_cost = Decimal()
+    total_minutes = 0
+
+    console = Console()
+    table = Table(title=params.client.capitalize())
+    table.add_column('Date')
+    table.add_column('Client')
+    table.add_column("Work")
+    table.add_column(
+        f"Duration ({'hours' if params.display_hours else 'minutes'})",
+        justify='right')
+    table.add_column(f"Cost ({params.currency_sign})", justify='right')
+
+    for work_unit in work_units:
+        cost = get_timeline_cost(work_unit, hourly_wages)
+        total_cost += cost or 0
+        total_minutes += work_unit.minutes
+        if params.display_hours:
+            duration = format_hours(work_unit.minutes)
+        else:
+            duration = str(work_unit.minutes)
+        table.add_row(
+            work_unit.date.strftime('%Y-%m-%d'),
+            work_unit.client,
+            work_unit.description,
+            duration,
+            '' if cost is None else f"{cost:6.2f}",
+        )
+    table.add_row('', '', '', '')
+    if params.display_hours:
+        total_duration = format_hours(total_minutes)
+    else:
+        total_duration = str(total_minutes)
+    table.add_row(
+        '',
+        '',
+        f"Sum ({total_duration} "
+        f"{'hours' if params.display_hours else 'minutes'})",
+        total_duration,
+        f"{total_cost:6.2f}",
+    )
+    console.print(table)
+
+
+def output_timeline_csv(
+    work_units: Iterable[WorkUnit],
+    params: Params,
+    hourly_wages: Mapping[str, Decimal | None],
 ) -> Path:
     output_path = build_output_path(params)
 
-    with open(output_path, 'w', newline='') as csv_file:
+    with open_csv(output_path) as csv_file:
         writer = csv.writer(
             csv_file, dialect='excel', quotechar='"', quoting=csv.QUOTE_MINIMAL
         )
         writer.writerow(
             [
                 "Date",
+                "Client",
                 "Work",
                 f"Duration ({'hours' if params.display_hours else 'minutes'})",
                 f"Cost ({params.currency_sign})"
             ])
         for work_unit in work_units:
-            cost = round(Decimal(
-                work_unit.minutes / 60) * params.hourly_wage, 2)
+            cost = get_timeline_cost(work_unit, hourly_wages)
             if params.display_hours:
                 duration = format_hours(work_unit.minutes)
             else:
                 duration = str(work_unit.minutes)
             writer.writerow([
                 work_unit.date.strftime('%Y-%m-%d'),
+                work_unit.client,
                 work_unit.description,
                 duration,
-                str(cost)
+                '' if cost is None else str(cost),
             ])
     return output_path
+
+
+def pretty_print_group_stats(
+    group_stats: dict[str, Sequence[GroupStat]],
+    params: Params,
+) -> None:
+    console = Console()
+    for dimension, stats in group_stats.items():
+        table = Table(
+            title=f'{params.client.capitalize()} by {dimension}')
+        table.add_column(dimension.capitalize())
+        table.add_column('Units', justify='right')
+        table.add_column(
+            f"Duration ({'hours' if params.display_hours else 'minutes'})",
+            justify='right')
+        if params.hourly_wage:
+            table.add_column(
+                f"Cost ({params.currency_sign})", justify='right')
+
+        for stat in stats:
+            if params.display_hours:
+                duration = format_hours(stat.minutes)
+            else:
+                duration = str(stat.minutes)
+            row = [stat.key, str(stat.units), duration]
+            if params.hourly_wage:
+                row.append(f"{stat.cost:6.2f}")
+            table.add_row(*row)
+        console.print(table)
+
+
+def output_group_stats_csv(
+    group_stats: dict[str, Sequence[GroupStat]],
+    params: Params,
+    kind: str = 'group',
+) -> Path:
+    output_path = build_output_path(params, kind)
+
+    with open_csv(output_path) as csv_file:
+        writer = csv.writer(
+            csv_file, dialect='excel', quotechar='"', quoting=csv.QUOTE_MINIMAL
+        )
+        head_row = [
+            "Dimension",
+            "Group",
+            "Units",
+            f"Duration ({'hours' if params.display_hours else 'minutes'})",
+        ]
+        if params.hourly_wage:
+            head_row.append(f"Cost ({params.currency_sign})")
+        writer.writerow(head_row)
+        for dimension, stats in group_stats.items():
+            for stat in stats:
+                if params.display_hours:
+                    duration = format_hours(stat.minutes)
+                else:
+                    duration = str(stat.minutes)
+                row = [dimension, stat.key, stat.units, duration]
+                if params.hourly_wage:
+                    row.append(str(stat.cost))
+                writer.writerow(row)
+    return output_path
+
+
+def pretty_print_overlaps(overlaps: Sequence[Overlap]) -> None:
+    if not overlaps:
+        print(GREEN + 'No overlapping work units found.' + RESET)
+        return
+
+    console = Console()
+    table = Table(title='Overlapping work units')
+    table.add_column('Date')
+    table.add_column('Work')
+    table.add_column('Overlapped by')
+    table.add_column('Overlap', justify='right')
+
+    def describe(work_unit: WorkUnit) -> str:
+        start = cast(dt.datetime, work_unit.start)
+        end = cast(dt.datetime, work_unit.end)
+        return (
+            f"{start:%H:%M}-{end:%H:%M} {work_unit.client}:"
+            f"{work_unit.description}"
+        )
+
+    for overlap in overlaps:
+        table.add_row(
+            overlap.second.date.strftime('%Y-%m-%d'),
+            describe(overlap.first),
+            describe(overlap.second),
+            format_hours(overlap.minutes),
+        )
+    console.print(table)
+    print(RED + f'Found {len(overlaps)} overlapping work units.' + RESET)
+
+
+def print_format_errors(
+    errors: Mapping[Path, Sequence[FormatError]],
+    output_format: CheckFormat,
+) -> None:
+    """
+    Print format errors per file, as text, quickfix lines or JSON.
+
+    Quickfix lines (path:line:column: message) are understood by the
+    error lists of vim, emacs' compilation mode and most other editors.
+    """
+    if output_format == 'json':
+        print(json.dumps([
+            {
+                'file': str(path),
+                'line': format_error.line_number,
+                'message': format_error.message,
+            }
+            for path, file_errors in errors.items()
+            for format_error in file_errors
+        ]))
+        return
+
+    for path, file_errors in errors.items():
+        if output_format == 'quickfix':
+            for format_error in file_errors:
+                print(
+                    f'{path}:{format_error.line_number}:1: '
+                    f'{format_error.message}'
+                )
+        elif file_errors:
+            print(RED + f'{path}:' + RESET)
+            for format_error in file_errors:
+                print(RED + str(format_error) + RESET)
+        else:
+            print(GREEN + f'No format errors in {path}.' + RESET)
+
+
+def pretty_print_member_stats(
+    member_stats: Sequence[MemberStat],
+    params: Params,
+) -> None:
+    console = Console()
+    table = Table(title=f'{params.client.capitalize()} members')
+    table.add_column('Member')
+    table.add_column(
+        "Hours" if params.display_hours else "Minutes", justify='right')
+    table.add_column("Balance", justify='right')
+
+    for member_stat in member_stats:
+        if params.display_hours:
+            elapsed = format_hours(member_stat.minutes)
+            balance = format_hours(member_stat.carryover)
+        else:
+            elapsed = str(member_stat.minutes)
+            balance = str(member_stat.carryover)
+        if member_stat.carryover > 0:
+            balance = f'+{balance}'
+        table.add_row(member_stat.member, elapsed, balance)
+    console.print(table)
+
+
+def output_member_stats_csv(
+    member_stats: Sequence[MemberStat],
+    params: Params,
+) -> Path:
+    output_path = build_output_path(params, kind='member')
+
+    with open_csv(output_path) as csv_file:
+        writer = csv.writer(
+            csv_file, dialect='excel', quotechar='"', quoting=csv.QUOTE_MINIMAL
+        )
+        writer.writerow([
+            "Member",
+            "Hours" if params.display_hours else "Minutes",
+            "Balance",
+        ])
+        for member_stat in member_stats:
+            if params.display_hours:
+                elapsed = format_hours(member_stat.minutes)
+                balance = format_hours(member_stat.carryover)
+            else:
+                elapsed = str(member_stat.minutes)
+                balance = str(member_stat.carryover)
+            writer.writerow([member_stat.member, elapsed, balance])
+    return output_path
+
+
+def get_analysis_rows(
+    analysis: Analysis,
+    params: Params,
+) -> list[tuple[str, str]]:
+    def duration(minutes: int) -> str:
+        return format_hours(minutes) if params.display_hours else str(minutes)
+
+    rows = [
+        ('Working days', str(analysis.days)),
+        ('Total', duration(analysis.minutes)),
+    ]
+    for percent, minutes in analysis.percentiles:
+        name = 'Median' if percent == 50 else f'{percent}th percentile'
+        rows.append((f'{name} per day', duration(minutes)))
+    streak = analysis.longest_streak
+    if streak:
+        rows.append((
+            'Longest overtime streak',
+            f'{streak.days} {"day" if streak.days == 1 else "days"}, '
+            f'{streak.first_day} to {streak.last_day}',
+        ))
+        rows.append(('Overtime in streak', duration(streak.overtime)))
+    return rows
+
+
+def pretty_print_analysis(analysis: Analysis, params: Params) -> None:
+    unit = 'hours' if params.display_hours else 'minutes'
+    console = Console()
+    table = Table(title=f'{params.client.capitalize()} analysis')
+    table.add_column('Metric')
+    table.add_column('Value', justify='right')
+    for row in get_analysis_rows(analysis, params):
+        table.add_row(*row)
+    console.print(table)
+
+    table = Table(title='Weeks')
+    table.add_column('Week')
+    table.add_column(f'Duration ({unit})', justify='right')
+    table.add_column(f'4-week average ({unit})', justify='right')
+    for stat in analysis.rolling_stats:
+        if params.display_hours:
+            minutes, average = (
+                format_hours(stat.minutes), format_hours(stat.average))
+        else:
+            minutes, average = str(stat.minutes), str(stat.average)
+        table.add_row(f'{stat.year}-W{stat.week:02d}', minutes, average)
+    console.print(table)
+
+
+def output_analysis_csv(
+    analysis: Analysis,
+    params: Params,
+) -> tuple[Path, Path]:
+    """
+    Write the summary and the weekly rolling averages to two CSV files.
+    """
+    unit = 'hours' if params.display_hours else 'minutes'
+    summary_path = build_output_path(params, kind='analysis')
+    with open_csv(summary_path) as csv_file:
+        writer = csv.writer(
+            csv_file, dialect='excel', quotechar='"', quoting=csv.QUOTE_MINIMAL
+        )
+        writer.writerow(['Metric', 'Value'])
+        writer.writerows(get_analysis_rows(analysis, params))
+
+    weeks_path = build_output_path(params, kind='rolling')
+    with open_csv(weeks_path) as csv_file:
+        writer = csv.writer(
+            csv_file, dialect='excel', quotechar='"', quoting=csv.QUOTE_MINIMAL
+        )
+        writer.writerow([
+            'Year', 'Week', f'Duration ({unit})', f'4-week average ({unit})'])
+        for stat in analysis.rolling_stats:
+            if params.display_hours:
+                minutes, average = (
+                    format_hours(stat.minutes), format_hours(stat.average))
+            else:
+                minutes, average = str(stat.minutes), str(stat.average)
+            writer.writerow([stat.year, stat.week, minutes, average])
+    return summary_path, weeks_path
+
+
+def get_period_rows(
+    period_stats: Sequence[PeriodStat],
+    params: Params,
+) -> list[list[str]]:
+    """
+    One row per metric, one column per period and the change between the
+    first and the last period.
+    """
+    def duration(minutes: int) -> str:
+        return format_hours(minutes) if params.display_hours else str(minutes)
+
+    def signed(value: int, text: str) -> str:
+        return f'+{text}' if value > 0 else text
+
+    def per_day(stat: PeriodStat) -> int:
+        return stat.minutes // stat.days_worked if stat.days_worked else 0
+
+    metrics = [
+        ('Duration', lambda stat: stat.minutes, duration),
+        ('Expected', lambda stat: stat.expected, duration),
+        ('Balance', lambda stat: stat.minutes - stat.expected, duration),
+        ('Days worked', lambda stat: stat.days_worked, str),
+        ('Work units', lambda stat: stat.units, str),
+        ('Per day worked', per_day, duration),
+    ]
+    rows = []
+    for name, value, text in metrics:
+        values = [value(stat) for stat in period_stats]
+        row = [name] + [text(value) for value in values]
+        if len(values) > 1:
+            change = values[-1] - values[0]
+            row.append(signed(change, text(change)))
+        rows.append(row)
+    return rows
+
+
+def get_period_names(period_stats: Sequence[PeriodStat]) -> list[str]:
+    return [f'{stat.first_day} to {stat.last_day}' for stat in period_stats]
+
+
+def pretty_print_period_stats(
+    period_stats: Sequence[PeriodStat],
+    params: Params,
+) -> None:
+    console = Console()
+    table = Table(title=f'{params.client.capitalize()} periods compared')
+    table.add_column('Metric')
+    for name in get_period_names(period_stats):
+        table.add_column(name, justify='right')
+    if len(period_stats) > 1:
+        table.add_column('Change', justify='right')
+    for row in get_period_rows(period_stats, params):
+        table.add_row(*row)
+    console.print(table)
+
+
+def output_period_stats_csv(
+    period_stats: Sequence[PeriodStat],
+    params: Params,
+    kind: str = 'comparison',
+) -> Path:
+    output_path = build_output_path(params, kind)
+
+    with open_csv(output_path) as csv_file:
+        writer = csv.writer(
+            csv_file, dialect='excel', quotechar='"', quoting=csv.QUOTE_MINIMAL
+        )
+        head_row = ['Metric', *get_period_names(period_stats)]
+        if len(period_stats) > 1:
+            head_row.append('Change')
+        writer.writerow(head_row)
+        writer.writerows(get_period_rows(period_stats, params))
+    return output_path
@@ -1,8 +1,9 @@
-from collections.abc import Generator
+from collections.abc import Callable, Generator, Sequence
+from operator import itemgetter
 from typing import Protocol
 
 from trackie.conf import Params
-from trackie.work.models import WorkUnit
+from trackie.work.models import WORK_UNIT_FIELDS, WorkUnit
 
 
 class WorkRepository(Protocol):
@@ -12,9 +13,34 @@ class WorkRepository(Protocol):
     ) -> Generator[WorkUnit]:
         ...
 
+    @staticmethod
+    def get_fields(
+        params: Params,
+        fields: Sequence[str],
+    ) -> Generator[tuple]:
+        """
+        A tuple of the values of fields (see WORK_UNIT_FIELDS) per work
+        unit, without building what was not asked for.
+        """
+        ...
+
     @staticmethod
     def add_work_unit(
         work_unit: WorkUnit,
         params: Params,
     ) -> None:
         ...
+
+
+def get_projection(fields: Sequence[str]) -> Callable[[tuple], tuple]:
+    """
+    Pick fields from a tuple with the values of all WORK_UNIT_FIELDS.
+    """
+    for field in fields:
+        if field not in WORK_UNIT_FIELDS:
+            raise ValueError(f'Unknown work unit field: {field}')
+    indices = [WORK_UNIT_FIELDS.index(field) for field in fields]
+    if len(indices) > 1:
+        return itemgetter(*indices)
+    # itemgetter returns a single item as it is
+    return lambda values: tuple(values[index] for index in indices)
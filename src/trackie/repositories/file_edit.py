@@ -1,66 +1,557 @@
-from collections.abc import Generator
+from collections.abc import Callable, Generator, Iterable, Sequence
+import dataclasses
 import datetime as dt
+import os
 from pathlib import Path
+import re
+import shutil
+from typing import TypeVar
 
-from trackie.conf import Params
+from trackie.conf import Params, time_range_pattern
+from trackie.metrics import no_stage
 from trackie.utils import (
-    check_format,
-    error,
+    iter_format_errors,
+    TrackieException,
     TrackieFormatException,
 )
-from trackie.repositories.base import WorkRepository
+from trackie.repositories.base import get_projection, WorkRepository
+from trackie.repositories.partitions import get_partitions
+from trackie.repositories.segments import (
+    ARCHIVE_SUFFIXES,
+    Compression,
+    get_segment_path,
+    get_segments,
+    open_text,
+    read_segment,
+    write_segment,
+)
+from trackie.validation import BlockValidator, find_block_errors, split_lines
 from trackie.work.models import WorkUnit
 
+T = TypeVar('T')
+
+# bytes read at a time when looking for the start of a date range from
+# the end of a file
+TAIL_CHUNK_SIZE = 1 << 16
+
 
 def get_lines(
     path: Path,
 ) -> Generator[str]:
-    with path.open() as f:
+    with open_text(path) as f:
         for line in f:
             if line.strip():
                 yield line
 
 
-class FileEditRepository(WorkRepository):
-    @staticmethod
-    def get_work_units(params: Params) -> Generator[WorkUnit]:
+def get_blocks(
+    lines: Iterable[str],
+    date_pattern: re.Pattern,
+) -> Generator[list[str]]:
+    """
+    Group lines into blocks each starting with a date line.
 
-        lines = list(get_lines(params.data_path))
+    Lines before the first date line form a block of their own, so they
+    do not get lost for validation.
+    """
+    block: list[str] = []
+    for line in lines:
+        if block and date_pattern.match(line):
+            yield block
+            block = []
+        block.append(line)
+    if block:
+        yield block
 
-        try:
-            check_format(
-                lines,
-                date_pattern=params.date_pattern,
-                description_pattern=params.description_pattern,
-                duration_pattern=params.duration_pattern,
-            )
-        except TrackieFormatException as e:
-            error(f'{e.args[0]}')
 
-        end_date = params.end_date or dt.date.today()
+def get_positioned_blocks(
+    path: Path,
+    date_pattern: re.Pattern,
+    offset: int = 0,
+    line_number: int = 1,
+) -> Generator[tuple[int, int, list[str]]]:
+    """
+    Blocks of a tracking file from byte offset on, each with the offset
+    and line number of its first line.
 
-        # date filter flag
-        not_in_range = False
-        description = ''
+    line_number is the number of the line at offset.
+    """
+    block: list[str] = []
+    block_offset = block_line_number = 0
+    with path.open('rb') as f:
+        f.seek(offset)
+        for raw_line in f:
+            line = raw_line.decode().replace('\r\n', '\n')
+            if line.strip():
+                if block and date_pattern.match(line):
+                    yield block_offset, block_line_number, block
+                    block = []
+                if not block:
+                    block_offset, block_line_number = offset, line_number
+                block.append(line)
+            offset += len(raw_line)
+            line_number += 1
+    if block:
+        yield block_offset, block_line_number, block
 
-        for line in lines:
-            if params.date_pattern.match(line):
-                date_str = line.strip()
-                date = dt.datetime.strptime(date_str, "%Y-%m-%d").date()
-                not_in_range = True if date < params.start_date or date > end_date else False  # noqa: W501
+
+def find_tail_offset(
+    path: Path,
+    start_date: dt.date,
+    date_pattern: re.Pattern,
+) -> int:
+    """
+    Offset of the first entry dated start_date or later in a
+    chronological file, the file size if there is none.
+
+    The file is read backwards in chunks from its end up to the first
+    date line before start_date, so the cost depends on the size of the
+    entries from start_date on, not on the size of the file.
+    """
+    with path.open('rb') as f:
+        position = offset = f.seek(0, os.SEEK_END)
+        # start of the line the previous chunk began in the middle of
+        rest = b''
+        while position > 0:
+            size = min(TAIL_CHUNK_SIZE, position)
+            position -= size
+            f.seek(position)
+            data = f.read(size) + rest
+            lines = data.split(b'\n')
+            # the first line may go on in front of the chunk
+            rest = lines.pop(0) if position else b''
+            line_offset = position + len(data) + 1
+            for line in reversed(lines):
+                line_offset -= len(line) + 1
+                text = line.decode(errors='replace').rstrip('\r')
+                if not date_pattern.match(text):
+                    continue
+                if parse_date(text) < start_date:
+                    return offset
+                offset = line_offset
+    return offset
+
+
+def count_lines_before(path: Path, offset: int) -> int:
+    """
+    Number of lines in the first offset bytes of the file at path.
+    """
+    count = 0
+    with path.open('rb') as f:
+        while offset > 0:
+            chunk = f.read(min(TAIL_CHUNK_SIZE, offset))
+            if not chunk:
+                break
+            count += chunk.count(b'\n')
+            offset -= len(chunk)
+    return count
+
+
+def get_numbered_blocks(
+    path: Path,
+    date_pattern: re.Pattern,
+) -> Generator[tuple[int, list[str]]]:
+    """
+    Blocks of a tracking file like get_blocks, each with the line number
+    of its first line.
+    """
+    block: list[str] = []
+    block_line_number = 0
+    with open_text(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
                 continue
-            elif (
-                params.description_pattern.match(line)
-                and not_in_range is False
+            if block and date_pattern.match(line):
+                yield block_line_number, block
+                block = []
+            if not block:
+                block_line_number = line_number
+            block.append(line)
+    if block:
+        yield block_line_number, block
+
+
+def get_block_line_numbers(
+    path: Path,
+    line_number: int,
+    size: int,
+) -> list[int]:
+    """
+    Line numbers of the size non-empty lines of the file at path from
+    line line_number on.
+    """
+    line_numbers = []
+    with open_text(path) as f:
+        for number, line in enumerate(f, 1):
+            if number >= line_number and line.strip():
+                line_numbers.append(number)
+                if len(line_numbers) == size:
+                    break
+    return line_numbers
+
+
+def check_block_lines(
+    path: Path,
+    lines: Sequence[str],
+    line_number: int,
+    params: Params,
+) -> None:
+    """
+    Raise TrackieFormatException for the first format error of the lines
+    of the date block starting on line line_number of the file at path.
+
+    Blocks leave out empty lines, they are counted here so the error
+    points to the line in the file.
+    """
+    numbered_lines = list(zip(
+        get_block_line_numbers(path, line_number, len(lines)), lines))
+    for format_error in iter_format_errors(
+        numbered_lines,
+        date_pattern=params.date_pattern,
+        description_pattern=params.description_pattern,
+        duration_pattern=params.duration_pattern,
+    ):
+        raise TrackieFormatException(str(format_error))
+
+
+def parse_date(line: str) -> dt.date:
+    return dt.datetime.strptime(line.strip(), "%Y-%m-%d").date()
+
+
+def parse_duration(
+    line: str,
+    date: dt.date,
+) -> tuple[int, dt.datetime | None, dt.datetime | None]:
+    """
+    Minutes, start and end of a duration line.
+
+    Start and end are only known for time ranges like 9:15-10:30. A range
+    ending before it starts ends on the next day.
+    """
+    text = line.strip()
+    match = time_range_pattern.fullmatch(text)
+    if match is None:
+        return int(text), None, None
+    start_hour, start_minute, end_hour, end_minute = map(int, match.groups())
+    start = dt.datetime.combine(date, dt.time(start_hour, start_minute))
+    end = dt.datetime.combine(date, dt.time(end_hour, end_minute))
+    if end < start:
+        end += dt.timedelta(days=1)
+    return int((end - start).total_seconds()) // 60, start, end
+
+
+def get_description(lines: Sequence[str]) -> str:
+    """
+    The description of a work unit from its stripped description lines.
+    """
+    return ''.join(f' {line}' for line in lines)
+
+
+def parse_block(
+    block: Sequence[str],
+    date: dt.date,
+    params: Params,
+) -> Generator[WorkUnit]:
+    """
+    Generate the work units of a date block, skipping its date line.
+
+    Work units not matching params.where are skipped before they are
+    built, their description only put together if the filter needs it.
+    """
+    where = params.where
+    lines: list[str] = []
+    for line in block[1:]:
+        if params.description_pattern.match(line):
+            lines.append(line.strip())
+        elif params.duration_pattern.match(line):
+            minutes, start, end = parse_duration(line, date)
+            if where is None or where.matches(
+                date,
+                minutes,
+                get_description(lines) if where.needs_description else '',
             ):
-                description += f' {line.strip()}'
-                continue
-            elif params.duration_pattern.match(line) and not_in_range is False:
-                minutes = int(line.strip())
-                work_unit = WorkUnit(date, params.client, minutes, description)
-                description = ''
-                if work_unit.client.lower() == params.client.lower():
-                    yield work_unit
+                yield WorkUnit(
+                    date, params.client, minutes, get_description(lines),
+                    start=start, end=end)
+            lines = []
+
+
+def parse_block_fields(
+    block: Sequence[str],
+    date: dt.date,
+    params: Params,
+    fields: Sequence[str],
+) -> Generator[tuple]:
+    """
+    Generate the values of fields of each work unit of a date block.
+
+    Description lines are only looked at if the description is one of
+    the fields.
+    """
+    project = get_projection(fields)
+    where = params.where
+    with_description = 'description' in fields or bool(
+        where and where.needs_description)
+    lines: list[str] = []
+    for line in block[1:]:
+        if params.duration_pattern.match(line):
+            minutes, start, end = parse_duration(line, date)
+            description = get_description(lines) if with_description else ''
+            if where is None or where.matches(date, minutes, description):
+                yield project(
+                    (date, params.client, minutes, description, start, end))
+            lines = []
+        elif with_description and params.description_pattern.match(line):
+            lines.append(line.strip())
+
+
+def get_sources(params: Params) -> list[Path]:
+    """
+    Files reaching into the date range of params in date order.
+
+    These are the partitions of a client's directory or the archive
+    segments of a tracking file followed by the tracking file itself.
+    """
+    end_date = params.end_date or dt.date.today()
+    if params.data_path.is_dir():
+        return [
+            partition.path
+            for partition in get_partitions(params.data_path)
+            if partition.first_day <= end_date
+            and partition.last_day >= params.start_date
+        ]
+    return [
+        segment.path for segment in get_segments(params.data_path)
+        if segment.first_year <= end_date.year
+        and segment.last_year >= params.start_date.year
+    ] + [params.data_path]
+
+
+def get_all_sources(data_path: Path) -> list[Path]:
+    """
+    All files holding a client's data, e.g. to tell if anything changed.
+    """
+    if data_path.is_dir():
+        return [partition.path for partition in get_partitions(data_path)]
+    return [segment.path for segment in get_segments(data_path)] + [data_path]
+
+
+def find_time_range_lines(
+    params: Params,
+) -> dict[tuple[dt.datetime, dt.datetime], tuple[Path, int]]:
+    """
+    File and line number of the duration line of each time range of the
+    client, e.g. to point at overlapping work units.
+    """
+    time_range_lines: dict[
+        tuple[dt.datetime, dt.datetime], tuple[Path, int]] = {}
+    for path in get_sources(params):
+        date = None
+        with open_text(path) as f:
+            for line_number, line in enumerate(f, 1):
+                if params.date_pattern.match(line):
+                    date = parse_date(line)
+                elif date and params.duration_pattern.match(line):
+                    _, start, end = parse_duration(line, date)
+                    if start and end:
+                        time_range_lines.setdefault(
+                            (start, end), (path, line_number))
+    return time_range_lines
+
+
+def get_dated_blocks(params: Params) -> Generator[tuple[dt.date, list[str]]]:
+    """
+    Validated date blocks within the date range of params with their date.
+
+    Archive segments and partitions are only opened when the date range
+    reaches them.
+    """
+    for path in get_sources(params):
+        if path == params.data_path:
+            yield from get_file_blocks(params)
+            continue
+        try:
+            yield from get_file_blocks(dataclasses.replace(
+                params, data_path=path))
+        except TrackieFormatException as e:
+            raise TrackieFormatException(f'{path}: {e.args[0]}') from e
+
+
+def get_file_blocks(params: Params) -> Generator[tuple[dt.date, list[str]]]:
+    """
+    Validated date blocks of the file params.data_path within the date
+    range of params.
+    """
+    end_date = params.end_date or dt.date.today()
+    validator = BlockValidator(params)
+    previous_date = dt.date.min
+
+    metrics = params.metrics
+    stage = metrics.stage if metrics else no_stage
+    path = params.data_path
+    tail_offset = None
+    # in tail mode line numbers are counted from tail_offset on, the lines
+    # before it are only counted to report an error
+    numbered_blocks: Iterable[tuple[int, list[str]]]
+    if (
+        params.tail
+        and params.chronological
+        and path.suffix not in ARCHIVE_SUFFIXES
+    ):
+        tail_offset = find_tail_offset(
+            path, params.start_date, params.date_pattern)
+        numbered_blocks = (
+            (block_line_number, block)
+            for _, block_line_number, block in get_positioned_blocks(
+                path, params.date_pattern, tail_offset)
+        )
+    else:
+        numbered_blocks = get_numbered_blocks(path, params.date_pattern)
+    if metrics:
+        metrics.file_bytes += path.stat().st_size
+        numbered_blocks = metrics.timed(numbered_blocks, 'read')
+
+    def get_line_number(block_line_number: int) -> int:
+        if tail_offset is None:
+            return block_line_number
+        return count_lines_before(path, tail_offset) + block_line_number
+
+    for line_number, block in numbered_blocks:
+        if metrics:
+            metrics.lines += len(block)
+            metrics.blocks += 1
+        date = None
+        if params.date_pattern.match(block[0]):
+            date = parse_date(block[0])
+            if params.chronological and date > end_date:
+                # the rest of the file is after end_date as well
+                validator.save(complete=False)
+                return
+
+        with stage('validate'):
+            try:
+                validator.check(block, line_number)
+            except TrackieFormatException:
+                check_block_lines(
+                    path, block, get_line_number(line_number), params)
+                raise
+
+        if date is None:
+            # only possible when validation is off
+            continue
+        if params.chronological:
+            if date < previous_date:
+                raise TrackieFormatException(
+                    f'Format error on line #{get_line_number(line_number)}: '
+                    f'{date} is before {previous_date}, but the file is '
+                    'configured to be chronological.'
+                )
+            previous_date = date
+        if (
+            date < params.start_date
+            or date > end_date
+            # none of the entry's work units can match
+            or (params.where and params.where.excludes_date(date))
+        ):
+            if metrics:
+                metrics.units_filtered += sum(
+                    1 for line in block
+                    if params.duration_pattern.match(line))
+            continue
+        yield date, block
+
+    validator.save(complete=tail_offset is None)
+
+
+def parse_blocks(
+    params: Params,
+    parse: Callable[[list[str], dt.date], Iterable[T]],
+) -> Generator[T]:
+    metrics = params.metrics
+    for date, block in get_dated_blocks(params):
+        if metrics:
+            with metrics.stage('parse'):
+                parsed = list(parse(block, date))
+            metrics.units_parsed += len(parsed)
+            yield from parsed
+        else:
+            yield from parse(block, date)
+
+
+def archive_before(
+    params: Params,
+    year: int,
+    compression: Compression = 'gz',
+) -> Path | None:
+    """
+    Move the entries dated before January 1st of year from the tracking
+    file to a new compressed archive segment.
+
+    The whole file is validated first. The segment is synced and renamed
+    into place before the tracking file gets replaced, so an interrupted
+    run never loses entries and running it again completes it. Returns
+    the segment's path, None if there was nothing to archive.
+    """
+    path = params.data_path
+    content = path.read_bytes()
+    errors = find_block_errors(split_lines(content), params)
+    if errors:
+        raise TrackieFormatException(str(errors[0]))
+
+    cutoff = dt.date(year, 1, 1)
+    archived: list[str] = []
+    kept: list[str] = []
+    years = set()
+    lines = content.decode().splitlines(keepends=True)
+    for block in get_blocks(lines, params.date_pattern):
+        date = None
+        if params.date_pattern.match(block[0]):
+            date = parse_date(block[0])
+        if date and date < cutoff:
+            archived.extend(block)
+            years.add(date.year)
+        else:
+            kept.extend(block)
+    if not archived:
+        return None
+    if not archived[-1].endswith('\n'):
+        archived[-1] += '\n'
+
+    segment_path = get_segment_path(
+        path, min(years), max(years), compression)
+    archived_text = ''.join(archived)
+    if not segment_path.exists():
+        write_segment(segment_path, archived_text, compression).replace(
+            segment_path)
+    elif read_segment(segment_path) != archived_text:
+        raise TrackieException(f'{segment_path} already exists.')
+
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    with tmp_path.open('w') as f:
+        f.write(''.join(kept))
+        f.flush()
+        os.fsync(f.fileno())
+    shutil.copymode(path, tmp_path)
+    tmp_path.replace(path)
+    return segment_path
+
+
+class FileEditRepository(WorkRepository):
+    @staticmethod
+    def get_work_units(params: Params) -> Generator[WorkUnit]:
+        yield from parse_blocks(
+            params, lambda block, date: parse_block(block, date, params))
+
+    @staticmethod
+    def get_fields(
+        params: Params,
+        fields: Sequence[str],
+    ) -> Generator[tuple]:
+        yield from parse_blocks(
+            params,
+            lambda block, date: parse_block_fields(
+                block, date, params, fields),
+        )
 
     @staticmethod
     def add_work_unit(work_unit, params: Params) -> None:
@@ -0,0 +1,172 @@
+from collections.abc import Generator, Iterable, Iterator
+from dataclasses import dataclass
+import datetime as dt
+import filecmp
+import heapq
+from itertools import groupby
+import os
+from pathlib import Path
+import re
+import shutil
+import tempfile
+
+from trackie.conf import Params, time_range
+from trackie.repositories.file_edit import (
+    check_block_lines,
+    get_blocks,
+    get_lines,
+    get_numbered_blocks,
+    parse_date,
+)
+from trackie.utils import check_format, TrackieFormatException
+
+# lines of blocks sorted in memory at once, more are sorted in runs
+# written to temporary files and merged
+MAX_RUN_LINES = 200_000
+
+# a duration line without its indentation
+duration_text_pattern = re.compile(rf'({time_range}|\d+)\s*$')
+
+DatedBlock = tuple[dt.date, list[str]]
+
+
+@dataclass(frozen=True)
+class FormatResult:
+    blocks: int
+    dates: int
+    changed: bool
+
+
+def normalize_block(block: list[str], indent: str) -> list[str]:
+    """
+    The block with its lines stripped and indented by indent, once for
+    descriptions and twice for durations.
+
+    Lines indented by any mix of tabs and spaces count as descriptions or
+    durations, depending on what they hold. Lines without indentation
+    stay as they are, for the format check to report.
+    """
+    lines = [block[0].strip() + '\n']
+    for line in block[1:]:
+        text = line.strip()
+        if not line[0].isspace():
+            lines.append(line)
+        elif duration_text_pattern.match(text):
+            lines.append(f'{indent * 2}{text}\n')
+        else:
+            lines.append(f'{indent}{text}\n')
+    return lines
+
+
+def get_normalized_blocks(
+    params: Params,
+    indent: str,
+) -> Generator[DatedBlock]:
+    """
+    Checked and normalized date blocks of the tracking file in file order.
+    """
+    for line_number, block in get_numbered_blocks(
+        params.data_path, params.date_pattern,
+    ):
+        lines = normalize_block(block, indent)
+        try:
+            check_format(
+                lines,
+                date_pattern=params.date_pattern,
+                description_pattern=params.description_pattern,
+                duration_pattern=params.duration_pattern,
+                first_line_number=line_number,
+            )
+        except TrackieFormatException:
+            check_block_lines(params.data_path, lines, line_number, params)
+            raise
+        yield parse_date(lines[0]), lines
+
+
+def write_run(blocks: list[DatedBlock], directory: Path, number: int) -> Path:
+    path = directory / f'run-{number}.otl'
+    with path.open('w') as f:
+        for _, lines in sorted(blocks, key=lambda block: block[0]):
+            f.writelines(lines)
+    return path
+
+
+def read_run(path: Path, params: Params) -> Iterator[DatedBlock]:
+    for block in get_blocks(get_lines(path), params.date_pattern):
+        yield parse_date(block[0]), block
+
+
+def get_sorted_blocks(
+    blocks: Iterable[DatedBlock],
+    params: Params,
+    directory: Path,
+    max_run_lines: int,
+) -> Iterator[DatedBlock]:
+    """
+    Blocks sorted by date, blocks of the same date keep their order.
+
+    Up to max_run_lines lines are sorted in memory, larger files are
+    sorted in runs on disk that are merged lazily.
+    """
+    run: list[DatedBlock] = []
+    run_lines = 0
+    run_paths: list[Path] = []
+    for block in blocks:
+        run.append(block)
+        run_lines += len(block[1])
+        if run_lines >= max_run_lines:
+            run_paths.append(write_run(run, directory, len(run_paths)))
+            run, run_lines = [], 0
+    if not run_paths:
+        return iter(sorted(run, key=lambda block: block[0]))
+    if run:
+        run_paths.append(write_run(run, directory, len(run_paths)))
+    # heapq.merge takes equal dates from earlier runs first
+    return heapq.merge(
+        *(read_run(path, params) for path in run_paths),
+        key=lambda block: block[0],
+    )
+
+
+def format_file(
+    params: Params,
+    indent: str = '\t',
+    max_run_lines: int = MAX_RUN_LINES,
+) -> FormatResult:
+    """
+    Rewrite the tracking file sorted by date, with the entries of a date
+    merged into one and lines indented by indent.
+
+    Memory is bounded by max_run_lines. The whole file is checked before
+    anything is written, the new file replaces the old one atomically and
+    only if it differs.
+    """
+    path = params.data_path
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    blocks = dates = 0
+    with tempfile.TemporaryDirectory(
+            prefix='trackie-fmt-', dir=path.parent) as directory:
+        sorted_blocks = get_sorted_blocks(
+            get_normalized_blocks(params, indent),
+            params,
+            Path(directory),
+            max_run_lines,
+        )
+        # all blocks are checked and sorted into runs at this point
+        with tmp_path.open('w') as f:
+            for _, date_blocks in groupby(
+                    sorted_blocks, key=lambda block: block[0]):
+                dates += 1
+                for index, (_, lines) in enumerate(date_blocks):
+                    blocks += 1
+                    # merged entries keep one date line
+                    f.writelines(lines[1:] if index else lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    if filecmp.cmp(tmp_path, path, shallow=False):
+        tmp_path.unlink()
+        return FormatResult(blocks, dates, changed=False)
+    shutil.copymode(path, tmp_path)
+    tmp_path.replace(path)
+    return FormatResult(blocks, dates, changed=True)
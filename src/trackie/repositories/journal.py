@@ -0,0 +1,344 @@
+from collections.abc import Generator, Iterable, Sequence
+import datetime as dt
+import mmap
+import os
+from pathlib import Path
+import struct
+
+from trackie.conf import Params
+from trackie.repositories.base import get_projection, WorkRepository
+from trackie.repositories.file_edit import (
+    check_block_lines,
+    get_description,
+    get_numbered_blocks,
+    parse_date,
+    parse_duration,
+)
+from trackie.utils import TrackieFormatException
+from trackie.validation import BlockValidator
+from trackie.work.models import WorkUnit
+
+MAGIC = b'TRKJ\x01\x00\x00\x00'
+# date ordinal, minutes, start and end in minutes after midnight of the
+# date (-1 if unknown), offset and length of the description
+RECORD = struct.Struct('<IIhhQI')
+NO_TIME = -1
+
+
+def get_text_path(path: Path) -> Path:
+    """
+    The description heap next to the records file.
+    """
+    return path.with_name(path.name + '.text')
+
+
+def to_minute(date: dt.date, time: dt.datetime | None) -> int:
+    if time is None:
+        return NO_TIME
+    midnight = dt.datetime.combine(date, dt.time())
+    return int((time - midnight).total_seconds()) // 60
+
+
+def from_minute(date: dt.date, minute: int) -> dt.datetime | None:
+    if minute == NO_TIME:
+        return None
+    return dt.datetime.combine(date, dt.time()) + dt.timedelta(minutes=minute)
+
+
+class Journal:
+    """
+    Memory-mapped view of a journal's records and descriptions.
+
+    Records are fixed-width and sorted by date, so the first record of a
+    date is found by bisection. A partly written last record, e.g. after
+    a crash during an append, is ignored.
+    """
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.records = self.map(path)
+        self.text = self.map(get_text_path(path))
+        if self.records[:len(MAGIC)] not in (b'', MAGIC):
+            raise TrackieFormatException(f'{path} is not a trackie journal.')
+        size = max(len(self.records) - len(MAGIC), 0)
+        self.count = size // RECORD.size
+
+    @staticmethod
+    def map(path: Path) -> mmap.mmap | bytes:
+        try:
+            with path.open('rb') as f:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # mmap refuses empty files
+            return b''
+
+    def close(self) -> None:
+        for mapped in (self.records, self.text):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+
+    def __enter__(self) -> 'Journal':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def date_ordinal(self, index: int) -> int:
+        return struct.unpack_from(
+            '<I', self.records, len(MAGIC) + index * RECORD.size)[0]
+
+    def find(self, ordinal: int) -> int:
+        """
+        Index of the first record on or after the date ordinal.
+        """
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.date_ordinal(middle) < ordinal:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def iter_records(
+        self,
+        first: int = 0,
+        last: int | None = None,
+    ) -> Generator[tuple[int, int, int, int, int, int]]:
+        """
+        Unpack records first..last (exclusive) without copying them.
+        """
+        last = self.count if last is None else last
+        if first >= last:
+            return
+        view = memoryview(self.records)
+        try:
+            yield from RECORD.iter_unpack(view[
+                len(MAGIC) + first * RECORD.size:
+                len(MAGIC) + last * RECORD.size
+            ])
+        finally:
+            view.release()
+
+    def iter_range(
+        self,
+        params: Params,
+    ) -> Generator[tuple[int, int, int, int, int, int]]:
+        """
+        Unpack the records within the date range of params.
+        """
+        end_date = params.end_date or dt.date.today()
+        yield from self.iter_records(
+            self.find(params.start_date.toordinal()),
+            self.find(end_date.toordinal() + 1),
+        )
+
+    def description_lines(self, offset: int, length: int) -> list[str]:
+        if not length:
+            return []
+        return self.text[offset:offset + length].decode().split('\n')
+
+
+def append_entries(
+    path: Path,
+    entries: Iterable[tuple[dt.date, Sequence[str], int, int, int]],
+) -> int:
+    """
+    Append (date, description lines, minutes, start, end) entries.
+
+    Descriptions are written before their records, so an interrupted
+    append leaves unreferenced text at worst. Returns the number of
+    entries appended.
+    """
+    text_path = get_text_path(path)
+    with Journal(path) as journal:
+        last_ordinal = (
+            journal.date_ordinal(journal.count - 1) if journal.count else 0)
+        records_size = len(MAGIC) + journal.count * RECORD.size
+
+    appended = 0
+    with path.open('ab') as records, text_path.open('ab') as text:
+        if records.tell() == 0:
+            records.write(MAGIC)
+        elif records.tell() != records_size:
+            # drop a partly written record
+            records.truncate(records_size)
+        offset = text.tell()
+        for date, lines, minutes, start, end in entries:
+            ordinal = date.toordinal()
+            if ordinal < last_ordinal:
+                raise TrackieFormatException(
+                    f'{date} is before the last entry of {path}, '
+                    'journals only grow in date order.'
+                )
+            encoded = '\n'.join(lines).encode()
+            text.write(encoded)
+            records.write(RECORD.pack(
+                ordinal, minutes, start, end, offset, len(encoded)))
+            offset += len(encoded)
+            last_ordinal = ordinal
+            appended += 1
+        text.flush()
+        os.fsync(text.fileno())
+        records.flush()
+        os.fsync(records.fileno())
+    return appended
+
+
+class JournalRepository(WorkRepository):
+    """
+    Append-only binary storage for machine-written tracking data.
+
+    A journal is a file of fixed-width records plus a file with the UTF-8
+    descriptions (see get_text_path), meant for automated trackers that
+    log many small entries.
+    """
+    @staticmethod
+    def get_work_units(params: Params) -> Generator[WorkUnit]:
+        where = params.where
+        with Journal(params.data_path) as journal:
+            for (
+                ordinal, minutes, start, end, offset, length,
+            ) in journal.iter_range(params):
+                date = dt.date.fromordinal(ordinal)
+                if where is not None and not where.matches(
+                    date,
+                    minutes,
+                    get_description(journal.description_lines(
+                        offset, length)) if where.needs_description else '',
+                ):
+                    continue
+                yield WorkUnit(
+                    date,
+                    params.client,
+                    minutes,
+                    get_description(
+                        journal.description_lines(offset, length)),
+                    start=from_minute(date, start),
+                    end=from_minute(date, end),
+                )
+
+    @staticmethod
+    def get_fields(
+        params: Params,
+        fields: Sequence[str],
+    ) -> Generator[tuple]:
+        project = get_projection(fields)
+        where = params.where
+        with_description = 'description' in fields or bool(
+            where and where.needs_description)
+        with_times = 'start' in fields or 'end' in fields
+        description = ''
+        start_time = end_time = None
+        with Journal(params.data_path) as journal:
+            for (
+                ordinal, minutes, start, end, offset, length,
+            ) in journal.iter_range(params):
+                date = dt.date.fromordinal(ordinal)
+                if with_description:
+                    description = get_description(
+                        journal.description_lines(offset, length))
+                if where is not None and not where.matches(
+                        date, minutes, description):
+                    continue
+                if with_times:
+                    start_time = from_minute(date, start)
+                    end_time = from_minute(date, end)
+                yield project((
+                    date, params.client, minutes, description,
+                    start_time, end_time,
+                ))
+
+    @staticmethod
+    def add_work_unit(work_unit: WorkUnit, params: Params) -> None:
+        description = work_unit.description.strip()
+        append_entries(params.data_path, [(
+            work_unit.date,
+            [description] if description else [],
+            work_unit.minutes,
+            to_minute(work_unit.date, work_unit.start),
+            to_minute(work_unit.date, work_unit.end),
+        )])
+
+
+def get_otl_entries(
+    params: Params,
+) -> Generator[tuple[dt.date, list[str], int, int, int]]:
+    """
+    Entries of an .otl file keeping the description lines apart.
+    """
+    validator = BlockValidator(params)
+    for line_number, block in get_numbered_blocks(
+        params.data_path, params.date_pattern,
+    ):
+        try:
+            validator.check(block, line_number)
+        except TrackieFormatException:
+            check_block_lines(params.data_path, block, line_number, params)
+            raise
+        if not params.date_pattern.match(block[0]):
+            continue
+        date = parse_date(block[0])
+        lines: list[str] = []
+        for line in block[1:]:
+            if params.description_pattern.match(line):
+                lines.append(line.strip())
+            elif params.duration_pattern.match(line):
+                minutes, start, end = parse_duration(line, date)
+                yield (
+                    date, lines, minutes,
+                    to_minute(date, start), to_minute(date, end),
+                )
+                lines = []
+    validator.save(complete=True)
+
+
+def convert_otl_to_journal(params: Params, journal_path: Path) -> int:
+    """
+    Write all entries of the .otl file params.data_path to a journal.
+
+    Entries are sorted by date, entries of the same date keep their order.
+    """
+    entries = sorted(get_otl_entries(params), key=lambda entry: entry[0])
+    journal_path.unlink(missing_ok=True)
+    get_text_path(journal_path).unlink(missing_ok=True)
+    return append_entries(journal_path, entries)
+
+
+def format_time(time: dt.datetime) -> str:
+    return f'{time.hour}:{time.minute:02}'
+
+
+def convert_journal_to_otl(
+    journal_path: Path,
+    otl_path: Path,
+    *,
+    spaces: int | None = None,
+) -> int:
+    """
+    Write all entries of a journal to an .otl file, one block per date.
+
+    Indents with tabs or the configured number of spaces.
+    """
+    indent = ' ' * spaces if spaces else '\t'
+    count = 0
+    previous_ordinal = None
+    with Journal(journal_path) as journal, otl_path.open('w') as f:
+        for (
+            ordinal, minutes, start, end, offset, length,
+        ) in journal.iter_records():
+            date = dt.date.fromordinal(ordinal)
+            if ordinal != previous_ordinal:
+                f.write(f'{date:%Y-%m-%d}\n')
+                previous_ordinal = ordinal
+            for line in journal.description_lines(offset, length):
+                f.write(f'{indent}{line}\n')
+            start_time = from_minute(date, start)
+            end_time = from_minute(date, end)
+            if start_time and end_time:
+                duration = (
+                    f'{format_time(start_time)}-{format_time(end_time)}')
+            else:
+                duration = str(minutes)
+            f.write(f'{indent * 2}{duration}\n')
+            count += 1
+    return count
@@ -0,0 +1,48 @@
+import calendar
+from dataclasses import dataclass
+import datetime as dt
+from pathlib import Path
+import re
+
+from trackie.repositories.segments import compressions
+
+partition_pattern = re.compile(
+    rf'(\d{{4}})(?:-(\d{{2}}))?\.otl(?:\.(?:{"|".join(compressions)}))?')
+
+
+@dataclass(frozen=True)
+class Partition:
+    """
+    A tracking file of a client's directory holding one year or month,
+    e.g. 2024.otl or 2024-03.otl.
+    """
+    path: Path
+    first_day: dt.date
+    last_day: dt.date
+
+
+def get_partitions(directory: Path) -> list[Partition]:
+    """
+    Partitions of a directory in date order, other files are ignored.
+    """
+    partitions = []
+    for path in directory.iterdir():
+        match = partition_pattern.fullmatch(path.name)
+        if not match:
+            continue
+        year = int(match.group(1))
+        if match.group(2):
+            month = int(match.group(2))
+            if not 1 <= month <= 12:
+                continue
+            first_day = dt.date(year, month, 1)
+            last_day = dt.date(
+                year, month, calendar.monthrange(year, month)[1])
+        else:
+            first_day, last_day = dt.date(year, 1, 1), dt.date(year, 12, 31)
+        partitions.append(Partition(path, first_day, last_day))
+    return sorted(
+        partitions,
+        key=lambda partition: (partition.first_day, partition.last_day),
+    )
+
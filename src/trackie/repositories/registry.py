@@ -0,0 +1,101 @@
+"""
+Storage backends by name, imported only when a client uses them.
+
+Besides the built-in ones, installed packages may add backends as entry
+points of the group "trackie.repositories", e.g. in their pyproject.toml:
+
+    [project.entry-points."trackie.repositories"]
+    sqlite = "trackie_sqlite:SqliteRepository"
+"""
+from functools import cache
+import importlib
+from importlib.metadata import entry_points
+from pathlib import Path
+
+from trackie.conf import Config
+from trackie.repositories.base import WorkRepository
+from trackie.utils import TrackieConfigException
+
+ENTRY_POINT_GROUP = 'trackie.repositories'
+DEFAULT_REPOSITORY = 'file_edit'
+JOURNAL_SUFFIX = '.otj'
+
+# name: "module:attribute"
+BUILTIN_REPOSITORIES = {
+    'file_edit': 'trackie.repositories.file_edit:FileEditRepository',
+    'journal': 'trackie.repositories.journal:JournalRepository',
+    'http': 'trackie.repositories.remote:HttpRepository',
+}
+# files with these suffixes need their own backend
+SUFFIX_REPOSITORIES = {
+    JOURNAL_SUFFIX: 'journal',
+}
+# clients whose file is one of these URLs are read over HTTP
+URL_SCHEMES = ('http://', 'https://')
+
+
+def get_repository_names() -> list[str]:
+    names = dict.fromkeys(BUILTIN_REPOSITORIES)
+    names.update(dict.fromkeys(
+        entry_point.name
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP)
+    ))
+    return list(names)
+
+
+@cache
+def load_repository(name: str) -> WorkRepository:
+    """
+    Import the backend called name.
+
+    Built-in backends are looked up without scanning the installed
+    packages' entry points.
+    """
+    if name in BUILTIN_REPOSITORIES:
+        module_name, attribute = BUILTIN_REPOSITORIES[name].split(':')
+        return getattr(importlib.import_module(module_name), attribute)
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP, name=name):
+        return entry_point.load()
+    raise TrackieConfigException(
+        f'Unknown repository "{name}". '
+        f'Possible values: {" | ".join(get_repository_names())}'
+    )
+
+
+def get_client_url(config: Config, client: str) -> str | None:
+    """
+    The URL of the client's file if it is served over HTTP.
+    """
+    location = str((config.clients or {}).get(client, ''))
+    return location if location.startswith(URL_SCHEMES) else None
+
+
+def get_repository_name(
+    config: Config,
+    client: str,
+    data_path: Path,
+) -> str:
+    """
+    The backend of a client: its entry of the [repositories] table, http
+    for URLs, a backend needed for the file's suffix, or the configured
+    repository.
+    """
+    if config.repositories and client in config.repositories:
+        return config.repositories[client]
+    if get_client_url(config, client):
+        return 'http'
+    if data_path.suffix in SUFFIX_REPOSITORIES:
+        return SUFFIX_REPOSITORIES[data_path.suffix]
+    return config.repository
+
+
+def get_repository(
+    data_path: Path,
+    name: str | None = None,
+) -> WorkRepository:
+    """
+    The backend called name, by default the one for data_path's suffix.
+    """
+    if name is None:
+        name = SUFFIX_REPOSITORIES.get(data_path.suffix, DEFAULT_REPOSITORY)
+    return load_repository(name)
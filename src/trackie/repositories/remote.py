@@ -0,0 +1,288 @@
+"""
+Tracking files served over HTTP, read from a mirror in the cache directory.
+
+Before each read the mirror is revalidated with the ETag and Last-Modified
+the server sent for it, an unchanged file costs one request without body.
+A file that grew is fetched with a Range request from MIRROR_OVERLAP bytes
+before the mirror's end. If these bytes still match the mirror only the
+bytes after it are appended, otherwise the whole file is fetched again. So
+is a file whose ETag or Last-Modified changed while nothing was appended.
+Edits more than MIRROR_OVERLAP bytes before the mirror's end of a file that
+also grew are not noticed, remove the mirror to fetch everything.
+
+Requests go over keep-alive connections kept in a pool per server.
+"""
+from collections.abc import Generator, Sequence
+from dataclasses import dataclass
+import http.client
+import os
+from pathlib import Path
+import re
+import threading
+from urllib.parse import urlsplit
+
+from trackie.cache import load_json, store_json
+from trackie.conf import Params
+from trackie.repositories.base import WorkRepository
+from trackie.repositories.file_edit import FileEditRepository
+from trackie.utils import TrackieConfigException, TrackieException
+from trackie.work.models import WorkUnit
+
+TIMEOUT = 30
+MAX_IDLE_CONNECTIONS = 4
+# bytes before the end of the mirror fetched again to tell an appended
+# file from an edited one
+MIRROR_OVERLAP = 1 << 16
+
+content_range_pattern = re.compile(r'bytes (\d+)-\d+/(?:\d+|\*)')
+
+
+class ConnectionPool:
+    """
+    Idle keep-alive connections per server, shared by all threads.
+    """
+    def __init__(self, max_idle: int = MAX_IDLE_CONNECTIONS) -> None:
+        self.max_idle = max_idle
+        self.lock = threading.Lock()
+        self.idle: dict[
+            tuple[str, str], list[http.client.HTTPConnection]] = {}
+
+    def take(
+        self,
+        scheme: str,
+        netloc: str,
+    ) -> tuple[http.client.HTTPConnection, bool]:
+        """
+        A connection to the server and whether it was used before.
+        """
+        with self.lock:
+            connections = self.idle.get((scheme, netloc))
+            if connections:
+                return connections.pop(), True
+        if scheme == 'https':
+            return http.client.HTTPSConnection(netloc, timeout=TIMEOUT), False
+        return http.client.HTTPConnection(netloc, timeout=TIMEOUT), False
+
+    def give_back(
+        self,
+        scheme: str,
+        netloc: str,
+        connection: http.client.HTTPConnection,
+    ) -> None:
+        with self.lock:
+            connections = self.idle.setdefault((scheme, netloc), [])
+            if len(connections) < self.max_idle:
+                connections.append(connection)
+                return
+        connection.close()
+
+    def clear(self) -> None:
+        with self.lock:
+            connections = [
+                connection
+                for server_connections in self.idle.values()
+                for connection in server_connections
+            ]
+            self.idle.clear()
+        for connection in connections:
+            connection.close()
+
+
+pool = ConnectionPool()
+
+# one thread at a time updates a mirror
+mirror_locks: dict[Path, threading.Lock] = {}
+mirror_locks_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Response:
+    status: int
+    reason: str
+    headers: http.client.HTTPMessage
+    body: bytes
+
+
+def fetch(
+    url: str,
+    headers: dict[str, str],
+    connections: ConnectionPool = pool,
+) -> Response:
+    """
+    GET url over a pooled connection.
+
+    A request on an idle connection the server closed meanwhile is sent
+    again on another one. Raises TrackieException if the server cannot be
+    reached.
+    """
+    parts = urlsplit(url)
+    target = parts.path or '/'
+    if parts.query:
+        target += f'?{parts.query}'
+    while True:
+        connection, reused = connections.take(parts.scheme, parts.netloc)
+        try:
+            connection.request('GET', target, headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+        except ConnectionError as e:
+            connection.close()
+            if reused:
+                continue
+            raise TrackieException(f'Cannot fetch {url}: {e}') from e
+        except (OSError, http.client.HTTPException) as e:
+            connection.close()
+            raise TrackieException(f'Cannot fetch {url}: {e}') from e
+        if response.will_close:
+            connection.close()
+        else:
+            connections.give_back(parts.scheme, parts.netloc, connection)
+        return Response(
+            response.status, response.reason, response.headers, body)
+
+
+def get_state_path(mirror: Path) -> Path:
+    return mirror.with_name(f'{mirror.name}.json')
+
+
+def store_state(
+    mirror: Path,
+    url: str,
+    response: Response,
+    size: int,
+) -> None:
+    store_json(get_state_path(mirror), {
+        'url': url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'size': size,
+    })
+
+
+def validators_changed(state: dict, response: Response) -> bool:
+    return (
+        response.headers.get('ETag') != state['etag']
+        or response.headers.get('Last-Modified') != state['last_modified']
+    )
+
+
+def read_tail(path: Path, size: int) -> bytes:
+    with path.open('rb') as f:
+        f.seek(-size, os.SEEK_END)
+        return f.read()
+
+
+def replace_mirror(mirror: Path, url: str, response: Response) -> None:
+    tmp_path = mirror.with_name(f'{mirror.name}.{os.getpid()}.tmp')
+    with tmp_path.open('wb') as f:
+        f.write(response.body)
+        f.flush()
+        os.fsync(f.fileno())
+    tmp_path.replace(mirror)
+    store_state(mirror, url, response, len(response.body))
+
+
+def fetch_whole(url: str, mirror: Path, connections: ConnectionPool) -> bool:
+    response = fetch(url, {}, connections)
+    if response.status != 200:
+        raise TrackieException(
+            f'Cannot fetch {url}: {response.status} {response.reason}')
+    replace_mirror(mirror, url, response)
+    return True
+
+
+def sync_mirror(
+    url: str,
+    mirror: Path,
+    connections: ConnectionPool = pool,
+) -> bool:
+    """
+    Bring the mirror of the file at url up to date, True if it changed.
+    """
+    with mirror_locks_lock:
+        lock = mirror_locks.setdefault(mirror, threading.Lock())
+    with lock:
+        mirror.parent.mkdir(parents=True, exist_ok=True)
+        state = load_json(get_state_path(mirror)) if mirror.exists() else None
+        # the size differs if the mirror was written without its state
+        if (
+            state is None
+            or state.get('url') != url
+            or mirror.stat().st_size != state.get('size')
+        ):
+            return fetch_whole(url, mirror, connections)
+
+        size = state['size']
+        overlap = min(size, MIRROR_OVERLAP)
+        headers = {'Range': f'bytes={size - overlap}-'}
+        if state['etag']:
+            headers['If-None-Match'] = state['etag']
+        if state['last_modified']:
+            headers['If-Modified-Since'] = state['last_modified']
+        response = fetch(url, headers, connections)
+
+        if response.status == 304:
+            return False
+        if response.status == 206:
+            match = content_range_pattern.fullmatch(
+                response.headers.get('Content-Range', ''))
+            if (
+                match is not None
+                and int(match[1]) == size - overlap
+                and response.body[:overlap] == read_tail(mirror, overlap)
+                and (
+                    len(response.body) > overlap
+                    or not validators_changed(state, response)
+                )
+            ):
+                appended = response.body[overlap:]
+                with mirror.open('ab') as f:
+                    f.write(appended)
+                    f.flush()
+                    os.fsync(f.fileno())
+                store_state(mirror, url, response, size + len(appended))
+                return bool(appended)
+            # changed before the mirror's end, or rewritten in place
+            return fetch_whole(url, mirror, connections)
+        if response.status == 416:
+            # the file got shorter than the mirror
+            return fetch_whole(url, mirror, connections)
+        if response.status == 200:
+            # the server ignored the Range header
+            replace_mirror(mirror, url, response)
+            return True
+        raise TrackieException(
+            f'Cannot fetch {url}: {response.status} {response.reason}')
+
+
+def sync_client(params: Params) -> bool:
+    """
+    Update the mirror at params.data_path from params.url.
+    """
+    if params.url is None:
+        raise TrackieConfigException(
+            f'Client "{params.client}" needs a URL for repository "http".')
+    return sync_mirror(params.url, params.data_path)
+
+
+class HttpRepository(WorkRepository):
+    """
+    Read-only tracking files on a web server, parsed from their mirror.
+    """
+    @staticmethod
+    def get_work_units(params: Params) -> Generator[WorkUnit]:
+        sync_client(params)
+        yield from FileEditRepository.get_work_units(params)
+
+    @staticmethod
+    def get_fields(
+        params: Params,
+        fields: Sequence[str],
+    ) -> Generator[tuple]:
+        sync_client(params)
+        yield from FileEditRepository.get_fields(params, fields)
+
+    @staticmethod
+    def add_work_unit(work_unit, params: Params) -> None:
+        raise NotImplementedError(
+            f'{params.url} is read-only, edit it on the server.')
@@ -0,0 +1,118 @@
+from dataclasses import dataclass
+import glob
+import gzip
+import io
+import os
+from pathlib import Path
+import re
+from types import ModuleType
+from typing import IO, Literal
+
+from trackie.utils import TrackieConfigException
+
+Compression = Literal['gz', 'zst']
+compressions = ('gz', 'zst')
+ARCHIVE_SUFFIXES = tuple(f'.{compression}' for compression in compressions)
+
+
+@dataclass(frozen=True)
+class Segment:
+    """
+    A compressed archive segment of a tracking file holding the entries
+    of years first..last, e.g. work.2019-2022.otl.gz next to work.otl.
+    """
+    path: Path
+    first_year: int
+    last_year: int
+
+
+def get_segment_pattern(path: Path) -> re.Pattern:
+    return re.compile(
+        rf'{re.escape(path.stem)}\.(\d{{4}})(?:-(\d{{4}}))?'
+        rf'{re.escape(path.suffix)}\.({"|".join(compressions)})'
+    )
+
+
+def get_segments(path: Path) -> list[Segment]:
+    """
+    Archive segments of the tracking file at path, oldest first.
+    """
+    pattern = get_segment_pattern(path)
+    segments = []
+    for candidate in path.parent.glob(
+            f'{glob.escape(path.stem)}.*{glob.escape(path.suffix)}.*'):
+        match = pattern.fullmatch(candidate.name)
+        if match:
+            first_year = int(match.group(1))
+            last_year = int(match.group(2) or first_year)
+            segments.append(Segment(candidate, first_year, last_year))
+    return sorted(
+        segments,
+        key=lambda segment: (segment.first_year, segment.last_year),
+    )
+
+
+def get_segment_path(
+    path: Path,
+    first_year: int,
+    last_year: int,
+    compression: Compression,
+) -> Path:
+    years = str(first_year)
+    if last_year != first_year:
+        years = f'{first_year}-{last_year}'
+    return path.with_name(f'{path.stem}.{years}{path.suffix}.{compression}')
+
+
+def require_zstandard(path: Path) -> ModuleType:
+    """
+    The zstandard module, optional and only needed for .zst segments.
+    """
+    try:
+        import zstandard
+    except ImportError:
+        raise TrackieConfigException(
+            f'Reading or writing {path} needs the zstandard package: '
+            'pip install zstandard'
+        ) from None
+    return zstandard
+
+
+def open_text(path: Path) -> IO[str]:
+    """
+    Open a tracking file or archive segment for reading text, archives
+    are decompressed while they are read.
+    """
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if path.suffix == '.zst':
+        zstandard = require_zstandard(path)
+        return io.TextIOWrapper(
+            zstandard.ZstdDecompressor().stream_reader(path.open('rb')),
+            encoding='utf-8',
+        )
+    return path.open()
+
+
+def write_segment(path: Path, text: str, compression: Compression) -> Path:
+    """
+    Write compressed text to a temporary file next to path, synced to
+    disk, and return the temporary path to be renamed into place.
+    """
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    data = text.encode()
+    if compression == 'zst':
+        zstandard = require_zstandard(path)
+        data = zstandard.ZstdCompressor(level=19).compress(data)
+    else:
+        data = gzip.compress(data, compresslevel=9, mtime=0)
+    with tmp_path.open('wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    return tmp_path
+
+
+def read_segment(path: Path) -> str:
+    with open_text(path) as f:
+        return f.read()
@@ -0,0 +1,253 @@
+from array import array
+from collections.abc import Sequence
+import dataclasses
+import datetime as dt
+import pickle
+
+from trackie.cache import content_hash, get_cache_path
+from trackie.conf import Params
+from trackie.repositories.file_edit import (
+    check_block_lines,
+    get_sources,
+    parse_block,
+    parse_date,
+)
+from trackie.repositories.registry import get_repository
+from trackie.repositories.segments import ARCHIVE_SUFFIXES, read_segment
+from trackie.utils import TrackieFormatException
+from trackie.validation import BlockValidator
+from trackie.work.models import WorkUnit
+
+INDEX_VERSION = 3
+# backends reading tracking files, these are searched with an index
+INDEXED_REPOSITORIES = ('file_edit', 'http')
+
+
+def get_trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def new_index(patterns: list[str]) -> dict:
+    return {
+        'version': INDEX_VERSION,
+        'patterns': patterns,
+        # modification time and size of an archive segment, segments are
+        # indexed as a whole
+        'stamp': None,
+        # number of bytes of the tracking file covered by the index
+        'size': 0,
+        'prefix_hash': content_hash(b''),
+        # the last date block may still grow, it is indexed again
+        # starting at this byte offset with this unit id
+        'resume_offset': 0,
+        'resume_line': 1,
+        'resume_unit': 0,
+        'dates': array('I'),
+        'minutes': array('I'),
+        'descriptions': [],
+        'postings': {},
+    }
+
+
+def drop_units_from(index: dict, unit_id: int) -> None:
+    """
+    Remove units with ids >= unit_id from the index.
+
+    Postings are sorted by unit id so dropped ids sit at their ends.
+    """
+    for description in index['descriptions'][unit_id:]:
+        for trigram in get_trigrams(description.lower()):
+            posting = index['postings'][trigram]
+            while posting and posting[-1] >= unit_id:
+                posting.pop()
+            if not posting:
+                del index['postings'][trigram]
+    del index['dates'][unit_id:]
+    del index['minutes'][unit_id:]
+    del index['descriptions'][unit_id:]
+
+
+def add_unit(index: dict, work_unit: WorkUnit) -> None:
+    unit_id = len(index['descriptions'])
+    index['dates'].append(work_unit.date.toordinal())
+    index['minutes'].append(work_unit.minutes)
+    index['descriptions'].append(work_unit.description)
+    postings = index['postings']
+    for trigram in get_trigrams(work_unit.description.lower()):
+        posting = postings.get(trigram)
+        if posting is None:
+            posting = postings[trigram] = array('I')
+        posting.append(unit_id)
+
+
+def update_index(index: dict, data: bytes, params: Params) -> None:
+    """
+    Index the bytes of the tracking file not covered by the index yet.
+    """
+    drop_units_from(index, index['resume_unit'])
+    validator = BlockValidator(params)
+
+    def index_block(block: list[str], offset: int, line_number: int):
+        try:
+            validator.check(block, line_number)
+        except TrackieFormatException:
+            check_block_lines(params.data_path, block, line_number, params)
+            raise
+        index['resume_offset'] = offset
+        index['resume_line'] = line_number
+        index['resume_unit'] = len(index['descriptions'])
+        if params.date_pattern.match(block[0]):
+            date = parse_date(block[0])
+            for work_unit in parse_block(block, date, params):
+                add_unit(index, work_unit)
+
+    offset = block_offset = index['resume_offset']
+    line_number = block_line_number = index['resume_line']
+    block: list[str] = []
+    for raw_line in data[offset:].splitlines(keepends=True):
+        line = raw_line.decode().rstrip('\r\n') + '\n'
+        if line.strip():
+            if block and params.date_pattern.match(line):
+                index_block(block, block_offset, block_line_number)
+                block = []
+            if not block:
+                block_offset = offset
+                block_line_number = line_number
+            block.append(line)
+        line_number += 1
+        offset += len(raw_line)
+    if block:
+        index_block(block, block_offset, block_line_number)
+    validator.save(complete=False)
+
+    index['size'] = len(data)
+    index['prefix_hash'] = content_hash(data)
+
+
+def load_index(params: Params) -> dict:
+    """
+    Load the search index of the tracking file and bring it up to date.
+
+    If the file only grew since the index was written, only the new
+    bytes get parsed. Any other change rebuilds the index. Archive
+    segments are only decompressed and indexed again when their
+    modification time or size changed.
+    """
+    path = params.data_path
+    patterns = [
+        params.date_pattern.pattern,
+        params.description_pattern.pattern,
+        params.duration_pattern.pattern,
+    ]
+    index_path = None
+    index = None
+    if params.cache_dir:
+        index_path = get_cache_path(
+            params.cache_dir, 'search', path, '.pickle')
+        try:
+            with index_path.open('rb') as f:
+                index = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            index = None
+    if index is not None and (
+        index.get('version') != INDEX_VERSION
+        or index['patterns'] != patterns
+    ):
+        index = None
+
+    if path.suffix in ARCHIVE_SUFFIXES:
+        stat = path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if index is not None and index['stamp'] == stamp:
+            return index
+        index = new_index(patterns)
+        index['stamp'] = stamp
+        data = read_segment(path).encode()
+    else:
+        data = path.read_bytes()
+        if (
+            index is None
+            or len(data) < index['size']
+            or content_hash(data[:index['size']]) != index['prefix_hash']
+        ):
+            index = new_index(patterns)
+        elif len(data) == index['size']:
+            return index
+
+    update_index(index, data, params)
+    if index_path:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = index_path.with_suffix('.tmp')
+        with tmp_path.open('wb') as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(index_path)
+    return index
+
+
+def find_unit_ids(index: dict, terms: Sequence[str]) -> list[int]:
+    """
+    Ids of units whose description contains all terms, ignoring case.
+    """
+    descriptions = index['descriptions']
+    postings = index['postings']
+    candidates: set[int] | None = None
+    for term in terms:
+        trigrams = get_trigrams(term)
+        if not trigrams:
+            # too short for the index, verified below
+            continue
+        term_postings = sorted(
+            (postings.get(trigram, ()) for trigram in trigrams), key=len)
+        term_candidates = set(term_postings[0])
+        for posting in term_postings[1:]:
+            if not term_candidates:
+                break
+            term_candidates.intersection_update(posting)
+        if candidates is None:
+            candidates = term_candidates
+        else:
+            candidates &= term_candidates
+    if candidates is None:
+        candidates = set(range(len(descriptions)))
+    return [
+        unit_id for unit_id in sorted(candidates)
+        if all(term in descriptions[unit_id].lower() for term in terms)
+    ]
+
+
+def search_work_units(params: Params, query: str) -> list[WorkUnit]:
+    """
+    Work units within the params date range matching all words of query.
+
+    Each partition of a client's directory and each archive segment has
+    an index of its own. Backends not storing tracking files, e.g.
+    journals, are read through their repository and filtered unit by
+    unit.
+    """
+    terms = query.lower().split()
+    if params.repository not in INDEXED_REPOSITORIES:
+        repository = get_repository(params.data_path, params.repository)
+        return [
+            work_unit for work_unit in repository.get_work_units(params)
+            if all(term in work_unit.description.lower() for term in terms)
+        ]
+    if params.url is not None:
+        from trackie.repositories.remote import sync_client
+        sync_client(params)
+    start = params.start_date.toordinal()
+    end = (params.end_date or dt.date.today()).toordinal()
+    work_units = []
+    for path in get_sources(params):
+        index = load_index(dataclasses.replace(params, data_path=path))
+        dates = index['dates']
+        work_units.extend(
+            WorkUnit(
+                dt.date.fromordinal(dates[unit_id]),
+                params.client,
+                index['minutes'][unit_id],
+                index['descriptions'][unit_id],
+            )
+            for unit_id in find_unit_ids(index, terms)
+            if start <= dates[unit_id] <= end
+        )
+    return work_units
@@ -1,4 +1,5 @@
 from collections.abc import Generator, Sequence
+from dataclasses import dataclass
 import datetime as dt
 import re
 import sys
@@ -7,7 +8,19 @@ from typing import Literal
 from trackie.ansi_colors import RED, RESET, BACKGROUND_BRIGHT_YELLOW
 
 
-class TrackieFormatException(Exception):
+class TrackieException(Exception):
+    """
+    Base of the errors raised by trackie's library code.
+
+    Only the command line interface turns them into messages and exits.
+    """
+
+
+class TrackieFormatException(TrackieException):
+    pass
+
+
+class TrackieConfigException(TrackieException):
     pass
 
 
@@ -15,53 +28,90 @@ def error(message):
     sys.exit(RED + BACKGROUND_BRIGHT_YELLOW + message + RESET)
 
 
-def check_format(
-    lines: Sequence[str],
+@dataclass(frozen=True)
+class FormatError:
+    line_number: int
+    message: str
+
+    def __str__(self) -> str:
+        return f'Format error on line #{self.line_number}: {self.message}'
+
+
+def iter_format_errors(
+    numbered_lines: Sequence[tuple[int, str]],
     *,
     date_pattern: re.Pattern,
     description_pattern: re.Pattern,
     duration_pattern: re.Pattern,
-) -> Literal[True]:
+) -> Generator[FormatError]:
+    """
+    Generate all violations of the date/description/duration schema.
 
-    if not lines:
-        return True
+    numbered_lines are non-empty lines with their line numbers in the file.
+    """
+    if not numbered_lines:
+        return
 
-    if not date_pattern.match(lines[0]):
-        raise TrackieFormatException(
-            'Format error on Line 1: '
-            'First line must be a date.'
-        )
-    if not duration_pattern.match(lines[-1]):
-        raise TrackieFormatException(
-            'Format error on last Line: '
-            'Last line must be a duration.'
-        )
+    first_line_number, first_line = numbered_lines[0]
+    if not date_pattern.match(first_line):
+        yield FormatError(first_line_number, 'Line must be a date.')
 
-    pairs = zip(lines, lines[1:])
+    pairs = zip(numbered_lines, numbered_lines[1:])
 
-    for line_number, pair in enumerate(pairs):
-        if date_pattern.match(pair[0]):
-            if not description_pattern.match(pair[1]):
-                raise TrackieFormatException(
-                    f'Format error on line #{line_number + 1}: '
+    for (line_number, line), (_, next_line) in pairs:
+        if date_pattern.match(line):
+            if not description_pattern.match(next_line):
+                yield FormatError(
+                    line_number,
                     'date is not followed by a description line. '
                     'Hint: description must not start with a number!'
                 )
-        # elif description_pattern.match(pair[0]):
-        #     if not duration_pattern.match(pair[1]):
-        #         raise TrackieFormatException(
-        #             f'Format error on line #{line_number + 1}: '
+        # elif description_pattern.match(line):
+        #     if not duration_pattern.match(next_line):
+        #         yield FormatError(
+        #             line_number,
         #             'description not followed by a duration line.'
         #         )
-        elif duration_pattern.match(pair[0]):
+        elif duration_pattern.match(line):
             if not (
-                date_pattern.match(pair[1])
-                or description_pattern.match(pair[1])
+                date_pattern.match(next_line)
+                or description_pattern.match(next_line)
             ):
-                raise TrackieFormatException(
-                    f'Format error on line #{line_number + 1}: '
+                yield FormatError(
+                    line_number,
                     'duration is not followed by a description or date line.'
                 )
+
+    last_line_number, last_line = numbered_lines[-1]
+    if not duration_pattern.match(last_line):
+        yield FormatError(
+            last_line_number,
+            'Last line of a date entry must be a duration.'
+        )
+
+
+def check_format(
+    lines: Sequence[str],
+    *,
+    date_pattern: re.Pattern,
+    description_pattern: re.Pattern,
+    duration_pattern: re.Pattern,
+    first_line_number: int = 1,
+) -> Literal[True]:
+    """
+    Check that lines follow the date/description/duration schema.
+
+    `first_line_number` is the line number of lines[0] in the file, so
+    a slice of a file can be checked and errors still point to the
+    right line. Raises TrackieFormatException for the first error.
+    """
+    for format_error in iter_format_errors(
+        list(enumerate(lines, first_line_number)),
+        date_pattern=date_pattern,
+        description_pattern=description_pattern,
+        duration_pattern=duration_pattern,
+    ):
+        raise TrackieFormatException(str(format_error))
     return True
 
 
@@ -99,7 +149,7 @@ def daterange_from_week(
     First day is Monday (1), last is Sunday (0)
     If exclude_weekend is True last_day is Friday (5)
     """
-    first_day_of_week = dt.datetime.strptime(f'{year}-{week-1}-1', "%Y-%W-%w").date()  # noqa: E501
+    first_day_of_week = dt.date.fromisocalendar(year, week, 1)
     days_delta = 4 if exclude_weekend else 6
     last_day_of_week = first_day_of_week + dt.timedelta(days=days_delta)
     return first_day_of_week, last_day_of_week
@@ -110,3 +160,19 @@ def get_week_range(start_date: dt.date, end_date: dt.date) -> Sequence[int]:
     Get (inclusive) week numbers lying between two dates.
     """
     return range(start_date.isocalendar()[1], end_date.isocalendar()[1] + 1)
+
+
+def get_iso_weeks(
+    start_date: dt.date,
+    end_date: dt.date,
+) -> list[tuple[int, int]]:
+    """
+    ISO year and week of each week from start_date to end_date inclusive.
+    """
+    monday = start_date - dt.timedelta(days=start_date.weekday())
+    weeks = []
+    while monday <= end_date:
+        year, week, _ = monday.isocalendar()
+        weeks.append((year, week))
+        monday += dt.timedelta(days=7)
+    return weeks
@@ -0,0 +1,349 @@
+from collections.abc import Generator, Sequence
+import os
+import pickle
+import re
+
+from trackie.cache import (
+    content_hash,
+    get_cache_path,
+    load_json,
+    store_json,
+)
+from trackie.conf import Params
+from trackie.utils import check_format, FormatError, iter_format_errors
+
+
+class BlockValidator:
+    """
+    Check the format of a tracking file one date block at a time.
+
+    With validation level "fast" the content hashes of valid blocks are
+    remembered in the cache directory, so on the next run only blocks
+    that changed since the last successful validation are checked.
+    Level "full" checks every block and level "off" none.
+    """
+    def __init__(self, params: Params) -> None:
+        self.params = params
+        self.patterns = [
+            params.date_pattern.pattern,
+            params.description_pattern.pattern,
+            params.duration_pattern.pattern,
+        ]
+        self.known: set[str] = set()
+        self.valid: set[str] = set()
+        self.cache_path = None
+        if params.validate != 'off' and params.cache_dir:
+            self.cache_path = get_cache_path(
+                params.cache_dir, 'validation', params.data_path)
+        if params.validate == 'fast' and self.cache_path:
+            cached = load_json(self.cache_path)
+            # a changed spaces setting changes what is valid
+            if cached and cached.get('patterns') == self.patterns:
+                self.known = set(cached['blocks'])
+
+    def check(self, block: Sequence[str], first_line_number: int) -> None:
+        """
+        Raise TrackieFormatException if the block is malformed.
+        """
+        if self.params.validate == 'off':
+            return
+        key = content_hash(''.join(block))
+        if key in self.known:
+            self.valid.add(key)
+            return
+        check_format(
+            block,
+            date_pattern=self.params.date_pattern,
+            description_pattern=self.params.description_pattern,
+            duration_pattern=self.params.duration_pattern,
+            first_line_number=first_line_number,
+        )
+        self.valid.add(key)
+
+    def save(self, complete: bool) -> None:
+        """
+        Remember the valid blocks seen in this run.
+
+        After a complete scan of the file hashes of blocks that no longer
+        exist are dropped, otherwise the known hashes are kept as well.
+        """
+        if self.cache_path is None:
+            return
+        blocks = self.valid if complete else self.valid | self.known
+        if blocks == self.known:
+            return
+        store_json(
+            self.cache_path,
+            {'patterns': self.patterns, 'blocks': sorted(blocks)},
+        )
+
+
+CHECK_STATE_VERSION = 1
+CHUNK_SIZE = 1 << 16
+
+
+def common_prefix_length(a: bytes, b: bytes) -> int:
+    """
+    Length of the common prefix of a and b.
+
+    Compares whole chunks first, then bisects the first differing chunk,
+    so only a few slices are compared in Python.
+    """
+    size = min(len(a), len(b))
+    low = 0
+    while low < size:
+        high = min(low + CHUNK_SIZE, size)
+        if a[low:high] != b[low:high]:
+            break
+        low = high
+    high = min(low + CHUNK_SIZE, size)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def common_suffix_length(a: bytes, b: bytes, limit: int) -> int:
+    """
+    Length of the common suffix of a and b, at most limit bytes.
+    """
+    def suffix(data: bytes, start: int, end: int) -> bytes:
+        return data[len(data) - end:len(data) - start]
+
+    low = 0
+    while low < limit:
+        high = min(low + CHUNK_SIZE, limit)
+        if suffix(a, low, high) != suffix(b, low, high):
+            break
+        low = high
+    high = min(low + CHUNK_SIZE, limit)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if suffix(a, low, middle) == suffix(b, low, middle):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def get_block_range(
+    lines: Sequence[str],
+    first: int,
+    last: int,
+    date_pattern: re.Pattern,
+) -> tuple[int, int]:
+    """
+    Widen the line range first..last to whole date blocks.
+
+    Line numbers start at 1, lines[n - 1] is line n.
+    """
+    first = max(min(first, len(lines)), 1)
+    last = max(min(last, len(lines)), first)
+    while first > 1 and not date_pattern.match(lines[first - 1]):
+        first -= 1
+    while last < len(lines) and not date_pattern.match(lines[last]):
+        last += 1
+    return first, last
+
+
+def get_block_span(
+    content: bytes,
+    start: int,
+    end: int,
+    date_pattern: re.Pattern,
+) -> tuple[int, int]:
+    """
+    Widen the byte range start..end to whole date blocks, including the
+    block before it.
+
+    Works on the raw bytes so only the lines around the range get decoded.
+    """
+    def line_at(offset: int) -> str:
+        line_end = content.find(b'\n', offset)
+        return content[offset:None if line_end < 0 else line_end].decode()
+
+    def next_line_start(offset: int) -> int:
+        line_end = content.find(b'\n', offset)
+        return len(content) if line_end < 0 else line_end + 1
+
+    start = content.rfind(b'\n', 0, start) + 1
+    if start > 0:
+        # a date line added or removed at start also ends or extends the
+        # block before it
+        start = content.rfind(b'\n', 0, start - 1) + 1
+    while start > 0 and not date_pattern.match(line_at(start)):
+        start = content.rfind(b'\n', 0, start - 1) + 1
+    end = next_line_start(max(end - 1, start))
+    while end < len(content) and not date_pattern.match(line_at(end)):
+        end = next_line_start(end)
+    return start, end
+
+
+def find_block_errors(
+    lines: Sequence[str],
+    params: Params,
+    first_line_number: int = 1,
+) -> list[FormatError]:
+    """
+    All format errors of lines made of whole date blocks.
+    """
+    numbered_lines = [
+        (line_number, line)
+        for line_number, line in enumerate(lines, first_line_number)
+        if line.strip()
+    ]
+    errors: list[FormatError] = []
+    for block in get_numbered_blocks(numbered_lines, params.date_pattern):
+        errors.extend(iter_format_errors(
+            block,
+            date_pattern=params.date_pattern,
+            description_pattern=params.description_pattern,
+            duration_pattern=params.duration_pattern,
+        ))
+    return errors
+
+
+def find_format_errors(
+    lines: Sequence[str],
+    params: Params,
+    first: int = 1,
+    last: int | None = None,
+) -> list[FormatError]:
+    """
+    All format errors of the date blocks touching lines first..last.
+    """
+    if not lines:
+        return []
+    first, last = get_block_range(
+        lines, first, last or len(lines), params.date_pattern)
+    return find_block_errors(lines[first - 1:last], params, first)
+
+
+def get_numbered_blocks(
+    numbered_lines: Sequence[tuple[int, str]],
+    date_pattern: re.Pattern,
+) -> Generator[list[tuple[int, str]]]:
+    block: list[tuple[int, str]] = []
+    for numbered_line in numbered_lines:
+        if block and date_pattern.match(numbered_line[1]):
+            yield block
+            block = []
+        block.append(numbered_line)
+    if block:
+        yield block
+
+
+def split_lines(content: bytes) -> list[str]:
+    """
+    Physical lines of a file, line n is at index n - 1.
+    """
+    lines = content.decode().split('\n')
+    if lines[-1] == '':
+        lines.pop()
+    return [line.rstrip('\r') for line in lines]
+
+
+def count_lines(content: bytes) -> int:
+    lines = content.count(b'\n')
+    if content and not content.endswith(b'\n'):
+        lines += 1
+    return lines
+
+
+def check_file(
+    params: Params,
+    first: int | None = None,
+    last: int | None = None,
+) -> list[FormatError]:
+    """
+    Format errors of a tracking file with physical line numbers.
+
+    With first and/or last only the date blocks touching that line range
+    are checked. Otherwise, if the file was checked before, only the
+    region that changed since then is checked and errors outside of it
+    are taken over from the cached state.
+    """
+    content = params.data_path.read_bytes()
+    if first is not None or last is not None:
+        return find_format_errors(
+            split_lines(content), params, first or 1, last)
+
+    patterns = [
+        params.date_pattern.pattern,
+        params.description_pattern.pattern,
+        params.duration_pattern.pattern,
+    ]
+    state_path = None
+    state = None
+    if params.cache_dir:
+        state_path = get_cache_path(
+            params.cache_dir, 'check', params.data_path, '.pickle')
+        try:
+            with state_path.open('rb') as f:
+                state = pickle.load(f)
+        except Exception:
+            # an unreadable or truncated state is a cache miss
+            state = None
+    if (
+        state is None
+        or state.get('version') != CHECK_STATE_VERSION
+        or state['patterns'] != patterns
+    ):
+        errors = find_block_errors(split_lines(content), params)
+    elif state['content'] == content:
+        return [FormatError(*error) for error in state['errors']]
+    else:
+        errors = get_changed_errors(state, content, params)
+
+    if state_path:
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = state_path.with_name(
+            f'{state_path.name}.{os.getpid()}.tmp')
+        with tmp_path.open('wb') as f:
+            pickle.dump({
+                'version': CHECK_STATE_VERSION,
+                'patterns': patterns,
+                'content': content,
+                'errors': [
+                    (error.line_number, error.message) for error in errors],
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(state_path)
+    return errors
+
+
+def get_changed_errors(
+    state: dict,
+    content: bytes,
+    params: Params,
+) -> list[FormatError]:
+    """
+    Check the blocks of the changed region, keep cached errors elsewhere.
+    """
+    old_content = state['content']
+    prefix = common_prefix_length(old_content, content)
+    suffix = common_suffix_length(
+        old_content, content,
+        min(len(old_content), len(content)) - prefix)
+    start, end = get_block_span(
+        content, prefix, len(content) - suffix, params.date_pattern)
+
+    lines = split_lines(content[start:end])
+    first = content.count(b'\n', 0, start) + 1
+    last = first + len(lines) - 1
+    line_delta = count_lines(content) - count_lines(old_content)
+
+    errors = [
+        FormatError(line_number, message)
+        for line_number, message in state['errors']
+        if line_number < first
+    ]
+    errors.extend(find_block_errors(lines, params, first))
+    errors.extend(
+        FormatError(line_number + line_delta, message)
+        for line_number, message in state['errors']
+        if line_number + line_delta > last
+    )
+    return errors
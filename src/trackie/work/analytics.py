@@ -0,0 +1,153 @@
+from array import array
+from collections.abc import Iterable, Sequence
+import datetime as dt
+from itertools import accumulate
+
+from trackie.conf import Params
+from .models import Analysis, RollingStat, Streak
+from .workdays import get_expected_minutes
+
+PERCENTS = (10, 25, 50, 75, 90)
+ROLLING_WEEKS = 4
+
+
+def get_daily_minutes(
+    date_minutes: Iterable[tuple[dt.date, int]],
+    *,
+    first_day: dt.date,
+    last_day: dt.date,
+) -> array:
+    """
+    Minutes worked on each day from first_day to last_day inclusive.
+    """
+    offset = first_day.toordinal()
+    days = last_day.toordinal() - offset + 1
+    minutes = array('I', [0]) * max(days, 0)
+    for date, unit_minutes in date_minutes:
+        index = date.toordinal() - offset
+        if 0 <= index < days:
+            minutes[index] += unit_minutes
+    return minutes
+
+
+def get_percentiles(
+    values: Sequence[int],
+    percents: Sequence[int] = PERCENTS,
+) -> tuple[tuple[int, int], ...]:
+    """
+    Percentiles of values, linearly interpolated between closest ranks.
+    """
+    if not values:
+        return ()
+    ordered = sorted(values)
+    percentiles = []
+    for percent in percents:
+        position = (len(ordered) - 1) * percent / 100
+        lower = int(position)
+        upper = min(lower + 1, len(ordered) - 1)
+        value = ordered[lower] + (
+            ordered[upper] - ordered[lower]) * (position - lower)
+        percentiles.append((percent, round(value)))
+    return tuple(percentiles)
+
+
+def find_longest_streak(
+    minutes: Sequence[int],
+    expected: Sequence[int],
+    first_day: dt.date,
+) -> Streak | None:
+    """
+    Longest run of working days with more work than expected.
+
+    Days off without work, like weekends, neither extend nor break a
+    streak.
+    """
+    longest = None
+    start = None
+    days = overtime = 0
+    last = 0
+    for index, (worked, due) in enumerate(zip(minutes, expected)):
+        if not worked and not due:
+            continue
+        if worked > due:
+            if start is None:
+                start, days, overtime = index, 0, 0
+            days += 1
+            overtime += worked - due
+            last = index
+            if longest is None or (days, overtime) > (
+                    longest.days, longest.overtime):
+                longest = Streak(
+                    first_day + dt.timedelta(days=start),
+                    first_day + dt.timedelta(days=last),
+                    days,
+                    overtime,
+                )
+        else:
+            start = None
+    return longest
+
+
+def get_rolling_stats(
+    minutes: Sequence[int],
+    first_day: dt.date,
+    weeks: int = ROLLING_WEEKS,
+) -> tuple[RollingStat, ...]:
+    """
+    Minutes of each ISO week and their rolling average over `weeks` weeks.
+
+    Window sums come from a prefix sum of the daily minutes, so the cost
+    does not grow with the window. Weeks before first_day count as
+    missing, not as weeks without work.
+    """
+    prefix = [0, *accumulate(minutes)]
+    stats = []
+    index = 0
+    week_starts = []
+    while index < len(minutes):
+        date = first_day + dt.timedelta(days=index)
+        end = min(index + 7 - date.weekday(), len(minutes))
+        week_starts.append(index)
+        window_start = week_starts[max(len(week_starts) - weeks, 0)]
+        window_weeks = min(len(week_starts), weeks)
+        year, week, _ = date.isocalendar()
+        stats.append(RollingStat(
+            year,
+            week,
+            prefix[end] - prefix[index],
+            round((prefix[end] - prefix[window_start]) / window_weeks),
+        ))
+        index = end
+    return tuple(stats)
+
+
+def analyze_work_units(
+    date_minutes: Iterable[tuple[dt.date, int]],
+    params: Params,
+) -> Analysis:
+    """
+    Distribution of daily work, overtime streaks and rolling averages.
+
+    Works on one array of daily minutes for the whole date range, so
+    many years of data cost a few thousand array slots per client.
+    """
+    first_day = params.start_date
+    last_day = params.end_date or dt.date.today()
+    minutes = get_daily_minutes(
+        date_minutes, first_day=first_day, last_day=last_day)
+    expected = get_expected_minutes(
+        params.calendar,
+        first_day=first_day,
+        last_day=last_day,
+        minutes_per_day=params.minutes_per_day,
+        minutes_per_week=params.minutes_per_week,
+    ).minutes
+    working_days = [
+        worked for worked, due in zip(minutes, expected) if worked or due]
+    return Analysis(
+        days=len(working_days),
+        minutes=sum(minutes),
+        percentiles=get_percentiles(working_days),
+        longest_streak=find_longest_streak(minutes, expected, first_day),
+        rolling_stats=get_rolling_stats(minutes, first_day),
+    )
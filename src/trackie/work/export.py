@@ -0,0 +1,242 @@
+from collections.abc import Iterable
+import csv
+import dataclasses
+import datetime as dt
+import hashlib
+import os
+from pathlib import Path
+
+from trackie.cache import (
+    content_hash,
+    get_cache_dir,
+    get_cache_path,
+    load_json,
+    store_json,
+)
+from trackie.conf import Params
+from trackie.output import (
+    build_export_path,
+    get_work_unit_row,
+    get_work_units_header,
+)
+from trackie.repositories.file_edit import (
+    get_positioned_blocks,
+    parse_block,
+    parse_date,
+)
+from trackie.utils import TrackieException
+from trackie.validation import BlockValidator
+from .models import WorkUnit
+
+EXPORT_STATE_VERSION = 1
+HASH_CHUNK_SIZE = 1 << 20
+# hashes of a month's work units are added up modulo this, so the order
+# of a month's entries does not matter
+MONTH_HASH_MODULUS = 1 << 64
+
+
+def hash_prefix(path: Path, size: int) -> str:
+    """
+    Content hash of the first size bytes of the file at path.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with path.open('rb') as f:
+        while size > 0:
+            chunk = f.read(min(HASH_CHUNK_SIZE, size))
+            if not chunk:
+                break
+            digest.update(chunk)
+            size -= len(chunk)
+    return digest.hexdigest()
+
+
+def get_unit_key(work_unit: WorkUnit) -> str:
+    return f'{work_unit.date}\t{work_unit.minutes}\t{work_unit.description}\n'
+
+
+def hash_units(work_units: Iterable[WorkUnit]) -> str:
+    return content_hash(''.join(map(get_unit_key, work_units)))
+
+
+def add_to_months(months: dict[str, list[int]], work_unit: WorkUnit) -> None:
+    """
+    Count the work unit and add its hash to the totals of its month.
+    """
+    month = work_unit.date.strftime('%Y-%m')
+    count, total = months.get(month, (0, 0))
+    unit_hash = int(content_hash(get_unit_key(work_unit)), 16)
+    months[month] = [count + 1, (total + unit_hash) % MONTH_HASH_MODULUS]
+
+
+def get_export_key(params: Params, output_path: Path) -> dict:
+    """
+    Everything the exported rows depend on besides the tracking file and
+    the start date, which is kept from the first export.
+    """
+    return {
+        'version': EXPORT_STATE_VERSION,
+        'output': str(output_path),
+        'patterns': [
+            params.date_pattern.pattern,
+            params.description_pattern.pattern,
+            params.duration_pattern.pattern,
+        ],
+        'hourly_wage': str(params.hourly_wage),
+        'display_hours': params.display_hours,
+        'currency_sign': params.currency_sign,
+        'where': params.where.expression if params.where else None,
+    }
+
+
+def get_exported_months(params: Params, state: dict) -> dict[str, list[int]]:
+    """
+    Counts and hashes per month of the work units in the tracking file up
+    to the position of the last export.
+    """
+    months: dict[str, list[int]] = {}
+    for offset, _, block in get_positioned_blocks(
+            params.data_path, params.date_pattern):
+        if offset > state['offset']:
+            break
+        if not params.date_pattern.match(block[0]):
+            continue
+        work_units = list(parse_block(block, parse_date(block[0]), params))
+        if offset == state['offset']:
+            work_units = work_units[:state['units']]
+        for work_unit in work_units:
+            if work_unit.date >= params.start_date:
+                add_to_months(months, work_unit)
+    return months
+
+
+def check_exported(params: Params, state: dict, output_path: Path) -> None:
+    """
+    Raise TrackieException if entries exported before were edited.
+
+    Only the bytes before the last export position are hashed as long as
+    nothing changed, the file is parsed up to there to tell which months
+    changed otherwise.
+    """
+    path = params.data_path
+    if (
+        path.stat().st_size >= state['offset']
+        and hash_prefix(path, state['offset']) == state['prefix']
+    ):
+        head: list[WorkUnit] = []
+        for _, _, block in get_positioned_blocks(
+                path, params.date_pattern, state['offset'], state['line']):
+            if params.date_pattern.match(block[0]):
+                head = list(parse_block(block, parse_date(block[0]), params))
+            break
+        if (
+            len(head) >= state['units']
+            and hash_units(head[:state['units']]) == state['head']
+        ):
+            return
+
+    months = get_exported_months(params, state)
+    changed = sorted(
+        month for month in months.keys() | state['months'].keys()
+        if months.get(month) != state['months'].get(month)
+    )
+    what = f'Entries of {", ".join(changed)}' if changed else 'Entries'
+    raise TrackieException(
+        f'{what} changed in {path} after they were exported to '
+        f'{output_path}. Remove it to export everything again.'
+    )
+
+
+def export_incremental(params: Params) -> tuple[Path, int]:
+    """
+    Append the work units added to the tracking file since the last
+    incremental export to the client's export file.
+
+    The position in the tracking file reached by the last export is kept
+    in the cache directory, only the entries after it are parsed. Returns
+    the export file and the number of work units appended.
+    """
+    path = params.data_path
+    output_path = build_export_path(params)
+    state_path = get_cache_path(
+        params.cache_dir or get_cache_dir(), 'export', path)
+    key = get_export_key(params, output_path)
+    state = load_json(state_path)
+    exported = output_path.exists() and output_path.stat().st_size > 0
+    if state is None or not exported:
+        if exported:
+            raise TrackieException(
+                f'{output_path} was not written by an incremental export '
+                'or its state is lost. Remove it to export everything again.'
+            )
+        state = {
+            'key': key,
+            'start': params.start_date.isoformat(),
+            'offset': 0,
+            'line': 1,
+            'units': 0,
+            'head': hash_units([]),
+            'prefix': hash_prefix(path, 0),
+            'months': {},
+            'output_size': 0,
+        }
+    elif state.get('key') != key:
+        raise TrackieException(
+            f'Export settings changed since {output_path} was written. '
+            'Remove it to export everything again.'
+        )
+    elif output_path.stat().st_size < state['output_size']:
+        raise TrackieException(
+            f'{output_path} is shorter than after the last export. '
+            'Remove it to export everything again.'
+        )
+    # the start of the first export, not a default moving with the month
+    params = dataclasses.replace(
+        params, start_date=dt.date.fromisoformat(state['start']))
+    if state['output_size']:
+        check_exported(params, state, output_path)
+
+    validator = BlockValidator(params)
+    months = dict(state['months'])
+    offset, line_number = state['offset'], state['line']
+    head: list[WorkUnit] = []
+    appended = 0
+    with output_path.open('a+', newline='') as f:
+        # drop rows of an export that did not get to save its state
+        f.truncate(state['output_size'])
+        writer = csv.writer(
+            f, dialect='excel', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        if not state['output_size']:
+            writer.writerow(get_work_units_header(params))
+        for block_offset, block_line_number, block in get_positioned_blocks(
+                path, params.date_pattern, offset, line_number):
+            validator.check(block, block_line_number)
+            if not params.date_pattern.match(block[0]):
+                # only possible when validation is off
+                continue
+            work_units = list(parse_block(block, parse_date(block[0]), params))
+            new_units = work_units
+            if block_offset == state['offset']:
+                new_units = work_units[state['units']:]
+            for work_unit in new_units:
+                if work_unit.date >= params.start_date:
+                    writer.writerow(get_work_unit_row(work_unit, params))
+                    add_to_months(months, work_unit)
+                    appended += 1
+            offset, line_number, head = (
+                block_offset, block_line_number, work_units)
+        f.flush()
+        os.fsync(f.fileno())
+    validator.save(complete=False)
+
+    store_json(state_path, {
+        'key': key,
+        'start': state['start'],
+        'offset': offset,
+        'line': line_number,
+        'units': len(head),
+        'head': hash_units(head),
+        'prefix': hash_prefix(path, offset),
+        'months': months,
+        'output_size': output_path.stat().st_size,
+    })
+    return output_path, appended
@@ -1,138 +1,747 @@
 from collections import defaultdict
-from collections.abc import Generator, Sequence
+from collections.abc import (
+    Callable,
+    Generator,
+    Iterable,
+    Mapping,
+    Sequence,
+)
 import datetime as dt
+import dataclasses
+from decimal import Decimal
+import heapq
+from pathlib import Path
 from typing import cast
 
 from trackie.ansi_colors import GREEN, RESET
+from trackie.conf import CheckFormat, prefix_pattern, tag_pattern
+from trackie.metrics import no_stage
 from trackie.output import (
+    output_analysis_csv,
+    output_group_stats_csv,
+    output_member_stats_csv,
+    output_period_stats_csv,
     output_stats_csv,
+    output_timeline_csv,
     output_work_units_csv,
+    pretty_print_analysis,
     pretty_print_day_stats,
+    pretty_print_group_stats,
+    pretty_print_member_stats,
+    pretty_print_overlaps,
+    pretty_print_period_stats,
+    pretty_print_timeline,
     pretty_print_week_stats,
     pretty_print_work_units,
+    print_format_errors,
+)
+from trackie.dashboard import (
+    build_dashboard_path,
+    DASHBOARD_VERSION,
+    render_dashboard,
 )
 from trackie.repositories.base import WorkRepository
+from trackie.search import search_work_units
+from trackie.validation import check_file
+from trackie.repositories.file_edit import find_time_range_lines
 from trackie.utils import (
     daterange,
-    get_week_range,
+    FormatError,
+    get_iso_weeks,
+)
+from .analytics import analyze_work_units
+from .export import export_incremental
+from .models import (
+    DayStat,
+    GroupStat,
+    MemberStat,
+    Overlap,
+    PeriodStat,
+    MINUTES_FIELDS,
+    WeekStat,
+    WorkUnit,
+)
+from .workdays import (
+    ExpectedMinutes,
+    get_expected_minutes,
+    get_weekday_minutes,
+)
+from .team import (
+    TEAM_CLIENT,
+    get_summaries,
+    get_summary_minutes,
+    reduce_summaries,
+)
+from .timeline import ALL_CLIENTS, get_timeline, get_timeline_minutes
+
+WEEKDAYS = (
+    'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday',
+    'Sunday',
 )
-from .models import WorkUnit, WeekStat, DayStat
+NO_TAG = '(untagged)'
+NO_PREFIX = '(no prefix)'
+
+
+def get_date_minutes(
+    work_units: Iterable[WorkUnit],
+) -> Generator[tuple[dt.date, int]]:
+    """
+    The (date, minutes) pairs the stats functions work on.
+    """
+    for work_unit in work_units:
+        yield work_unit.date, work_unit.minutes
 
 
 def get_daily_stats(
-    work_units: Generator[WorkUnit],
+    date_minutes: Iterable[tuple[dt.date, int]],
     *,
     start_date: dt.date,
     minutes_per_day: int,
     end_date: dt.date | None = None,
     excluded_weekdays: Sequence[int] | None = None,
+    expected_minutes: ExpectedMinutes | None = None,
 ) -> Sequence[DayStat]:
+    """
+    Balance of work per day, end_date is exclusive.
 
+    date_minutes are (date, minutes) pairs of work units.
+
+    With expected_minutes each day is expected to have its own minutes
+    from the compiled calendar instead of minutes_per_day.
+    """
     if not end_date:
         end_date = dt.date.today()
 
     # aggregate work on days
     work_per_day: dict[dt.date, int] = defaultdict(int)
-    for work_unit in work_units:
-        work_per_day[work_unit.date] += work_unit.minutes
+    for date, minutes in date_minutes:
+        work_per_day[date] += minutes
 
     day_stats = []
     carryover = 0
     for date in daterange(
             start_date, end_date, excluded_weekdays=excluded_weekdays):
         minutes = work_per_day.get(date, 0)
+        expected = minutes_per_day
+        if expected_minutes:
+            expected = expected_minutes.for_day(date)
         if date == start_date:
-            diff = carryover = minutes - minutes_per_day
-            day_stat = DayStat(date, minutes, diff, diff)
+            diff = carryover = minutes - expected
+            day_stat = DayStat(date, minutes, diff, diff, expected)
             day_stats.append(day_stat)
         else:
-            carryover = minutes + carryover - minutes_per_day
-            diff = minutes - minutes_per_day
-            day_stat = DayStat(date, minutes, diff, carryover)
+            carryover = minutes + carryover - expected
+            diff = minutes - expected
+            day_stat = DayStat(date, minutes, diff, carryover, expected)
             day_stats.append(day_stat)
     return day_stats
 
 
 def get_weekly_stats(
-    work_units: Generator[WorkUnit],
+    date_minutes: Iterable[tuple[dt.date, int]],
     *,
     start_date: dt.date,
     minutes_per_week: int,
     end_date: dt.date | None = None,
+    expected_minutes: ExpectedMinutes | None = None,
 ) -> Sequence[WeekStat]:
+    """
+    Balance of work per ISO week, end_date is inclusive.
+
+    With expected_minutes each week is expected to have the sum of its
+    days' minutes from the compiled calendar instead of minutes_per_week.
+    """
 
     if not end_date:
         end_date = dt.date.today()
 
-    weeks_to_report = get_week_range(start_date, end_date)
-
-    # aggregate work over weeks
+    # aggregate work over ISO weeks, the days around New Year may belong
+    # to a week of the previous or next year
     work_per_week: dict[tuple[int, int], int] = defaultdict(int)
-    for work_unit in work_units:
-        day = work_unit.date
-        week = day.isocalendar()[1]
-        work_per_week[(work_unit.date.year, week)] += work_unit.minutes
+    for day, minutes in date_minutes:
+        year, week, _ = day.isocalendar()
+        work_per_week[(year, week)] += minutes
 
-    year = start_date.year
-    weeks = [year_and_week[1] for year_and_week in work_per_week.keys()]
-    for week in weeks_to_report:
-        if week not in weeks:
-            work_per_week[(year, week)] = 0
+    # carryover has to add up the weeks in order, whatever the order of
+    # the work units
+    weeks = sorted(
+        set(get_iso_weeks(start_date, end_date)) | work_per_week.keys())
 
     week_stats = []
     carryover = 0
-    for index, ((year, week), minutes) in enumerate(work_per_week.items()):
+    for index, (year, week) in enumerate(weeks):
+        minutes = work_per_week.get((year, week), 0)
+        expected = minutes_per_week
+        if expected_minutes:
+            monday = dt.date.fromisocalendar(year, week, 1)
+            expected = expected_minutes.for_days(
+                monday, monday + dt.timedelta(days=6))
         if index == 0:
-            diff = carryover = minutes - minutes_per_week
-            week_stat = WeekStat(year, week, minutes, diff, diff)
+            diff = carryover = minutes - expected
+            week_stat = WeekStat(year, week, minutes, diff, diff, expected)
             week_stats.append(week_stat)
         else:
-            carryover = minutes + carryover - minutes_per_week
-            diff = minutes - minutes_per_week
-            week_stat = WeekStat(year, week, minutes, diff, carryover)
+            carryover = minutes + carryover - expected
+            diff = minutes - expected
+            week_stat = WeekStat(
+                year, week, minutes, diff, carryover, expected)
             week_stats.append(week_stat)
-    return sorted(week_stats, key=lambda week_stat: week_stat.week)
+    return week_stats
+
+
+def get_tags(work_unit: WorkUnit) -> list[str]:
+    tags = tag_pattern.findall(work_unit.description)
+    return [tag.lower() for tag in dict.fromkeys(tags)] or [NO_TAG]
+
+
+def get_prefix(work_unit: WorkUnit) -> list[str]:
+    match = prefix_pattern.match(work_unit.description)
+    return [match.group(1).upper()] if match else [NO_PREFIX]
+
+
+def get_weekday(work_unit: WorkUnit) -> list[str]:
+    return [WEEKDAYS[work_unit.date.weekday()]]
+
+
+dimension_extractors: dict[str, Callable[[WorkUnit], list[str]]] = {
+    'tag': get_tags,
+    'prefix': get_prefix,
+    'weekday': get_weekday,
+}
+
+
+def get_group_stats(
+    work_units: Iterable[WorkUnit],
+    *,
+    dimensions: Sequence[str],
+    hourly_wage: Decimal | None = None,
+) -> dict[str, Sequence[GroupStat]]:
+    """
+    Aggregate minutes and cost per group for several dimensions at once.
+
+    The work units are consumed once, each adding its minutes to every
+    one of its keys per dimension. A unit with several tags counts for
+    each of them.
+    """
+    extractors = [
+        (dimension, dimension_extractors[dimension])
+        for dimension in dimensions
+    ]
+    # count and minutes per key and dimension
+    totals: dict[str, dict[str, list[int]]] = {
+        dimension: defaultdict(lambda: [0, 0]) for dimension in dimensions
+    }
+    for work_unit in work_units:
+        for dimension, extract in extractors:
+            for key in extract(work_unit):
+                total = totals[dimension][key]
+                total[0] += 1
+                total[1] += work_unit.minutes
+
+    group_stats: dict[str, Sequence[GroupStat]] = {}
+    for dimension in dimensions:
+        stats = []
+        for key, (count, minutes) in totals[dimension].items():
+            cost = None
+            if hourly_wage:
+                cost = round(Decimal(minutes / 60) * hourly_wage, 2)
+            stats.append(GroupStat(dimension, key, count, minutes, cost))
+        if dimension == 'weekday':
+            stats.sort(key=lambda stat: WEEKDAYS.index(stat.key))
+        else:
+            stats.sort(key=lambda stat: (-stat.minutes, stat.key))
+        group_stats[dimension] = stats
+    return group_stats
+
+
+def find_overlaps(work_units: Iterable[WorkUnit]) -> Sequence[Overlap]:
+    """
+    Find pairs of work units whose time ranges overlap.
+
+    Sort and sweep: units are ordered by start, a heap keeps the units
+    still running ordered by end. Each unit overlaps exactly the units
+    left in the heap when it starts, so this takes O(n log n) plus the
+    number of overlaps. Units without start and end are ignored.
+    """
+    intervals = sorted(
+        (unit for unit in work_units if unit.start and unit.end),
+        key=lambda unit: (unit.start, unit.end),
+    )
+    overlaps = []
+    running: list[tuple[dt.datetime, int, WorkUnit]] = []
+    for index, work_unit in enumerate(intervals):
+        start = cast(dt.datetime, work_unit.start)
+        end = cast(dt.datetime, work_unit.end)
+        while running and running[0][0] <= start:
+            heapq.heappop(running)
+        for other_end, _, other in sorted(running):
+            minutes = (min(end, other_end) - start).total_seconds() // 60
+            overlaps.append(Overlap(other, work_unit, int(minutes)))
+        heapq.heappush(running, (end, index, work_unit))
+    return overlaps
+
+
+def compile_expected_minutes(params) -> ExpectedMinutes | None:
+    """
+    Expected minutes per day for the report's full weeks, if the config
+    has a calendar.
+    """
+    if params.calendar is None:
+        return None
+    end_date = params.end_date or dt.date.today()
+    return get_expected_minutes(
+        params.calendar,
+        first_day=params.start_date - dt.timedelta(
+            days=params.start_date.weekday()),
+        last_day=end_date + dt.timedelta(days=6 - end_date.weekday()),
+        minutes_per_day=params.minutes_per_day,
+        minutes_per_week=params.minutes_per_week,
+        interval=params.interval,
+    )
+
+
+def get_interval_stats(
+    date_minutes: Iterable[tuple[dt.date, int]],
+    params,
+    expected_minutes: ExpectedMinutes | None = None,
+) -> Sequence[DayStat] | Sequence[WeekStat]:
+    """
+    Aggregate (date, minutes) pairs per day or week as set in params.
+
+    expected_minutes defaults to the compiled calendar of params.
+    """
+    if expected_minutes is None:
+        expected_minutes = compile_expected_minutes(params)
+
+    if params.interval == 'week':
+        return get_weekly_stats(
+            date_minutes,
+            start_date=params.start_date,
+            minutes_per_week=cast(int, params.minutes_per_week),
+            end_date=params.end_date,
+            expected_minutes=expected_minutes,
+        )
+    end_date = None
+    if params.end_date:
+        # end_date of get_daily_stats is exclusive
+        end_date = params.end_date + dt.timedelta(days=1)
+    excluded_weekdays = [
+        weekday for weekday, minutes in enumerate(get_weekday_minutes(
+            params.calendar, minutes_per_day=params.minutes_per_day))
+        if not minutes
+    ]
+    return get_daily_stats(
+        date_minutes,
+        start_date=params.start_date,
+        minutes_per_day=cast(int, params.minutes_per_day),
+        end_date=end_date,
+        excluded_weekdays=excluded_weekdays,
+        expected_minutes=expected_minutes,
+    )
 
 
 def handle_command(params, repository: WorkRepository):
 
-    work_units = repository.get_work_units(params)
+    if params.mode == 'aggregate' and not params.group_by:
+        work_units = repository.get_fields(params, MINUTES_FIELDS)
+    else:
+        work_units = repository.get_work_units(params)
 
-    if params.mode == 'aggregate':
-        if params.interval == 'week':
-            params.minutes_per_week = cast(int, params.minutes_per_week)
-            weekly_stats = get_weekly_stats(
-                work_units,
-                start_date=params.start_date,
-                minutes_per_week=params.minutes_per_week,
-                #  end_date=end_date,
+    if params.metrics:
+        # read everything first so the later stages are timed on their own
+        work_units = list(work_units)
+
+    handle_report(params, work_units)
+
+
+def handle_incremental_export(params):
+    output_path, count = export_incremental(params)
+    print(GREEN + f'Appended {count} work units to {output_path}' + RESET)
+
+
+def handle_report(
+    params,
+    work_units: Iterable[WorkUnit] | Iterable[tuple[dt.date, int]],
+    kind: str | None = None,
+):
+    """
+    Aggregate and output work units as set in params.
+
+    In aggregate mode without group_by only (date, minutes) pairs are
+    needed (see MINUTES_FIELDS), otherwise work_units are WorkUnits.
+    kind names the CSV file, it defaults to the mode.
+    """
+    stage = params.metrics.stage if params.metrics else no_stage
+
+    if params.group_by:
+        with stage('aggregate'):
+            group_stats = get_group_stats(
+                cast(Iterable[WorkUnit], work_units),
+                dimensions=params.group_by,
+                hourly_wage=params.hourly_wage,
             )
+        with stage('render'):
             if params.csv:
-                output_path = output_stats_csv(weekly_stats, params)
+                output_path = output_group_stats_csv(
+                    group_stats, params, kind or 'group')
                 print(GREEN + f'Created CSV file at {output_path}' + RESET)
-                return
             else:
-                pretty_print_week_stats(weekly_stats, params)
-                return
+                pretty_print_group_stats(group_stats, params)
+        return
 
-        elif params.interval == 'day':
-            params.minutes_per_day = cast(int, params.minutes_per_day)
-            daily_stats = get_daily_stats(
-                work_units,
-                start_date=params.start_date,
-                minutes_per_day=params.minutes_per_day,
-                #  end_date=end_date,
-                excluded_weekdays=[5, 6],
-            )
+    if params.mode == 'aggregate':
+        with stage('aggregate'):
+            stats = get_interval_stats(
+                cast(Iterable[tuple[dt.date, int]], work_units), params)
+        with stage('render'):
             if params.csv:
-                output_path = output_stats_csv(daily_stats, params)
+                output_path = output_stats_csv(stats, params, kind)
                 print(GREEN + f'Created CSV file at {output_path}' + RESET)
-            else:
-                pretty_print_day_stats(daily_stats, params)
+            elif params.interval == 'week':
+                pretty_print_week_stats(
+                    cast(Sequence[WeekStat], stats), params)
+            elif params.interval == 'day':
+                pretty_print_day_stats(cast(Sequence[DayStat], stats), params)
 
     elif params.mode == 'list':
+        work_units = cast(Iterable[WorkUnit], work_units)
+        with stage('render'):
+            if params.csv:
+                output_path = output_work_units_csv(work_units, params, kind)
+                print(GREEN + f'Created CSV file at {output_path}' + RESET)
+            else:
+                pretty_print_work_units(work_units, params)
+
+
+def get_period_stat(
+    date_minutes: Iterable[tuple[dt.date, int]],
+    params,
+    first_day: dt.date,
+    last_day: dt.date,
+) -> PeriodStat:
+    """
+    Totals of the work units from first_day to last_day inclusive.
+    """
+    minutes = units = 0
+    days = set()
+    for date, unit_minutes in date_minutes:
+        if first_day <= date <= last_day:
+            minutes += unit_minutes
+            units += 1
+            days.add(date)
+    expected = get_expected_minutes(
+        params.calendar,
+        first_day=first_day,
+        last_day=last_day,
+        minutes_per_day=params.minutes_per_day,
+        minutes_per_week=params.minutes_per_week,
+    ).for_days(first_day, last_day)
+    return PeriodStat(first_day, last_day, minutes, units, len(days), expected)
+
+
+def handle_batch(
+    params,
+    repository: WorkRepository,
+    reports: Sequence[tuple[str, object]],
+    comparisons: Sequence[tuple[tuple[dt.date, dt.date], ...]] = (),
+):
+    """
+    Read the data once and output several reports and period comparisons.
+
+    reports are (name, params) pairs, the name becomes part of CSV file
+    names. params cover the date ranges of all reports and comparisons.
+    """
+    if any(
+        report_params.mode == 'list' or report_params.group_by
+        for _, report_params in reports
+    ):
+        work_units = list(repository.get_work_units(params))
+        date_minutes = list(get_date_minutes(work_units))
+    else:
+        work_units = []
+        date_minutes = list(repository.get_fields(params, MINUTES_FIELDS))
+
+    for name, report_params in reports:
+        start_date = report_params.start_date
+        end_date = report_params.end_date or dt.date.today()
+        if report_params.mode == 'list' or report_params.group_by:
+            handle_report(
+                report_params,
+                [
+                    work_unit for work_unit in work_units
+                    if start_date <= work_unit.date <= end_date
+                ],
+                name,
+            )
+        else:
+            handle_report(
+                report_params,
+                [
+                    (date, minutes) for date, minutes in date_minutes
+                    if start_date <= date <= end_date
+                ],
+                name,
+            )
+
+    for index, periods in enumerate(comparisons, 1):
+        period_stats = [
+            get_period_stat(date_minutes, params, first_day, last_day)
+            for first_day, last_day in periods
+        ]
         if params.csv:
-            output_path = output_work_units_csv(work_units, params)
+            output_path = output_period_stats_csv(
+                period_stats,
+                params,
+                f'comparison-{index}' if len(comparisons) > 1
+                else 'comparison',
+            )
             print(GREEN + f'Created CSV file at {output_path}' + RESET)
         else:
-            pretty_print_work_units(work_units, params)
+            pretty_print_period_stats(period_stats, params)
+
+
+def handle_search(params, query: str):
+
+    work_units = search_work_units(params, query)
+
+    if params.csv:
+        output_path = output_work_units_csv(work_units, params)
+        print(GREEN + f'Created CSV file at {output_path}' + RESET)
+    else:
+        pretty_print_work_units(work_units, params)
+
+
+def handle_analyze(params, repository: WorkRepository):
+
+    analysis = analyze_work_units(
+        repository.get_fields(params, MINUTES_FIELDS), params)
+
+    if params.csv:
+        for output_path in output_analysis_csv(analysis, params):
+            print(GREEN + f'Created CSV file at {output_path}' + RESET)
+    else:
+        pretty_print_analysis(analysis, params)
+
+
+def get_dashboard_data(
+    date_minutes_by_client: Mapping[str, Sequence[tuple[dt.date, int]]],
+    params,
+) -> dict:
+    """
+    Compact aggregates for the dashboard, no single work units.
+
+    Days with work are stored as arrays of date ordinals and minutes per
+    client, the weekly balance over all clients together.
+    """
+    end_date = params.end_date or dt.date.today()
+    clients = {}
+    for client, date_minutes in date_minutes_by_client.items():
+        day_stats = [
+            day_stat
+            for day_stat in get_daily_stats(
+                date_minutes,
+                start_date=params.start_date,
+                minutes_per_day=params.minutes_per_day or 0,
+                # end_date of get_daily_stats is exclusive
+                end_date=end_date + dt.timedelta(days=1),
+            )
+            if day_stat.minutes
+        ]
+        clients[client] = {
+            'days': [day_stat.date.toordinal() for day_stat in day_stats],
+            'minutes': [day_stat.minutes for day_stat in day_stats],
+            'total': sum(day_stat.minutes for day_stat in day_stats),
+        }
+
+    week_stats = get_weekly_stats(
+        [
+            pair
+            for date_minutes in date_minutes_by_client.values()
+            for pair in date_minutes
+        ],
+        start_date=params.start_date,
+        minutes_per_week=params.minutes_per_week or 0,
+        end_date=end_date,
+        expected_minutes=compile_expected_minutes(params),
+    )
+    return {
+        'version': DASHBOARD_VERSION,
+        'start': params.start_date.toordinal(),
+        'end': end_date.toordinal(),
+        'clients': clients,
+        'weeks': {
+            'labels': [
+                f'{week_stat.year}-W{week_stat.week:02d}'
+                for week_stat in week_stats
+            ],
+            'diff': [week_stat.diff for week_stat in week_stats],
+            'carryover': [week_stat.carryover for week_stat in week_stats],
+        },
+    }
+
+
+def handle_dashboard(
+    clients: Sequence[tuple],
+    *,
+    output_path: Path | None = None,
+):
+    """
+    Write the HTML dashboard for (params, repository) pairs of clients.
+    """
+    date_minutes_by_client = {
+        params.client: list(repository.get_fields(params, MINUTES_FIELDS))
+        for params, repository in clients
+    }
+    params = clients[0][0]
+    data = get_dashboard_data(date_minutes_by_client, params)
+    output_path = output_path or build_dashboard_path()
+    output_path.write_text(render_dashboard(
+        data,
+        title=f'Trackie: {", ".join(date_minutes_by_client)}',
+    ))
+    print(GREEN + f'Created dashboard at {output_path}' + RESET)
+
+
+def handle_timeline(clients: Sequence[tuple]):
+    """
+    List or aggregate the work of (params, repository) pairs of clients
+    as one timeline.
+
+    Aggregates are balanced against the configured minutes_per_day or
+    minutes_per_week once, not per client.
+    """
+    params = dataclasses.replace(
+        clients[0][0], client=ALL_CLIENTS, hourly_wage=None)
+    if params.mode == 'aggregate':
+        handle_report(params, get_timeline_minutes(clients))
+        return
+
+    hourly_wages = {
+        client_params.client: client_params.hourly_wage
+        for client_params, _ in clients
+    }
+    work_units = get_timeline(clients)
+    if params.csv:
+        output_path = output_timeline_csv(work_units, params, hourly_wages)
+        print(GREEN + f'Created CSV file at {output_path}' + RESET)
+    else:
+        pretty_print_timeline(work_units, params, hourly_wages)
+
+
+def handle_check(
+    params_list: Sequence,
+    repository: WorkRepository,
+    *,
+    overlaps: bool,
+    line_range: tuple[int | None, int | None] = (None, None),
+    output_format: CheckFormat = 'text',
+) -> bool:
+    """
+    Check the format of the given clients' files, return False on problems.
+
+    All format errors are reported, not only the first one. Overlaps are
+    only searched when the files are well-formed, JSON and quickfix
+    output list them along with format errors.
+    """
+    errors = {
+        params.data_path: check_file(params, *line_range)
+        for params in params_list
+    }
+    found: Sequence[Overlap] = []
+    if overlaps and not any(errors.values()):
+        work_units = [
+            work_unit
+            for params in params_list
+            for work_unit in repository.get_work_units(
+                dataclasses.replace(params, validate='off'))
+        ]
+        found = find_overlaps(work_units)
+        if output_format != 'text':
+            # machine-readable output lists overlaps like format errors
+            for path, overlap_errors in get_overlap_errors(
+                    found, params_list).items():
+                errors[path] = [*errors.get(path, []), *overlap_errors]
+    print_format_errors(errors, output_format)
+    if overlaps and output_format == 'text' and not any(errors.values()):
+        pretty_print_overlaps(found)
+    return not any(errors.values()) and not found
+
+
+def get_overlap_errors(
+    overlaps: Sequence[Overlap],
+    params_list: Sequence,
+) -> dict[Path, list[FormatError]]:
+    """
+    The overlaps as errors on the duration line of the later work unit.
+    """
+    time_range_lines = {
+        params.client: find_time_range_lines(params)
+        for params in params_list
+    }
+    errors: dict[Path, list[FormatError]] = defaultdict(list)
+    for overlap in overlaps:
+        first, second = overlap.first, overlap.second
+        path, line_number = time_range_lines[second.client][
+            (cast(dt.datetime, second.start), cast(dt.datetime, second.end))]
+        errors[path].append(FormatError(
+            line_number,
+            f'{second.start:%H:%M}-{second.end:%H:%M} overlaps '
+            f'{first.start:%H:%M}-{first.end:%H:%M} of {first.client} '
+            f'by {overlap.minutes} minutes',
+        ))
+    return errors
+
+
+def handle_team(params_list: Sequence, *, jobs: int | None = None):
+
+    summaries = get_summaries(params_list, jobs=jobs)
+    params = params_list[0]
+    end_date = params.end_date or dt.date.today()
+
+    expected_minutes = compile_expected_minutes(params)
+    member_stats = []
+    for member_params in params_list:
+        summary = summaries[member_params.client]
+        stats = get_interval_stats(
+            get_summary_minutes(
+                summary, start_date=params.start_date, end_date=end_date),
+            params,
+            expected_minutes,
+        )
+        minutes = sum(
+            minutes for _, minutes in get_summary_minutes(
+                summary, start_date=params.start_date, end_date=end_date)
+        )
+        carryover = stats[-1].carryover if stats else 0
+        member_stats.append(
+            MemberStat(member_params.client, minutes, carryover))
+
+    # the team is expected to work as much as all members together
+    members = len(params_list)
+    team_params = dataclasses.replace(
+        params,
+        client=TEAM_CLIENT,
+        minutes_per_day=(params.minutes_per_day or 0) * members,
+        minutes_per_week=(params.minutes_per_week or 0) * members,
+    )
+    team_stats = get_interval_stats(
+        get_summary_minutes(
+            reduce_summaries(summaries),
+            start_date=params.start_date, end_date=end_date),
+        team_params,
+        expected_minutes.scaled(members) if expected_minutes else None,
+    )
+
+    if params.csv:
+        output_path = output_member_stats_csv(member_stats, team_params)
+        print(GREEN + f'Created CSV file at {output_path}' + RESET)
+        output_path = output_stats_csv(team_stats, team_params)
+        print(GREEN + f'Created CSV file at {output_path}' + RESET)
+    else:
+        pretty_print_member_stats(member_stats, team_params)
+        if params.interval == 'week':
+            pretty_print_week_stats(
+                cast(Sequence[WeekStat], team_stats), team_params)
+        else:
+            pretty_print_day_stats(
+                cast(Sequence[DayStat], team_stats), team_params)
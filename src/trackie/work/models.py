@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 import datetime as dt
+from decimal import Decimal
 
 
 @dataclass(frozen=True)
@@ -13,12 +14,19 @@ class WorkUnit:
     end: dt.datetime | None = None
 
 
+# fields a repository can project work units to, in this order
+WORK_UNIT_FIELDS = ('date', 'client', 'minutes', 'description', 'start', 'end')
+# all that is needed to aggregate work per day or week
+MINUTES_FIELDS = ('date', 'minutes')
+
+
 @dataclass(frozen=True)
 class DayStat:
     date: dt.date
     minutes: int
     diff: int
     carryover: int
+    expected: int | None = None
 
 
 @dataclass(frozen=True)
@@ -28,3 +36,65 @@ class WeekStat:
     minutes: int
     diff: int
     carryover: int
+    expected: int | None = None
+
+
+@dataclass(frozen=True)
+class GroupStat:
+    dimension: str
+    key: str
+    units: int
+    minutes: int
+    cost: Decimal | None = None
+
+
+@dataclass(frozen=True)
+class Overlap:
+    first: WorkUnit
+    second: WorkUnit
+    minutes: int
+
+
+@dataclass(frozen=True)
+class MemberStat:
+    member: str
+    minutes: int
+    carryover: int
+
+
+@dataclass(frozen=True)
+class Streak:
+    first_day: dt.date
+    last_day: dt.date
+    days: int
+    overtime: int
+
+
+@dataclass(frozen=True)
+class RollingStat:
+    year: int
+    week: int
+    minutes: int
+    # average minutes per week over this and the preceding weeks
+    average: int
+
+
+@dataclass(frozen=True)
+class Analysis:
+    # days with work or work expected
+    days: int
+    minutes: int
+    # (percent, minutes per day)
+    percentiles: tuple[tuple[int, int], ...]
+    longest_streak: Streak | None
+    rolling_stats: tuple[RollingStat, ...]
+
+
+@dataclass(frozen=True)
+class PeriodStat:
+    first_day: dt.date
+    last_day: dt.date
+    minutes: int
+    units: int
+    days_worked: int
+    expected: int
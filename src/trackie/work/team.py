@@ -0,0 +1,149 @@
+from collections import Counter, defaultdict
+from collections.abc import Generator, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+import dataclasses
+import datetime as dt
+import glob
+from pathlib import Path
+
+from trackie.cache import get_cache_path, load_json, store_json
+from trackie.conf import Params
+from trackie.repositories.file_edit import FileEditRepository
+from trackie.utils import TrackieFormatException
+from .models import MINUTES_FIELDS
+
+TEAM_CLIENT = 'team'
+
+
+def get_team_files(location: str) -> Sequence[Path]:
+    """
+    Tracking files of a team: all .otl files of a directory or a glob.
+    """
+    path = Path(location).expanduser()
+    if path.is_dir():
+        return sorted(path.glob('*.otl'))
+    return sorted(
+        Path(name) for name in glob.glob(str(path)) if Path(name).is_file())
+
+
+def get_member_names(data_paths: Sequence[Path]) -> list[str]:
+    """
+    A unique name per tracking file of a team: the file stem, preceded by
+    as many parent directories as it takes to tell files with the same
+    stem apart, e.g. "alice/work" and "bob/work".
+    """
+    parts = [data_path.with_suffix('').parts for data_path in data_paths]
+    depths = [1] * len(parts)
+    while True:
+        names = [
+            '/'.join(path_parts[-depth:])
+            for path_parts, depth in zip(parts, depths)
+        ]
+        counts = Counter(names)
+        colliding = [
+            index for index, name in enumerate(names)
+            if counts[name] > 1 and depths[index] < len(parts[index])
+        ]
+        if not colliding:
+            return names
+        for index in colliding:
+            depths[index] += 1
+
+
+def summarize_file(params: Params) -> dict[int, int]:
+    """
+    Minutes worked per day (as ordinal) over the whole tracking file.
+
+    Runs in worker processes.
+    """
+    params = dataclasses.replace(
+        params, start_date=dt.date.min, end_date=dt.date.max)
+    minutes_per_day: dict[int, int] = defaultdict(int)
+    for date, minutes in FileEditRepository.get_fields(
+            params, MINUTES_FIELDS):
+        minutes_per_day[date.toordinal()] += minutes
+    return dict(minutes_per_day)
+
+
+def get_summary_cache_key(params: Params) -> dict:
+    stat = params.data_path.stat()
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'patterns': [
+            params.date_pattern.pattern,
+            params.description_pattern.pattern,
+            params.duration_pattern.pattern,
+        ],
+    }
+
+
+def get_summaries(
+    params_list: Sequence[Params],
+    *,
+    jobs: int | None = None,
+) -> dict[str, dict[int, int]]:
+    """
+    Map the parsing of all tracking files over a bounded process pool.
+
+    Returns the minutes per day of each file, keyed by client. Summaries
+    of files unchanged since the last run are taken from the cache.
+    """
+    summaries: dict[str, dict[int, int]] = {}
+    pending = []
+    for params in params_list:
+        key = get_summary_cache_key(params)
+        if params.cache_dir:
+            cached = load_json(get_cache_path(
+                params.cache_dir, 'team', params.data_path))
+            if cached and cached['key'] == key:
+                summaries[params.client] = {
+                    ordinal: minutes for ordinal, minutes in cached['days']}
+                continue
+        pending.append((params, key))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                (params, key, executor.submit(summarize_file, params))
+                for params, key in pending
+            ]
+            for params, key, future in futures:
+                try:
+                    summary = future.result()
+                except TrackieFormatException as e:
+                    raise TrackieFormatException(
+                        f'{params.data_path}: {e.args[0]}') from e
+                summaries[params.client] = summary
+                if params.cache_dir:
+                    store_json(
+                        get_cache_path(
+                            params.cache_dir, 'team', params.data_path),
+                        {'key': key, 'days': sorted(summary.items())},
+                    )
+    return summaries
+
+
+def reduce_summaries(
+    summaries: Mapping[str, Mapping[int, int]],
+) -> dict[int, int]:
+    team_minutes: dict[int, int] = defaultdict(int)
+    for summary in summaries.values():
+        for ordinal, minutes in summary.items():
+            team_minutes[ordinal] += minutes
+    return team_minutes
+
+
+def get_summary_minutes(
+    summary: Mapping[int, int],
+    *,
+    start_date: dt.date,
+    end_date: dt.date,
+) -> Generator[tuple[dt.date, int]]:
+    """
+    (date, minutes) per day within the date range, for the stats functions.
+    """
+    start, end = start_date.toordinal(), end_date.toordinal()
+    for ordinal in sorted(summary):
+        if start <= ordinal <= end:
+            yield dt.date.fromordinal(ordinal), summary[ordinal]
@@ -0,0 +1,86 @@
+from collections.abc import Callable, Iterable, Iterator, Sequence
+import datetime as dt
+import heapq
+from operator import attrgetter, itemgetter
+from typing import TypeVar
+
+from trackie.conf import Params
+from trackie.repositories.base import WorkRepository
+from .models import MINUTES_FIELDS, WorkUnit
+
+ALL_CLIENTS = 'all'
+
+T = TypeVar('T')
+
+
+def is_date_ordered(params: Params) -> bool:
+    """
+    Whether the client's entries are read in date order.
+
+    Journals are sorted by date, tracking files only if they are
+    configured to be chronological.
+    """
+    return params.chronological or params.repository == 'journal'
+
+
+def by_date(
+    items: Iterable[T],
+    params: Params,
+    get_date: Callable[[T], dt.date],
+) -> Iterable[T]:
+    """
+    The items of one client in date order, entries of a date keep theirs.
+    """
+    if is_date_ordered(params):
+        return items
+    # only the entries of this client within the date range are held
+    return sorted(items, key=get_date)
+
+
+def merge_clients(
+    streams: Sequence[Iterable[T]],
+    get_date: Callable[[T], dt.date],
+) -> Iterator[T]:
+    """
+    Lazily merge date ordered streams of several clients into one.
+
+    Only the next item of each stream is held, items of the same date
+    come in the order of the streams.
+    """
+    return heapq.merge(*streams, key=get_date)
+
+
+def get_timeline(
+    clients: Sequence[tuple[Params, WorkRepository]],
+) -> Iterator[WorkUnit]:
+    """
+    Work units of all clients by date, each tagged with its client.
+    """
+    get_date = attrgetter('date')
+    return merge_clients(
+        [
+            by_date(repository.get_work_units(params), params, get_date)
+            for params, repository in clients
+        ],
+        get_date,
+    )
+
+
+def get_timeline_minutes(
+    clients: Sequence[tuple[Params, WorkRepository]],
+) -> Iterator[tuple[dt.date, int]]:
+    """
+    (date, minutes) pairs of all clients by date.
+    """
+    get_date = itemgetter(0)
+    return merge_clients(
+        [
+            by_date(
+                repository.get_fields(params, MINUTES_FIELDS),
+                params,
+                get_date,
+            )
+            for params, repository in clients
+        ],
+        get_date,
+    )
@@ -0,0 +1,167 @@
+from array import array
+from dataclasses import dataclass, field
+import datetime as dt
+from typing import Any, Literal
+
+from trackie.utils import TrackieFormatException
+
+WORKDAYS = 5
+
+
+@dataclass(frozen=True)
+class WorkCalendar:
+    """
+    Days off and part-time quotas from the config's calendar table.
+    """
+    holidays: frozenset[dt.date] = frozenset()
+    vacations: tuple[tuple[dt.date, dt.date], ...] = ()
+    # expected minutes per weekday, Monday first
+    weekday_minutes: tuple[int, ...] | None = None
+
+
+@dataclass(frozen=True)
+class ExpectedMinutes:
+    """
+    Expected minutes of work for each day of a date range.
+
+    Compiled once from a WorkCalendar, looked up by day index.
+    """
+    first_day: dt.date
+    minutes: array = field(default_factory=lambda: array('I'))
+
+    def for_day(self, date: dt.date) -> int:
+        return self.minutes[date.toordinal() - self.first_day.toordinal()]
+
+    def for_days(self, first_day: dt.date, last_day: dt.date) -> int:
+        """
+        Sum of expected minutes from first_day to last_day inclusive.
+        """
+        offset = self.first_day.toordinal()
+        start = max(first_day.toordinal() - offset, 0)
+        end = last_day.toordinal() - offset + 1
+        return sum(self.minutes[start:end])
+
+    def scaled(self, factor: int) -> 'ExpectedMinutes':
+        return ExpectedMinutes(
+            self.first_day,
+            array('I', (minutes * factor for minutes in self.minutes)),
+        )
+
+
+def to_date(value: Any) -> dt.date:
+    if isinstance(value, dt.date):
+        return value
+    try:
+        return dt.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise TrackieFormatException(
+            f'Invalid date in calendar table: {value}. '
+            'Must match YYYY-MM-DD'
+        )
+
+
+def parse_calendar(table: dict | None) -> WorkCalendar | None:
+    """
+    Build a WorkCalendar from the config's calendar table.
+
+    Raises TrackieFormatException for invalid values.
+    """
+    if not table:
+        return None
+
+    holidays = frozenset(to_date(day) for day in table.get('holidays', []))
+
+    vacations = []
+    for vacation in table.get('vacations', []):
+        if not isinstance(vacation, list) or len(vacation) != 2:
+            raise TrackieFormatException(
+                f'Invalid vacation in calendar table: {vacation}. '
+                'Must be a list of first and last day'
+            )
+        first_day, last_day = to_date(vacation[0]), to_date(vacation[1])
+        if last_day < first_day:
+            raise TrackieFormatException(
+                f'Vacation ends before it starts: {vacation}')
+        vacations.append((first_day, last_day))
+
+    weekday_minutes = table.get('weekday_minutes')
+    if weekday_minutes is not None:
+        if (
+            not isinstance(weekday_minutes, list)
+            or len(weekday_minutes) != 7
+            or not all(
+                isinstance(minutes, int) and minutes >= 0
+                for minutes in weekday_minutes)
+        ):
+            raise TrackieFormatException(
+                'weekday_minutes in calendar table must list 7 '
+                'non-negative minutes, Monday first'
+            )
+        weekday_minutes = tuple(weekday_minutes)
+
+    return WorkCalendar(holidays, tuple(vacations), weekday_minutes)
+
+
+def get_weekday_minutes(
+    calendar: WorkCalendar | None,
+    *,
+    minutes_per_day: int | None = None,
+    minutes_per_week: int | None = None,
+    interval: Literal['day', 'week'] = 'day',
+) -> tuple[int, ...]:
+    """
+    Regular expected minutes per weekday, Monday first.
+
+    Without a part-time quota from the calendar Monday to Friday are
+    expected to have minutes_per_day, or minutes_per_week spread over
+    them. For weekly figures minutes_per_week comes first, so a full
+    week is expected to have exactly minutes_per_week.
+    """
+    if calendar and calendar.weekday_minutes:
+        return calendar.weekday_minutes
+    if minutes_per_week is not None and (
+        interval == 'week' or minutes_per_day is None
+    ):
+        minutes, remainder = divmod(minutes_per_week, WORKDAYS)
+        return tuple(
+            minutes + (weekday < remainder) for weekday in range(WORKDAYS)
+        ) + (0, 0)
+    return (minutes_per_day or 0,) * WORKDAYS + (0, 0)
+
+
+def get_expected_minutes(
+    calendar: WorkCalendar | None,
+    *,
+    first_day: dt.date,
+    last_day: dt.date,
+    minutes_per_day: int | None = None,
+    minutes_per_week: int | None = None,
+    interval: Literal['day', 'week'] = 'day',
+) -> ExpectedMinutes:
+    """
+    Compile the calendar into expected minutes for each day of a range,
+    for daily or weekly figures as get_weekday_minutes.
+    """
+    weekday_minutes = get_weekday_minutes(
+        calendar,
+        minutes_per_day=minutes_per_day,
+        minutes_per_week=minutes_per_week,
+        interval=interval,
+    )
+    days = last_day.toordinal() - first_day.toordinal() + 1
+    first_weekday = first_day.weekday()
+    minutes = array(
+        'I',
+        (weekday_minutes[(first_weekday + n) % 7] for n in range(max(days, 0)))
+    )
+
+    if calendar:
+        offset = first_day.toordinal()
+        days_off = [
+            (day, day) for day in calendar.holidays] + list(calendar.vacations)
+        for first_off, last_off in days_off:
+            start = max(first_off.toordinal() - offset, 0)
+            end = min(last_off.toordinal() - offset + 1, days)
+            if start < end:
+                minutes[start:end] = array('I', [0]) * (end - start)
+    return ExpectedMinutes(first_day, minutes)
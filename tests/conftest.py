@@ -1,3 +1,40 @@
+import datetime as dt
+
+import pytest
+
+from trackie.conf import (
+    Params,
+    date_pattern,
+    tabs_description_pattern,
+    tabs_duration_pattern,
+)
+
 pytest_plugins = [
     'tests.work.fixtures',
 ]
+
+
+@pytest.fixture
+def make_params():
+    """
+    Build Params for a tracking file, tests override only the fields
+    they depend on.
+    """
+    def make(data_path, **kwargs):
+        return Params(**{
+            'client': 'test_client',
+            'data_path': data_path,
+            'mode': 'list',
+            'start_date': dt.date(2025, 1, 1),
+            'interval': 'day',
+            'csv': False,
+            'date_pattern': date_pattern,
+            'description_pattern': tabs_description_pattern,
+            'duration_pattern': tabs_duration_pattern,
+            'minutes_per_day': 1,
+            'minutes_per_week': 1,
+            'hourly_wage': None,
+            'display_hours': True,
+            **kwargs,
+        })
+    return make
@@ -0,0 +1,65 @@
+import datetime as dt
+
+import pytest
+
+from trackie.repositories.file_edit import archive_before, FileEditRepository
+from trackie.repositories.segments import get_segments, read_segment
+
+
+DATA = (
+    '2023-12-30\n\tOld task\n\t\t10\n'
+    '2024-06-01\n\tTask\n\t\t20\n'
+    '2025-01-02\n\tNew task\n\t\t30\n'
+)
+
+
+def get_minutes(params):
+    return [
+        minutes for _, minutes in
+        FileEditRepository.get_fields(params, ('date', 'minutes'))
+    ]
+
+
+def test_archived_years_are_read_transparently(tmp_path, make_params):
+    data_path = tmp_path / 'work.otl'
+    data_path.write_text(DATA)
+    params = make_params(data_path, start_date=dt.date(2020, 1, 1))
+
+    segment_path = archive_before(params, 2025)
+    assert segment_path == tmp_path / 'work.2023-2024.otl.gz'
+    assert data_path.read_text() == '2025-01-02\n\tNew task\n\t\t30\n'
+    assert read_segment(segment_path) == DATA[:DATA.index('2025')]
+    assert get_minutes(params) == [10, 20, 30]
+    assert archive_before(params, 2025) is None
+
+
+def test_segments_outside_the_date_range_are_not_opened(tmp_path, make_params):
+    data_path = tmp_path / 'work.otl'
+    data_path.write_text('2025-01-02\n\tNew task\n\t\t30\n')
+    # not even gzip, reading it would fail
+    (tmp_path / 'work.2023-2024.otl.gz').write_text('garbage')
+    assert [
+        segment.first_year for segment in get_segments(data_path)] == [2023]
+    params = make_params(data_path, start_date=dt.date(2025, 1, 1))
+    assert get_minutes(params) == [30]
+
+
+def test_interrupted_archive_is_completed(tmp_path, make_params):
+    data_path = tmp_path / 'work.otl'
+    data_path.write_text(DATA)
+    params = make_params(data_path, start_date=dt.date(2020, 1, 1))
+    segment_path = archive_before(params, 2025)
+    # as if the tracking file was not replaced yet
+    data_path.write_text(DATA)
+
+    assert archive_before(params, 2025) == segment_path
+    assert get_minutes(params) == [10, 20, 30]
+
+
+def test_zstd_segments(tmp_path, make_params):
+    pytest.importorskip('zstandard')
+    data_path = tmp_path / 'work.otl'
+    data_path.write_text(DATA)
+    params = make_params(data_path, start_date=dt.date(2020, 1, 1))
+    assert archive_before(params, 2024, 'zst').name == 'work.2023.otl.zst'
+    assert get_minutes(params) == [10, 20, 30]
@@ -0,0 +1,46 @@
+import pytest
+
+from trackie.repositories.formatting import format_file
+from trackie.utils import TrackieFormatException
+
+
+UNSORTED = (
+    '2025-03-04\n    Later\n        10\n'
+    '2025-03-01\n\tFirst\n\t\t20\n\n'
+    '2025-03-04\n\tMore\n\t  lines\n\t\t9:00-9:30\n'
+    '2025-02-28\n\tEarlier\n\t\t5\n'
+)
+FORMATTED = (
+    '2025-02-28\n\tEarlier\n\t\t5\n'
+    '2025-03-01\n\tFirst\n\t\t20\n'
+    '2025-03-04\n\tLater\n\t\t10\n\tMore\n\tlines\n\t\t9:00-9:30\n'
+)
+
+
+@pytest.mark.parametrize('max_run_lines', [1000, 3])
+def test_entries_are_sorted_and_merged(tmp_path, max_run_lines, make_params):
+    path = tmp_path / 'work.otl'
+    path.write_text(UNSORTED)
+    result = format_file(make_params(path), max_run_lines=max_run_lines)
+    assert (result.blocks, result.dates, result.changed) == (4, 3, True)
+    assert path.read_text() == FORMATTED
+    assert not format_file(make_params(path)).changed
+    assert [p.name for p in tmp_path.iterdir()] == ['work.otl']
+
+
+def test_malformed_files_are_left_alone(tmp_path, make_params):
+    path = tmp_path / 'work.otl'
+    path.write_text(UNSORTED + '2025-03-05\nno indentation\n\t\t5\n')
+    with pytest.raises(TrackieFormatException):
+        format_file(make_params(path), max_run_lines=3)
+    assert path.read_text().startswith(UNSORTED)
+    assert [p.name for p in tmp_path.iterdir()] == ['work.otl']
+
+
+def test_descriptions_starting_with_a_digit_stay_descriptions(
+        tmp_path, make_params):
+    path = tmp_path / 'work.otl'
+    path.write_text('2025-03-01\n  2 meetings with ops\n    9:00-10:00\n')
+    format_file(make_params(path))
+    assert path.read_text() == (
+        '2025-03-01\n\t2 meetings with ops\n\t\t9:00-10:00\n')
@@ -0,0 +1,98 @@
+import datetime as dt
+
+import pytest
+
+from trackie.repositories.file_edit import FileEditRepository
+from trackie.repositories.journal import (
+    convert_journal_to_otl,
+    convert_otl_to_journal,
+    JournalRepository,
+)
+from trackie.utils import TrackieFormatException
+from trackie.work.models import WorkUnit
+
+
+def test_empty_journal(tmp_path, make_params):
+    params = make_params(tmp_path / 'data.otj')
+    assert list(JournalRepository.get_work_units(params)) == []
+
+
+def test_added_work_units_are_read_by_date_range(tmp_path, make_params):
+    params = make_params(tmp_path / 'data.otj')
+    for day in range(1, 6):
+        JournalRepository.add_work_unit(
+            WorkUnit(dt.date(2025, 3, day), 'test_client', day, ' Task'),
+            params,
+        )
+    params = make_params(
+        params.data_path,
+        start_date=dt.date(2025, 3, 2),
+        end_date=dt.date(2025, 3, 4),
+    )
+    assert [
+        work_unit.minutes
+        for work_unit in JournalRepository.get_work_units(params)
+    ] == [2, 3, 4]
+
+
+def test_appending_before_last_date_raises(tmp_path, make_params):
+    params = make_params(tmp_path / 'data.otj')
+    JournalRepository.add_work_unit(
+        WorkUnit(dt.date(2025, 3, 2), 'test_client', 5, ' Task'), params)
+    with pytest.raises(TrackieFormatException):
+        JournalRepository.add_work_unit(
+            WorkUnit(dt.date(2025, 3, 1), 'test_client', 5, ' Task'), params)
+
+
+def test_partly_written_record_is_ignored(tmp_path, make_params):
+    params = make_params(tmp_path / 'data.otj')
+    work_unit = WorkUnit(dt.date(2025, 3, 1), 'test_client', 5, ' Task')
+    JournalRepository.add_work_unit(work_unit, params)
+    with params.data_path.open('ab') as f:
+        f.write(b'\x01\x02\x03')
+
+    assert list(JournalRepository.get_work_units(params)) == [work_unit]
+    JournalRepository.add_work_unit(work_unit, params)
+    assert list(JournalRepository.get_work_units(params)) == [work_unit] * 2
+
+
+def test_otl_round_trip(tmp_path, make_params):
+    otl_path = tmp_path / 'data.otl'
+    otl_text = (
+        '2025-03-01\n'
+        '\tTask 1\n'
+        '\tmore about it\n'
+        '\t\t9:15-10:30\n'
+        '\tTask 2\n'
+        '\t\t20\n'
+        '2025-03-02\n'
+        '\tNight shift\n'
+        '\t\t22:00-1:30\n'
+    )
+    otl_path.write_text(otl_text)
+    journal_path = tmp_path / 'data.otj'
+    assert convert_otl_to_journal(make_params(otl_path), journal_path) == 3
+
+    from_otl = list(FileEditRepository.get_work_units(make_params(otl_path)))
+    from_journal = list(
+        JournalRepository.get_work_units(make_params(journal_path)))
+    assert from_journal == from_otl
+    assert list(JournalRepository.get_fields(
+        make_params(journal_path), ('date', 'minutes', 'description'),
+    )) == [
+        (work_unit.date, work_unit.minutes, work_unit.description)
+        for work_unit in from_otl
+    ]
+
+    copy_path = tmp_path / 'copy.otl'
+    assert convert_journal_to_otl(journal_path, copy_path) == 3
+    assert copy_path.read_text() == otl_text
+
+
+def test_conversion_errors_have_physical_line_numbers(tmp_path, make_params):
+    otl_path = tmp_path / 'work.otl'
+    otl_path.write_text(
+        '2025-03-01\n\tTask\n\t\t30\n\n'
+        '2025-03-02\n\n\tTask\n\n\t\t10x\n')
+    with pytest.raises(TrackieFormatException, match='line #9:'):
+        convert_otl_to_journal(make_params(otl_path), tmp_path / 'work.otj')
@@ -0,0 +1,67 @@
+import datetime as dt
+
+from trackie.repositories.file_edit import FileEditRepository, get_sources
+from trackie.repositories.partitions import get_partitions
+from trackie.search import search_work_units
+
+
+def make_partitions(directory):
+    directory.mkdir()
+    (directory / '2024.otl').write_text('2024-12-31\n\tOld task\n\t\t10\n')
+    (directory / '2025-02.otl').write_text('2025-02-03\n\tTask B\n\t\t30\n')
+    (directory / '2025-01.otl').write_text(
+        '2025-01-02\n\tReview A\n\t\t20\n2025-01-31\n\tReview A\n\t\t25\n')
+    (directory / '2025-13.otl').write_text('not a partition')
+    (directory / 'notes.txt').write_text('not a partition')
+
+
+def test_partitions_are_ordered_by_date(tmp_path):
+    make_partitions(tmp_path / 'work')
+    assert [
+        (partition.path.name, partition.first_day, partition.last_day)
+        for partition in get_partitions(tmp_path / 'work')
+    ] == [
+        ('2024.otl', dt.date(2024, 1, 1), dt.date(2024, 12, 31)),
+        ('2025-01.otl', dt.date(2025, 1, 1), dt.date(2025, 1, 31)),
+        ('2025-02.otl', dt.date(2025, 2, 1), dt.date(2025, 2, 28)),
+    ]
+
+
+def test_only_partitions_in_the_date_range_are_read(tmp_path, make_params):
+    directory = tmp_path / 'work'
+    make_partitions(directory)
+    params = make_params(
+        directory,
+        start_date=dt.date(2025, 1, 15),
+        end_date=dt.date(2025, 2, 10),
+    )
+    assert [path.name for path in get_sources(params)] == [
+        '2025-01.otl', '2025-02.otl']
+    assert [
+        (work_unit.date, work_unit.minutes)
+        for work_unit in FileEditRepository.get_work_units(params)
+    ] == [(dt.date(2025, 1, 31), 25), (dt.date(2025, 2, 3), 30)]
+
+    params = make_params(
+        directory,
+        start_date=dt.date(2024, 1, 1),
+        end_date=dt.date(2025, 2, 28),
+    )
+    assert [
+        minutes for _, minutes in
+        FileEditRepository.get_fields(params, ('date', 'minutes'))
+    ] == [10, 20, 25, 30]
+
+
+def test_partitions_are_searched(tmp_path, make_params):
+    directory = tmp_path / 'work'
+    make_partitions(directory)
+    params = make_params(
+        directory,
+        start_date=dt.date(2024, 1, 1),
+        end_date=dt.date(2025, 2, 28),
+    )
+    assert [
+        work_unit.minutes
+        for work_unit in search_work_units(params, 'review')
+    ] == [20, 25]
@@ -0,0 +1,63 @@
+from importlib.metadata import EntryPoint
+from pathlib import Path
+
+import pytest
+
+from trackie.conf import get_config
+from trackie.repositories import registry
+from trackie.repositories.file_edit import FileEditRepository
+from trackie.repositories.registry import (
+    get_repository,
+    get_repository_name,
+    load_repository,
+)
+from trackie.utils import TrackieConfigException
+
+
+class MemoryRepository:
+    pass
+
+
+def test_repository_is_chosen_per_client(tmp_path):
+    cfg_file = tmp_path / 'cfg.toml'
+    cfg_file.write_text(
+        'repository = "sqlite"\n'
+        '[clients]\n'
+        'a = "a.otl"\nb = "b.otj"\nc = "c.otl"\n'
+        'd = "https://files.example.com/d.otl"\n'
+        '[repositories]\n'
+        'c = "file_edit"\n'
+    )
+    config = get_config(str(cfg_file))
+    assert [
+        get_repository_name(config, client, Path(path))
+        for client, path in config.clients.items()
+    ] == ['sqlite', 'journal', 'file_edit', 'http']
+
+
+def test_builtin_repositories_are_loaded_by_name():
+    assert get_repository(Path('work.otl')) is FileEditRepository
+    assert get_repository(Path('work.otj')).__name__ == 'JournalRepository'
+    assert load_repository('file_edit') is FileEditRepository
+
+
+def test_repositories_are_loaded_from_entry_points(monkeypatch):
+    entry_point = EntryPoint(
+        name='memory',
+        value=f'{__name__}:MemoryRepository',
+        group=registry.ENTRY_POINT_GROUP,
+    )
+    monkeypatch.setattr(
+        registry, 'entry_points',
+        lambda group, name=None: [
+            point for point in [entry_point]
+            if point.group == group and name in (None, point.name)
+        ],
+    )
+    load_repository.cache_clear()
+    try:
+        assert get_repository(Path('work.otl'), 'memory') is MemoryRepository
+        with pytest.raises(TrackieConfigException, match='file_edit'):
+            load_repository('unknown')
+    finally:
+        load_repository.cache_clear()
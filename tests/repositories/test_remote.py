@@ -0,0 +1,191 @@
+import datetime as dt
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+import pytest
+
+from trackie.cache import content_hash, get_mirror_path
+from trackie.repositories.remote import (
+    ConnectionPool,
+    HttpRepository,
+    pool,
+    sync_mirror,
+)
+from trackie.search import search_work_units
+from trackie.utils import TrackieException
+
+DATA = (
+    b'2025-03-03\n'
+    b'\tReview\n'
+    b'\t\t60\n'
+    b'2025-03-04\n'
+    b'\tMeeting\n'
+    b'\t\t30\n'
+)
+
+
+class FileHandler(BaseHTTPRequestHandler):
+    """
+    Serves server.data at any path with ETags and single byte ranges.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        data = self.server.data
+        etag = f'"{content_hash(data)}"'
+        self.server.requests.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        status, body = 200, data
+        byte_range = self.headers.get('Range')
+        if byte_range:
+            start = int(byte_range.removeprefix('bytes=').rstrip('-'))
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            status, body = 206, data[start:]
+        self.send_response(status)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        if status == 206:
+            self.send_header(
+                'Content-Range', f'bytes {start}-{len(data) - 1}/{len(data)}')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FileHandler)
+    server.data = DATA
+    server.requests = []
+    server.connections = 0
+    thread = threading.Thread(
+        target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    pool.clear()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def connections():
+    connections = ConnectionPool()
+    yield connections
+    connections.clear()
+
+
+def get_url(server):
+    host, port = server.server_address
+    return f'http://{host}:{port}/files/work.otl'
+
+
+def test_unchanged_file_is_revalidated_without_body(
+        server, connections, tmp_path):
+    mirror = get_mirror_path(tmp_path, get_url(server))
+    assert mirror.name.startswith('work-') and mirror.suffix == '.otl'
+
+    assert sync_mirror(get_url(server), mirror, connections)
+    assert not sync_mirror(get_url(server), mirror, connections)
+
+    assert mirror.read_bytes() == DATA
+    assert server.requests[1]['If-None-Match'] == (
+        f'"{content_hash(DATA)}"')
+    # both requests went over one keep-alive connection
+    assert server.connections == 1
+
+
+def test_appended_bytes_are_fetched_by_range(server, connections, tmp_path):
+    mirror = get_mirror_path(tmp_path, get_url(server))
+    sync_mirror(get_url(server), mirror, connections)
+    server.data = DATA + b'2025-03-05\n\tDeploy\n\t\t15\n'
+
+    assert sync_mirror(get_url(server), mirror, connections)
+
+    assert mirror.read_bytes() == server.data
+    assert server.requests[1]['Range'] == 'bytes=0-'
+
+
+def test_edited_file_is_fetched_again(
+        server, connections, tmp_path, monkeypatch):
+    monkeypatch.setattr('trackie.repositories.remote.MIRROR_OVERLAP', 8)
+    mirror = get_mirror_path(tmp_path, get_url(server))
+    sync_mirror(get_url(server), mirror, connections)
+
+    server.data = DATA + b'2025-03-05\n\tDeploy\n\t\t15\n'
+    sync_mirror(get_url(server), mirror, connections)
+    assert server.requests[1]['Range'] == f'bytes={len(DATA) - 8}-'
+    assert mirror.read_bytes() == server.data
+
+    server.data = server.data.replace(b'\t\t15', b'\t\t45')
+    assert sync_mirror(get_url(server), mirror, connections)
+    assert mirror.read_bytes() == server.data
+    assert 'Range' not in server.requests[-1]
+
+    server.data = DATA[:11]
+    assert sync_mirror(get_url(server), mirror, connections)
+    assert mirror.read_bytes() == server.data
+
+
+def test_rewritten_file_of_same_size_is_fetched_again(
+        server, connections, tmp_path, monkeypatch):
+    monkeypatch.setattr('trackie.repositories.remote.MIRROR_OVERLAP', 8)
+    mirror = get_mirror_path(tmp_path, get_url(server))
+    sync_mirror(get_url(server), mirror, connections)
+
+    server.data = DATA.replace(b'\t\t60', b'\t\t90')
+    assert sync_mirror(get_url(server), mirror, connections)
+
+    assert mirror.read_bytes() == server.data
+    assert 'Range' not in server.requests[-1]
+    assert not sync_mirror(get_url(server), mirror, connections)
+
+
+def test_work_units_are_read_from_the_mirror(server, tmp_path, make_params):
+    params = make_params(
+        get_mirror_path(tmp_path, get_url(server)),
+        repository='http',
+        url=get_url(server),
+    )
+    work_units = list(HttpRepository.get_work_units(params))
+    assert [
+        (work_unit.date, work_unit.minutes) for work_unit in work_units
+    ] == [(dt.date(2025, 3, 3), 60), (dt.date(2025, 3, 4), 30)]
+    assert list(HttpRepository.get_fields(params, ['minutes'])) == [
+        (60,), (30,)]
+
+
+def test_search_fetches_the_file(server, tmp_path, make_params):
+    params = make_params(
+        get_mirror_path(tmp_path, get_url(server)),
+        repository='http',
+        url=get_url(server),
+    )
+    assert [
+        work_unit.minutes for work_unit in search_work_units(params, 'review')
+    ] == [60]
+    server.data = DATA + b'2025-03-05\n\tReview again\n\t\t15\n'
+    assert [
+        work_unit.minutes for work_unit in search_work_units(params, 'review')
+    ] == [60, 15]
+
+
+def test_unreachable_server(server, connections, tmp_path):
+    url = get_url(server)
+    server.shutdown()
+    server.server_close()
+    with pytest.raises(TrackieException, match='Cannot fetch'):
+        sync_mirror(url, get_mirror_path(tmp_path, url), connections)
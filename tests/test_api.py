@@ -0,0 +1,105 @@
+from concurrent.futures import ThreadPoolExecutor
+import datetime as dt
+import os
+
+import pytest
+
+from trackie import api
+from trackie.utils import TrackieConfigException, TrackieFormatException
+from trackie.work.models import PeriodStat
+
+
+def write_config(tmp_path, data_text):
+    data_path = tmp_path / 'data.otl'
+    data_path.write_text(data_text)
+    config_path = tmp_path / 'trackie.toml'
+    config_path.write_text(
+        'minutes_per_day = 60\n'
+        'minutes_per_week = 300\n'
+        '[clients]\n'
+        f'x = "{data_path}"\n'
+        '[abbr]\n'
+        'ex = "x"\n'
+    )
+    return api.load_config(config_path), data_path
+
+
+DATA = (
+    '2025-03-03\n\tTask 1\n\t\t100\n'
+    '2025-03-11\n\tTask 3\n\t\t200\n'
+    '2025-03-04\n\tTask 2\n\t\t20\n'
+)
+
+
+def test_work_units_are_ordered_by_date(tmp_path):
+    config, _ = write_config(tmp_path, DATA)
+    work_units = api.get_work_units(
+        config, 'ex',
+        start_date=dt.date(2025, 3, 3), end_date=dt.date(2025, 3, 10),
+        cache=api.ParseCache(),
+    )
+    assert [
+        (work_unit.date.day, work_unit.description)
+        for work_unit in work_units
+    ] == [(3, ' Task 1'), (4, ' Task 2')]
+
+
+def test_stats_and_totals(tmp_path):
+    config, _ = write_config(tmp_path, DATA)
+    cache = api.ParseCache()
+    week_stats = api.get_stats(
+        config, 'x', interval='week',
+        start_date=dt.date(2025, 3, 3), end_date=dt.date(2025, 3, 16),
+        cache=cache,
+    )
+    assert [week_stat.carryover for week_stat in week_stats] == [-180, -280]
+    totals = api.get_totals(
+        config, 'x',
+        start_date=dt.date(2025, 3, 3), end_date=dt.date(2025, 3, 9),
+        cache=cache,
+    )
+    assert totals == PeriodStat(
+        dt.date(2025, 3, 3), dt.date(2025, 3, 9), 120, 2, 2, 300)
+
+
+def test_errors_raise_instead_of_exiting(tmp_path):
+    config, _ = write_config(tmp_path, '2025-03-03\n\tTask\n')
+    with pytest.raises(TrackieConfigException):
+        api.get_work_units(config, 'unknown')
+    with pytest.raises(TrackieFormatException):
+        api.get_work_units(
+            config, 'x', start_date=dt.date(2025, 3, 1),
+            cache=api.ParseCache())
+    with pytest.raises(TrackieConfigException):
+        api.load_config(tmp_path / 'missing.toml')
+
+
+def test_files_are_parsed_once_per_version(tmp_path, monkeypatch):
+    config, data_path = write_config(tmp_path, DATA)
+    cache = api.ParseCache()
+    parsed = []
+    parse_file = api.parse_file
+
+    def counting_parse_file(params):
+        parsed.append(params.data_path)
+        return parse_file(params)
+
+    monkeypatch.setattr(api, 'parse_file', counting_parse_file)
+
+    def count_units(_):
+        return len(api.get_work_units(
+            config, 'x', start_date=dt.date(2025, 3, 1),
+            end_date=dt.date(2025, 3, 31), cache=cache,
+        ))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert set(executor.map(count_units, range(32))) == {3}
+    assert len(parsed) == 1
+
+    data_path.write_text(DATA + '2025-03-12\n\tTask 4\n\t\t5\n')
+    # make sure the modification time differs on coarse clocks
+    stat = data_path.stat()
+    os.utime(data_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert count_units(None) == 4
+    assert len(parsed) == 2
+    assert len(cache.files) == 1
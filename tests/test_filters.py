@@ -0,0 +1,85 @@
+import dataclasses
+import datetime as dt
+
+import pytest
+
+from trackie.conf import (
+    Params,
+    date_pattern,
+    tabs_description_pattern,
+    tabs_duration_pattern,
+)
+from trackie.filters import compile_filter
+from trackie.repositories.file_edit import FileEditRepository
+
+MONDAY = dt.date(2025, 3, 3)
+SATURDAY = dt.date(2025, 3, 8)
+
+
+def test_comparisons_are_combined():
+    where = compile_filter([
+        'weekday != sat,sun and (minutes >= 1:00 or description ~ REVIEW)',
+        "not description =~ '^ABC-\\d+ call'",
+    ])
+    assert where.needs_description
+    assert where.matches(MONDAY, 60, ' planning')
+    assert where.matches(MONDAY, 10, ' code review')
+    assert not where.matches(MONDAY, 10, ' planning')
+    assert not where.matches(MONDAY, 90, ' ABC-13 call')
+    assert not where.matches(SATURDAY, 90, ' planning')
+
+
+def test_dates_are_excluded_before_parsing():
+    where = compile_filter(['date >= 2025-03-05 and minutes > 10'])
+    assert not where.needs_description
+    assert where.excludes_date(MONDAY)
+    assert not where.excludes_date(SATURDAY)
+    # minutes may still match on any day
+    assert not compile_filter(
+        ['date >= 2025-03-05 or minutes > 10']).excludes_date(MONDAY)
+
+
+@pytest.mark.parametrize('expression, message', [
+    ('colour = red', 'Unknown filter field'),
+    ('minutes ~ 10', 'minutes are compared'),
+    ('date < 2025-13-01', 'YYYY-MM-DD'),
+    ('weekday = someday', 'weekdays are'),
+    ('(minutes > 10', 'ends too early'),
+    ('minutes > 10 minutes', 'Unexpected "minutes"'),
+])
+def test_malformed_filters_are_reported(expression, message):
+    with pytest.raises(ValueError, match=message):
+        compile_filter([expression])
+
+
+def test_repository_yields_matching_work_units(tmp_path):
+    path = tmp_path / 'work.otl'
+    path.write_text(
+        '2025-03-03\n\tplanning\n\t\t60\n\tcode review\n\t\t10\n'
+        '2025-03-08\n\tplanning\n\t\t90\n'
+    )
+    params = Params(
+        client='test_client',
+        data_path=path,
+        mode='list',
+        start_date=dt.date(2025, 3, 1),
+        end_date=dt.date(2025, 3, 31),
+        interval='day',
+        csv=False,
+        date_pattern=date_pattern,
+        description_pattern=tabs_description_pattern,
+        duration_pattern=tabs_duration_pattern,
+        minutes_per_day=1,
+        minutes_per_week=1,
+        hourly_wage=None,
+        display_hours=True,
+        where=compile_filter(['weekday = mon', 'description ~ review']),
+    )
+    assert [
+        (work_unit.date, work_unit.minutes)
+        for work_unit in FileEditRepository.get_work_units(params)
+    ] == [(MONDAY, 10)]
+    params = dataclasses.replace(
+        params, where=compile_filter(['minutes > 30']))
+    assert list(FileEditRepository.get_fields(params, ('minutes',))) == [
+        (60,), (90,)]
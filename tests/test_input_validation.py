@@ -1,9 +1,13 @@
+import datetime as dt
+
 from trackie.cli import (
     no_default_client_message,
     client_not_found_message,
     file_does_not_exist_message,
     invalid_start_date_format_message,
     evaluate_input,
+    parse_report_option,
+    read_report_spec,
 )
 from trackie.conf import Config
 
@@ -109,3 +113,42 @@ def test_invalid_start_arg(tmp_path):
             config=config,
         )
     assert e.match(invalid_start_date_format_message.format(start=start_arg))
+
+
+def test_report_spec_values_are_normalized(tmp_path):
+    spec_path = tmp_path / 'reports.toml'
+    spec_path.write_text(
+        '[[report]]\ngroup_by = "tag"\ncsv = "false"\n'
+        '[[report]]\ngroup_by = ["tag", "weekday"]\ncsv = true\n'
+    )
+    reports, _ = read_report_spec(spec_path)
+    assert reports == [
+        {'group_by': ['tag'], 'csv': False},
+        {'group_by': ['tag', 'weekday'], 'csv': True},
+    ]
+    assert parse_report_option('group_by=tag,csv=no') == (
+        {'group_by': ['tag'], 'csv': False})
+
+
+def test_report_spec_with_reports_and_comparisons(tmp_path):
+    spec_path = tmp_path / 'reports.toml'
+    spec_path.write_text(
+        '[[report]]\nname = "weeks"\nstart = 2025-01-01\n'
+        '[[compare]]\n'
+        'periods = [[2025-01-01, 2025-01-31], [2025-02-01, 2025-02-28]]\n'
+    )
+    reports, comparisons = read_report_spec(spec_path)
+    assert reports == [{'name': 'weeks', 'start': '2025-01-01'}]
+    assert comparisons == [(
+        (dt.date(2025, 1, 1), dt.date(2025, 1, 31)),
+        (dt.date(2025, 2, 1), dt.date(2025, 2, 28)),
+    )]
+
+
+@pytest.mark.parametrize('csv', ['"maybe"', '1'])
+def test_report_spec_invalid_csv_errors(tmp_path, csv):
+    spec_path = tmp_path / 'reports.toml'
+    spec_path.write_text(f'[[report]]\ncsv = {csv}\n')
+    with pytest.raises(SystemExit) as e:
+        read_report_spec(spec_path)
+    assert e.match('Invalid report')
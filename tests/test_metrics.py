@@ -0,0 +1,60 @@
+import datetime as dt
+import json
+
+from trackie.metrics import RunMetrics, STAGES, write_metrics
+from trackie.repositories.file_edit import FileEditRepository
+
+
+def test_repository_counts_lines_blocks_and_units(tmp_path, make_params):
+    data_path = tmp_path / 'data.otl'
+    data_path.write_text(
+        '2025-03-01\n\tTask 1\n\t\t5\n\tTask 2\n\t\t10\n'
+        '\n'
+        '2025-03-02\n\tTask 3\n\t\t15\n'
+    )
+    metrics = RunMetrics('test_client')
+    params = make_params(
+        data_path,
+        start_date=dt.date(2025, 3, 2),
+        end_date=dt.date(2025, 3, 31),
+        metrics=metrics,
+    )
+    work_units = list(FileEditRepository.get_work_units(params))
+
+    assert len(work_units) == 1
+    assert metrics.file_bytes == data_path.stat().st_size
+    assert metrics.lines == 8
+    assert metrics.blocks == 2
+    assert metrics.units_parsed == 1
+    assert metrics.units_filtered == 2
+    assert metrics.stages['read'] > 0
+
+
+def test_prometheus_textfile_keeps_other_clients(tmp_path):
+    path = tmp_path / 'trackie.prom'
+    write_metrics(RunMetrics('x', file_bytes=1), path)
+    write_metrics(RunMetrics('y', file_bytes=2), path)
+    write_metrics(RunMetrics('x', file_bytes=3), path)
+
+    lines = path.read_text().splitlines()
+    assert [
+        line for line in lines if line.startswith('trackie_file_bytes')
+    ] == [
+        'trackie_file_bytes{client="x",command="run"} 3',
+        'trackie_file_bytes{client="y",command="run"} 2',
+    ]
+    assert lines.count('# TYPE trackie_file_bytes gauge') == 1
+    assert len([
+        line for line in lines
+        if line.startswith('trackie_stage_duration_seconds')
+    ]) == 2 * len(STAGES)
+
+
+def test_json_lines_get_appended(tmp_path):
+    path = tmp_path / 'metrics.jsonl'
+    write_metrics(RunMetrics('x', lines=1), path)
+    write_metrics(RunMetrics('x', lines=2), path)
+
+    runs = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [run['lines'] for run in runs] == [1, 2]
+    assert set(runs[0]['stages']) == set(STAGES)
@@ -0,0 +1,14 @@
+import pytest
+
+from trackie.output import pretty_print_day_stats, pretty_print_week_stats
+
+
+@pytest.mark.parametrize(
+    'pretty_print', [pretty_print_day_stats, pretty_print_week_stats])
+def test_empty_stats_print_no_balance(
+        tmp_path, make_params, capsys, pretty_print):
+    pretty_print([], make_params(tmp_path / 'work.otl'))
+
+    output = capsys.readouterr().out
+    assert 'Test_client' in output
+    assert 'Current Balance' not in output
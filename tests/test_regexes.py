@@ -4,6 +4,7 @@ import pytest
 
 from trackie.conf import (
     date_pattern,
+    tabs_duration_pattern,
     spaces_description_pattern,
     spaces_duration_pattern,
 )
@@ -65,7 +66,30 @@ def test_valid_space_duration_lines(duration_line):
 
 @pytest.mark.parametrize("duration_line", [
     " " * 9 + "789",
+    " " * 8 + "30min",
 ])
 def test_invalid_space_duration_lines(duration_line):
     assert not re.compile(
         spaces_duration_pattern.format(' ' * 8)).match(duration_line)
+
+
+@pytest.mark.parametrize("duration_line", [
+    "\t\t15",
+    "\t\t9:15-10:30",
+    "\t\t23:45-00:15",
+    "\t\t15\n",
+    "\t\t9:15-10:30 \n",
+])
+def test_valid_tabs_duration_lines(duration_line):
+    assert tabs_duration_pattern.match(duration_line)
+
+
+@pytest.mark.parametrize("duration_line", [
+    "\t\t9:15",
+    "\t\t24:00-1:00",
+    "\t\t9:60-10:00",
+    "\t\t9:00-10:00x",
+    "\t\t30min",
+])
+def test_invalid_tabs_duration_lines(duration_line):
+    assert not tabs_duration_pattern.match(duration_line)
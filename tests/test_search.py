@@ -0,0 +1,97 @@
+import datetime as dt
+
+import pytest
+
+from trackie.repositories.file_edit import archive_before
+from trackie.repositories.journal import JournalRepository
+from trackie import search
+from trackie.search import load_index, search_work_units
+from trackie.utils import TrackieFormatException
+from trackie.work.models import WorkUnit
+
+
+def test_search_matches_all_words_ignoring_case(tmp_path, make_params):
+    data_path = tmp_path / 'data.otl'
+    data_path.write_text(
+        '2025-03-01\n\tABC-12 fix login\n\t\t30\n\tMeeting\n\t\t45\n'
+        '2025-03-03\n\tabc-12 review\n\t\t20\n'
+    )
+    params = make_params(data_path, cache_dir=tmp_path / 'cache')
+
+    work_units = search_work_units(params, 'ABC-12')
+    assert [unit.minutes for unit in work_units] == [30, 20]
+
+    work_units = search_work_units(params, 'abc-12 login')
+    assert [unit.minutes for unit in work_units] == [30]
+
+    assert search_work_units(params, 'ng') != []
+
+
+def test_appended_data_is_indexed_incrementally(tmp_path, make_params):
+    data_path = tmp_path / 'data.otl'
+    data_path.write_text('2025-03-01\n\tABC-12 fix\n\t\t30\n')
+    params = make_params(data_path, cache_dir=tmp_path / 'cache')
+    assert len(search_work_units(params, 'abc-12')) == 1
+
+    with data_path.open('a') as f:
+        f.write('\tABC-12 more\n\t\t5\n2025-03-02\n\tABC-12 done\n\t\t10\n')
+    index = load_index(params)
+    assert index['resume_offset'] > 0
+    assert list(index['minutes']) == [30, 5, 10]
+    assert len(search_work_units(params, 'abc-12')) == 3
+    assert len(index['postings']['c-1']) == 3
+
+
+def test_edited_data_rebuilds_index(tmp_path, make_params):
+    data_path = tmp_path / 'data.otl'
+    data_path.write_text('2025-03-01\n\tABC-12 fix\n\t\t30\n')
+    params = make_params(data_path, cache_dir=tmp_path / 'cache')
+    assert len(search_work_units(params, 'abc-12')) == 1
+
+    data_path.write_text('2025-03-01\n\tXYZ-1 fix with a longer text\n\t\t30\n')
+    assert search_work_units(params, 'abc-12') == []
+    assert len(search_work_units(params, 'xyz-1')) == 1
+
+
+def test_archive_segments_are_searched(tmp_path, monkeypatch, make_params):
+    data_path = tmp_path / 'data.otl'
+    data_path.write_text(
+        '2024-05-01\n\tABC-12 fix\n\t\t30\n'
+        '2025-03-01\n\tABC-12 review\n\t\t20\n'
+    )
+    params = make_params(
+        data_path,
+        cache_dir=tmp_path / 'cache',
+        start_date=dt.date(2024, 1, 1),
+    )
+    archive_before(params, 2025)
+    assert [
+        unit.minutes for unit in search_work_units(params, 'abc-12')
+    ] == [30, 20]
+
+    def fail(path):
+        raise AssertionError('unchanged segment was read again')
+
+    monkeypatch.setattr(search, 'read_segment', fail)
+    assert len(search_work_units(params, 'abc-12')) == 2
+
+
+def test_journals_are_searched_through_their_repository(
+        tmp_path, make_params):
+    params = make_params(tmp_path / 'data.otj', repository='journal')
+    for day, description in [(1, ' ABC-12 fix'), (2, ' Meeting')]:
+        JournalRepository.add_work_unit(
+            WorkUnit(dt.date(2025, 3, day), 'test_client', 30, description),
+            params)
+    assert [
+        unit.date.day for unit in search_work_units(params, 'abc-12')
+    ] == [1]
+
+
+def test_format_errors_have_physical_line_numbers(tmp_path, make_params):
+    data_path = tmp_path / 'data.otl'
+    data_path.write_text(
+        '2025-03-01\n\tABC-12 fix\n\t\t30\n\n'
+        '2025-03-02\n\n\tABC-12 more\n\n\t\t10x\n')
+    with pytest.raises(TrackieFormatException, match='line #9:'):
+        search_work_units(make_params(data_path), 'abc-12')
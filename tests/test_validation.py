@@ -0,0 +1,181 @@
+from decimal import Decimal
+
+import pytest
+
+from trackie.cache import get_cache_path
+from trackie.output import output_work_units_csv
+from trackie.repositories.file_edit import FileEditRepository
+from trackie.repositories.formatting import format_file
+from trackie.utils import FormatError, TrackieFormatException
+from trackie import validation
+from trackie.validation import BlockValidator, check_file
+
+
+def test_unchanged_blocks_are_not_checked_again(
+        tmp_path, monkeypatch, make_params):
+    data_path = tmp_path / 'data.otl'
+    data_path.write_text(
+        '2025-03-01\n\tTask 1\n\t\t5\n2025-03-02\n\tTask 2\n\t\t10\n')
+    params = make_params(
+        data_path, cache_dir=tmp_path / 'cache', validate='fast')
+    assert len(list(FileEditRepository.get_work_units(params))) == 2
+
+    def fail(*args, **kwargs):
+        raise AssertionError('cached block was checked again')
+
+    monkeypatch.setattr(validation, 'check_format', fail)
+    assert len(list(FileEditRepository.get_work_units(params))) == 2
+
+
+def test_changed_block_is_checked_with_file_line_numbers(
+        tmp_path, make_params):
+    data_path = tmp_path / 'data.otl'
+    data_path.write_text(
+        '2025-03-01\n\tTask 1\n\t\t5\n2025-03-02\n\tTask 2\n\t\t10\n')
+    params = make_params(
+        data_path, cache_dir=tmp_path / 'cache', validate='fast')
+    list(FileEditRepository.get_work_units(params))
+
+    data_path.write_text(
+        '2025-03-01\n\tTask 1\n\t\t5\n2025-03-02\n\t\t10\n')
+    with pytest.raises(TrackieFormatException) as e:
+        list(FileEditRepository.get_work_units(params))
+    assert e.match('line #4')
+
+
+def test_all_checks_report_physical_line_numbers(tmp_path, make_params):
+    data_path = tmp_path / 'data.otl'
+    data_path.write_text(
+        '2025-03-01\n\tTask 1\n\t\t5\n\n'
+        '2025-03-02\n\tTask 2\n\n\t\t10\n\nno indentation\n')
+    params = make_params(data_path, validate='full')
+    with pytest.raises(TrackieFormatException) as e:
+        list(FileEditRepository.get_work_units(params))
+    assert e.match('line #8:')
+    with pytest.raises(TrackieFormatException) as e:
+        format_file(params)
+    assert e.match('line #8:')
+    assert check_file(params)[0].line_number == 8
+
+
+def test_validation_off_skips_check(tmp_path, make_params):
+    params = make_params(tmp_path / 'data.otl', validate='off')
+    validator = BlockValidator(params)
+    validator.check(['\t\t5\n'], 1)
+
+
+def test_full_validation_ignores_cache(tmp_path, make_params):
+    data_path = tmp_path / 'data.otl'
+    params = make_params(
+        data_path, cache_dir=tmp_path / 'cache', validate='fast')
+    validator = BlockValidator(params)
+    validator.check(['2025-03-01\n', '\tTask 1\n', '\t\t5\n'], 1)
+    validator.save(complete=True)
+
+    params.validate = 'full'
+    validator = BlockValidator(params)
+    assert validator.known == set()
+    with pytest.raises(TrackieFormatException):
+        validator.check(['2025-03-01\n', '\t\t5\n'], 1)
+
+
+BROKEN_FILE = (
+    '2025-03-01\n\tTask 1\n\t\t30\n'
+    '\n'
+    '2025-03-02\n\tTask 2\n'
+    '2025-03-03\n\t\t20\n\tTask 3\n\t\t10\n'
+)
+
+
+def test_check_file_reports_all_errors_with_physical_lines(
+        tmp_path, make_params):
+    data_path = tmp_path / 'data.otl'
+    data_path.write_text(BROKEN_FILE)
+    errors = check_file(make_params(data_path))
+    assert [error.line_number for error in errors] == [6, 7]
+
+
+def test_check_file_line_range_only_checks_touched_blocks(
+        tmp_path, make_params):
+    data_path = tmp_path / 'data.otl'
+    data_path.write_text(BROKEN_FILE)
+    params = make_params(data_path)
+    assert check_file(params, 1, 3) == []
+    assert check_file(params, 6, 6) == [FormatError(
+        6, 'Last line of a date entry must be a duration.')]
+
+
+def test_check_file_reuses_errors_outside_changed_region(
+    tmp_path, monkeypatch, make_params,
+):
+    data_path = tmp_path / 'data.otl'
+    data_path.write_text(BROKEN_FILE)
+    params = make_params(
+        data_path, cache_dir=tmp_path / 'cache', validate='fast')
+    check_file(params)
+
+    checked = []
+    find_block_errors = validation.find_block_errors
+
+    def spy(lines, params, first_line_number=1):
+        checked.append((first_line_number, len(lines)))
+        return find_block_errors(lines, params, first_line_number)
+
+    monkeypatch.setattr(validation, 'find_block_errors', spy)
+    # add a work unit to the first entry, later errors move down two lines
+    data_path.write_text(
+        BROKEN_FILE.replace('\tTask 1\n', '\tTask 1\n\t\t5\n\tTask 1b\n'))
+    errors = check_file(params)
+    assert [error.line_number for error in errors] == [8, 9]
+    # only the first entry and the blank line after it
+    assert checked == [(1, 6)]
+
+
+def test_check_file_incremental_matches_full_check(tmp_path, make_params):
+    data_path = tmp_path / 'data.otl'
+    data_path.write_text(BROKEN_FILE)
+    params = make_params(
+        data_path, cache_dir=tmp_path / 'cache', validate='fast')
+    check_file(params)
+    edits = [
+        BROKEN_FILE.replace('\tTask 2\n', '\tTask 2\n\t\t15\n'),
+        BROKEN_FILE.replace('\t\t30\n', ''),
+        BROKEN_FILE + '2025-03-04\n\t\t5\n',
+        BROKEN_FILE.replace('2025-03-02', '\tno date'),
+        '',
+    ]
+    for content in edits:
+        data_path.write_text(content)
+        assert check_file(params) == check_file(make_params(data_path))
+
+
+def test_check_file_ignores_an_unloadable_state(tmp_path, make_params):
+    data_path = tmp_path / 'data.otl'
+    data_path.write_text(BROKEN_FILE)
+    params = make_params(
+        data_path, cache_dir=tmp_path / 'cache', validate='fast')
+    check_file(params)
+    state_path = get_cache_path(
+        params.cache_dir, 'check', data_path, '.pickle')
+    # pickled reference to a module that does not exist
+    state_path.write_bytes(b'cmissing_module\nState\n.')
+
+    assert check_file(params) == check_file(make_params(data_path))
+    assert list(state_path.parent.glob('*.tmp')) == []
+
+
+def test_no_csv_file_is_left_after_a_format_error(
+        tmp_path, monkeypatch, make_params):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    data_path = tmp_path / 'data.otl'
+    data_path.write_text(
+        '2025-03-01\n\tTask 1\n\t\t5\n'
+        '2025-03-02\n\tTask 2\n\t\t5\n'
+        '2025-03-03\n\t\t5\n'
+    )
+    params = make_params(data_path, hourly_wage=Decimal(60))
+    with pytest.raises(TrackieFormatException):
+        output_work_units_csv(
+            FileEditRepository.get_work_units(params), params)
+    assert list(tmp_path.glob('*.csv')) == []
+    assert list(tmp_path.glob('.*.tmp')) == []
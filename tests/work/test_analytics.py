@@ -0,0 +1,54 @@
+import datetime as dt
+
+from trackie.work.analytics import (
+    find_longest_streak,
+    get_daily_minutes,
+    get_percentiles,
+    get_rolling_stats,
+)
+from trackie.work.models import RollingStat, Streak
+
+
+def test_daily_minutes_sum_up_work_units_within_range():
+    date_minutes = [
+        (dt.date(2025, 3, 1), 10),
+        (dt.date(2025, 3, 1), 5),
+        (dt.date(2025, 3, 3), 20),
+        (dt.date(2025, 3, 4), 30),
+    ]
+    minutes = get_daily_minutes(
+        date_minutes,
+        first_day=dt.date(2025, 3, 1),
+        last_day=dt.date(2025, 3, 3),
+    )
+    assert list(minutes) == [15, 0, 20]
+
+
+def test_percentiles_interpolate_between_ranks():
+    assert get_percentiles([40, 10, 30, 20], (0, 50, 100)) == (
+        (0, 10), (50, 25), (100, 40))
+    assert get_percentiles([]) == ()
+
+
+def test_days_off_do_not_break_overtime_streak():
+    # Thursday to Wednesday, weekend without work
+    minutes = [90, 70, 0, 0, 61, 60, 90]
+    expected = [60, 60, 0, 0, 60, 60, 60]
+    assert find_longest_streak(minutes, expected, dt.date(2025, 3, 6)) == (
+        Streak(dt.date(2025, 3, 6), dt.date(2025, 3, 10), 3, 41))
+
+
+def test_rolling_average_over_four_weeks():
+    # starts on a Sunday, the first week only has one day
+    first_day = dt.date(2025, 3, 2)
+    minutes = [70] + [10] * 7 * 4
+    stats = get_rolling_stats(minutes, first_day)
+    assert stats == (
+        RollingStat(2025, 9, 70, 70),
+        RollingStat(2025, 10, 70, 70),
+        RollingStat(2025, 11, 70, 70),
+        RollingStat(2025, 12, 70, 70),
+        RollingStat(2025, 13, 70, 70),
+    )
+    stats = get_rolling_stats([0] * 7 + [280] * 7, dt.date(2025, 3, 3))
+    assert [stat.average for stat in stats] == [0, 980]
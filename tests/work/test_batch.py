@@ -0,0 +1,83 @@
+import dataclasses
+import datetime as dt
+
+import pytest
+
+from trackie.work.logic import (
+    get_date_minutes,
+    get_period_stat,
+    handle_batch,
+)
+from trackie.work.models import PeriodStat, WorkUnit
+
+WORK_UNITS = [
+    WorkUnit(dt.date(2025, 3, 3), 'x', 100, ' Task 1'),
+    WorkUnit(dt.date(2025, 3, 3), 'x', 20, ' Task 2'),
+    WorkUnit(dt.date(2025, 3, 11), 'x', 200, ' Task 3'),
+]
+
+
+@pytest.fixture
+def params(make_params, tmp_path):
+    return make_params(
+        tmp_path / 'x.otl',
+        client='x',
+        mode='aggregate',
+        start_date=dt.date(2025, 3, 3),
+        end_date=dt.date(2025, 3, 16),
+        interval='week',
+        csv=True,
+        minutes_per_day=60,
+        minutes_per_week=300,
+    )
+
+
+class CountingRepository:
+    calls = 0
+
+    @classmethod
+    def get_work_units(cls, params):
+        cls.calls += 1
+        yield from WORK_UNITS
+
+    @classmethod
+    def get_fields(cls, params, fields):
+        cls.calls += 1
+        for work_unit in WORK_UNITS:
+            yield tuple(getattr(work_unit, field) for field in fields)
+
+
+def test_period_stat(params):
+    stat = get_period_stat(
+        get_date_minutes(WORK_UNITS), params,
+        dt.date(2025, 3, 3), dt.date(2025, 3, 9),
+    )
+    assert stat == PeriodStat(
+        first_day=dt.date(2025, 3, 3),
+        last_day=dt.date(2025, 3, 9),
+        minutes=120,
+        units=2,
+        days_worked=1,
+        expected=300,
+    )
+
+
+def test_batch_reads_data_once(params, tmp_path, monkeypatch):
+    monkeypatch.setattr('pathlib.Path.home', lambda: tmp_path)
+    reports = [
+        ('weeks', params),
+        ('days', dataclasses.replace(
+            params, interval='day', end_date=dt.date(2025, 3, 9))),
+        ('tags', dataclasses.replace(params, mode='list', group_by=['tag'])),
+    ]
+    comparisons = [(
+        (dt.date(2025, 3, 3), dt.date(2025, 3, 9)),
+        (dt.date(2025, 3, 10), dt.date(2025, 3, 16)),
+    )]
+    handle_batch(params, CountingRepository, reports, comparisons)
+
+    assert CountingRepository.calls == 1
+    names = sorted(path.name.split('_')[0] for path in tmp_path.iterdir())
+    assert names == ['x-comparison', 'x-days', 'x-tags', 'x-weeks']
+    comparison = next(tmp_path.glob('x-comparison*')).read_text()
+    assert '2:00' in comparison and '3:20' in comparison
@@ -0,0 +1,51 @@
+import datetime as dt
+import json
+import re
+
+from trackie.dashboard import render_dashboard
+from trackie.work.logic import get_dashboard_data
+
+
+def test_dashboard_data_holds_aggregates_only(make_params):
+    date_minutes_by_client = {
+        'x': [
+            (dt.date(2025, 3, 3), 100),
+            (dt.date(2025, 3, 3), 20),
+            (dt.date(2025, 3, 11), 200),
+        ],
+        'y': [(dt.date(2025, 3, 4), 30)],
+    }
+    data = get_dashboard_data(date_minutes_by_client, make_params(
+        None,
+        client='x',
+        mode='aggregate',
+        start_date=dt.date(2025, 3, 3),
+        end_date=dt.date(2025, 3, 16),
+        interval='week',
+        minutes_per_day=60,
+        minutes_per_week=300,
+    ))
+
+    monday = dt.date(2025, 3, 3).toordinal()
+    assert data['clients']['x'] == {
+        'days': [monday, monday + 8],
+        'minutes': [120, 200],
+        'total': 320,
+    }
+    assert data['clients']['y']['days'] == [monday + 1]
+    assert data['weeks'] == {
+        'labels': ['2025-W10', '2025-W11'],
+        'diff': [-150, -100],
+        'carryover': [-150, -250],
+    }
+
+
+def test_rendered_dashboard_embeds_data_safely():
+    data = {'clients': {'</script><b>': {}}}
+    page = render_dashboard(data, title='<b>Trackie</b>')
+    assert '<h1>&lt;b&gt;Trackie&lt;/b&gt;</h1>' in page
+    embedded = re.search(
+        r'<script type="application/json" id="data">(.*?)</script>',
+        page,
+    ).group(1)
+    assert json.loads(embedded) == data
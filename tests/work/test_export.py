@@ -0,0 +1,97 @@
+import dataclasses
+import datetime as dt
+from decimal import Decimal
+
+import pytest
+
+from trackie.utils import TrackieException
+from trackie.work.export import export_incremental
+
+
+@pytest.fixture
+def tracking_file(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    path = tmp_path / 'work.otl'
+    path.write_text(
+        '2024-12-31\n\tOld\n\t\t5\n'
+        '2025-01-02\n\tFirst\n\t\t10\n'
+        '2025-02-03\n\tSecond\n\t\t20\n'
+    )
+    return path
+
+
+@pytest.fixture
+def params(make_params, tracking_file, tmp_path):
+    return make_params(
+        tracking_file,
+        cache_dir=tmp_path / 'cache',
+        csv=True,
+        hourly_wage=Decimal(60),
+        display_hours=False,
+    )
+
+
+def test_only_new_work_units_are_appended(params, tracking_file, tmp_path):
+    output_path, count = export_incremental(params)
+    assert (output_path, count) == (tmp_path / 'test_client-export.csv', 2)
+
+    assert export_incremental(params)[1] == 0
+    with tracking_file.open('a') as f:
+        f.write('\tThird\n\t\t30\n2025-02-04\n\tFourth\n\t\t40\n')
+    assert export_incremental(params)[1] == 2
+    assert output_path.read_text().splitlines() == [
+        'Date,Work,Duration (minutes),Cost (€)',
+        '2025-01-02, First,10,10.00',
+        '2025-02-03, Second,20,20.00',
+        '2025-02-03, Third,30,30.00',
+        '2025-02-04, Fourth,40,40.00',
+    ]
+
+
+def test_edits_of_exported_entries_are_reported(
+        params, tracking_file, tmp_path):
+    export_incremental(params)
+    tracking_file.write_text(
+        tracking_file.read_text().replace('First\n\t\t10', 'First\n\t\t15'))
+    with pytest.raises(TrackieException, match='Entries of 2025-01 changed'):
+        export_incremental(params)
+
+    # exporting everything again starts over
+    (tmp_path / 'test_client-export.csv').unlink()
+    assert export_incremental(params)[1] == 2
+
+
+def test_rows_of_an_interrupted_export_are_dropped(params):
+    output_path, _ = export_incremental(params)
+    exported = output_path.read_text()
+    with output_path.open('a') as f:
+        f.write('2025-02-03, Second,20,20.00\n')
+    assert export_incremental(params)[1] == 0
+    assert output_path.read_text() == exported
+
+
+def test_start_is_kept_from_the_first_export(params, tracking_file, tmp_path):
+    output_path, _ = export_incremental(params)
+    with tracking_file.open('a') as f:
+        f.write('2025-03-03\n\tThird\n\t\t30\n')
+
+    # e.g. the default start moved on to the next month
+    next_month = dataclasses.replace(params, start_date=dt.date(2025, 3, 1))
+    assert export_incremental(next_month)[1] == 1
+    assert output_path.read_text().splitlines()[1:] == [
+        '2025-01-02, First,10,10.00',
+        '2025-02-03, Second,20,20.00',
+        '2025-03-03, Third,30,30.00',
+    ]
+
+
+def test_exports_are_never_truncated(params, tmp_path):
+    output_path, _ = export_incremental(params)
+    exported = output_path.read_text()
+
+    with pytest.raises(TrackieException, match='settings changed'):
+        export_incremental(dataclasses.replace(params, display_hours=True))
+    (tmp_path / 'cache').rename(tmp_path / 'lost')
+    with pytest.raises(TrackieException, match='state is lost'):
+        export_incremental(params)
+    assert output_path.read_text() == exported
@@ -1,13 +1,20 @@
 import datetime as dt
 from pathlib import Path
 
+import pytest
+
 from trackie.conf import (
     Params,
     date_pattern,
     tabs_description_pattern,
     tabs_duration_pattern,
 )
-from trackie.repositories.file_edit import FileEditRepository
+from trackie.repositories import file_edit
+from trackie.repositories.file_edit import (
+    FileEditRepository,
+    find_tail_offset,
+)
+from trackie.utils import TrackieFormatException
 
 
 params_defaults = dict(
@@ -94,3 +101,191 @@ def test_exclude_day_before_start_and_day_after_end(tmp_path):
     first_work_unit, second_work_unit = work_units
     assert first_work_unit.date.day == 5
     assert second_work_unit.date.day == 10
+
+
+def test_time_range_duration(tmp_path):
+    tmp_cfg_file, tmp_data_file = create_data_file(
+        tmp_path, '2025-03-01\n\tTask 1\n\t\t9:15-10:30\n'
+        '\tLate task\n\t\t23:30-0:15')
+    params = Params(
+        client='test_client',
+        data_path=Path(str(tmp_data_file)),
+        start_date=dt.date(year=2025, month=3, day=1),
+        **params_defaults,
+    )
+
+    first, second = FileEditRepository.get_work_units(params)
+    assert first.minutes == 75
+    assert first.start == dt.datetime(2025, 3, 1, 9, 15)
+    assert first.end == dt.datetime(2025, 3, 1, 10, 30)
+    assert second.minutes == 45
+    assert second.end == dt.datetime(2025, 3, 2, 0, 15)
+
+
+def test_chronological_file_is_read_until_end_date(tmp_path):
+    tmp_cfg_file, tmp_data_file = create_data_file(
+        tmp_path, (
+            '2025-03-01\n\tTask 1\n\t\t5\n'
+            '2025-03-05\n\tTask 2\n\t\t10\n'
+            # never read, would be a format error
+            '2025-03-10\n\t\t20\n'
+        )
+    )
+    params = Params(
+        client='test_client',
+        data_path=Path(str(tmp_data_file)),
+        start_date=dt.date(2025, 3, 1),
+        end_date=dt.date(2025, 3, 5),
+        chronological=True,
+        **params_defaults,
+    )
+    work_units = list(FileEditRepository.get_work_units(params))
+    assert [work_unit.minutes for work_unit in work_units] == [5, 10]
+
+
+def test_chronological_file_out_of_order_errors(tmp_path):
+    tmp_cfg_file, tmp_data_file = create_data_file(
+        tmp_path, (
+            '2025-03-05\n\tTask 2\n\t\t10\n'
+            '2025-03-01\n\tTask 1\n\t\t5\n'
+        )
+    )
+    params = Params(
+        client='test_client',
+        data_path=Path(str(tmp_data_file)),
+        start_date=dt.date(2025, 3, 1),
+        chronological=True,
+        **params_defaults,
+    )
+    with pytest.raises(TrackieFormatException) as e:
+        list(FileEditRepository.get_work_units(params))
+    assert e.match('line #4')
+
+
+def test_fields_are_projected(tmp_path):
+    tmp_cfg_file, tmp_data_file = create_data_file(
+        tmp_path, (
+            '2025-03-01\n\tTask 1\n\tmore about it\n\t\t9:15-10:30\n'
+            '2025-03-02\n\tTask 2\n\t\t10\n'
+        )
+    )
+    params = Params(
+        client='test_client',
+        data_path=Path(str(tmp_data_file)),
+        start_date=dt.date(2025, 3, 1),
+        **params_defaults,
+    )
+    date_minutes = FileEditRepository.get_fields(params, ('date', 'minutes'))
+    assert list(date_minutes) == [
+        (dt.date(2025, 3, 1), 75),
+        (dt.date(2025, 3, 2), 10),
+    ]
+    assert list(
+        FileEditRepository.get_fields(params, ('description', 'start'))
+    ) == [
+        (' Task 1 more about it', dt.datetime(2025, 3, 1, 9, 15)),
+        (' Task 2', None),
+    ]
+    assert list(FileEditRepository.get_fields(params, ('minutes',))) == [
+        (75,), (10,)]
+
+
+TAIL_DATA = (
+    '2025-03-01\n\tTask 1\n\t\t5\n'
+    '2025-03-04\n\tTask 2\n\t\t10\n'
+    '\n'
+    '2025-03-05\n\tTask 3\n\t\t15\n'
+    '2025-03-05\n\tTask 4\n\t\t20\n'
+    '2025-03-07\n\tTask 5\n\t\t25\n'
+)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 16, 1 << 16])
+def test_tail_offset_is_found_backwards(tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(file_edit, 'TAIL_CHUNK_SIZE', chunk_size)
+    tmp_data_file = tmp_path / 'data.otl'
+    tmp_data_file.write_text(TAIL_DATA)
+
+    for start_date, line in [
+        (dt.date(2025, 2, 1), '2025-03-01'),
+        (dt.date(2025, 3, 2), '2025-03-04'),
+        (dt.date(2025, 3, 5), '2025-03-05'),
+        (dt.date(2025, 3, 6), '2025-03-07'),
+    ]:
+        assert find_tail_offset(
+            tmp_data_file, start_date, date_pattern,
+        ) == TAIL_DATA.index(line)
+    assert find_tail_offset(
+        tmp_data_file, dt.date(2025, 3, 8), date_pattern,
+    ) == len(TAIL_DATA)
+
+
+def test_tail_of_chronological_file_is_read(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_edit, 'TAIL_CHUNK_SIZE', 8)
+    tmp_cfg_file, tmp_data_file = create_data_file(
+        tmp_path, (
+            # never read, would be a format error
+            '2025-02-10\n\t\t20\n'
+            + TAIL_DATA
+        )
+    )
+    params = Params(
+        client='test_client',
+        data_path=Path(str(tmp_data_file)),
+        start_date=dt.date(2025, 3, 5),
+        end_date=dt.date(2025, 3, 31),
+        chronological=True,
+        tail=True,
+        **params_defaults,
+    )
+    work_units = list(FileEditRepository.get_work_units(params))
+    assert [work_unit.minutes for work_unit in work_units] == [15, 20, 25]
+
+
+def test_tail_format_error_has_line_number(tmp_path):
+    tmp_cfg_file, tmp_data_file = create_data_file(
+        tmp_path, TAIL_DATA + '2025-03-08\n\t\t30\n')
+    params = Params(
+        client='test_client',
+        data_path=Path(str(tmp_data_file)),
+        start_date=dt.date(2025, 3, 6),
+        end_date=dt.date(2025, 3, 31),
+        chronological=True,
+        tail=True,
+        **params_defaults,
+    )
+    with pytest.raises(TrackieFormatException) as e:
+        list(FileEditRepository.get_work_units(params))
+    assert e.match('line #17')
+
+
+def test_tail_out_of_order_error_has_line_number(tmp_path):
+    tmp_cfg_file, tmp_data_file = create_data_file(
+        tmp_path, TAIL_DATA + '2025-03-06\n\tTask 6\n\t\t30\n')
+    params = Params(
+        client='test_client',
+        data_path=Path(str(tmp_data_file)),
+        start_date=dt.date(2025, 3, 6),
+        end_date=dt.date(2025, 3, 31),
+        chronological=True,
+        tail=True,
+        **params_defaults,
+    )
+    with pytest.raises(TrackieFormatException) as e:
+        list(FileEditRepository.get_work_units(params))
+    assert e.match('line #17:')
+
+
+@pytest.mark.parametrize('duration', ['30min', '9:00-10:00x'])
+def test_malformed_duration_is_a_format_error(tmp_path, duration):
+    tmp_cfg_file, tmp_data_file = create_data_file(
+        tmp_path, f'2025-03-01\n\tTask 1\n\t\t{duration}\n')
+    params = Params(
+        client='test_client',
+        data_path=Path(str(tmp_data_file)),
+        start_date=dt.date(2025, 3, 1),
+        **params_defaults,
+    )
+    with pytest.raises(TrackieFormatException) as e:
+        list(FileEditRepository.get_work_units(params))
+    assert e.match('line #3')
@@ -0,0 +1,44 @@
+import datetime as dt
+from decimal import Decimal
+
+from trackie.work.logic import get_group_stats
+from trackie.work.models import WorkUnit
+
+
+def test_group_stats_share_one_pass_over_work_units():
+    work_units = iter([
+        WorkUnit(dt.date(2025, 3, 3), 'client', 30, ' ABC-1 fix #web #ops'),
+        WorkUnit(dt.date(2025, 3, 4), 'client', 60, ' abc-1 review #web'),
+        WorkUnit(dt.date(2025, 3, 3), 'client', 15, ' daily: standup'),
+    ])
+    group_stats = get_group_stats(
+        work_units,
+        dimensions=['tag', 'prefix', 'weekday'],
+        hourly_wage=Decimal(60),
+    )
+
+    tags = {stat.key: stat for stat in group_stats['tag']}
+    assert tags['web'].minutes == 90
+    assert tags['web'].units == 2
+    assert tags['web'].cost == Decimal(90)
+    assert tags['ops'].minutes == 30
+    assert tags['(untagged)'].minutes == 15
+
+    prefixes = [(stat.key, stat.minutes) for stat in group_stats['prefix']]
+    assert prefixes == [('ABC-1', 90), ('DAILY', 15)]
+
+    weekdays = [(stat.key, stat.minutes) for stat in group_stats['weekday']]
+    assert weekdays == [('Monday', 45), ('Tuesday', 60)]
+
+
+def test_dimension_given_twice_counts_once(tmp_path, make_params):
+    work_units = [
+        WorkUnit(dt.date(2025, 3, 3), 'client', 30, ' fix #web'),
+        WorkUnit(dt.date(2025, 3, 4), 'client', 60, ' review #web'),
+    ]
+    params = make_params(tmp_path / 'work.otl', group_by=['tag', 'tag'])
+    assert params.group_by == ['tag']
+    group_stats = get_group_stats(work_units, dimensions=params.group_by)
+    assert [
+        (stat.key, stat.units, stat.minutes) for stat in group_stats['tag']
+    ] == [('web', 2, 90)]
@@ -0,0 +1,74 @@
+import datetime as dt
+import json
+
+import pytest
+
+from trackie.repositories.file_edit import FileEditRepository
+from trackie.work.logic import find_overlaps, handle_check
+from trackie.work.models import WorkUnit
+
+
+def unit(client, start, end, description=''):
+    date = dt.date(2025, 3, 3)
+    return WorkUnit(
+        date, client, 0, description,
+        start=dt.datetime.combine(date, dt.time(*start)),
+        end=dt.datetime.combine(date, dt.time(*end)),
+    )
+
+
+def test_find_overlaps_within_and_across_clients():
+    work_units = [
+        unit('a', (9, 0), (10, 30), 'first'),
+        unit('b', (10, 15), (11, 0), 'second'),
+        unit('a', (10, 0), (10, 45), 'third'),
+        unit('a', (11, 0), (12, 0), 'adjacent'),
+        WorkUnit(dt.date(2025, 3, 3), 'a', 30, 'no range'),
+    ]
+    overlaps = find_overlaps(work_units)
+    pairs = [
+        (overlap.first.description, overlap.second.description,
+         overlap.minutes)
+        for overlap in overlaps
+    ]
+    assert pairs == [
+        ('first', 'third', 30),
+        ('first', 'second', 15),
+        ('third', 'second', 30),
+    ]
+
+
+def test_find_overlaps_scales_to_many_units():
+    start = dt.datetime(2020, 1, 1, 8)
+    work_units = [
+        WorkUnit(
+            start.date(), 'a', 30, '',
+            start=start + dt.timedelta(minutes=30 * n),
+            end=start + dt.timedelta(minutes=30 * n + 30),
+        )
+        for n in range(100_000)
+    ]
+    assert find_overlaps(work_units) == []
+
+
+@pytest.mark.parametrize('output_format', ['json', 'quickfix'])
+def test_check_lists_overlaps_in_machine_readable_output(
+        tmp_path, make_params, capsys, output_format):
+    data_path = tmp_path / 'work.otl'
+    data_path.write_text(
+        '2025-03-03\n\tReview\n\t\t9:00-10:00\n\n'
+        '\tMeeting\n\t\t9:30-10:30\n'
+    )
+    params = make_params(data_path)
+    assert not handle_check(
+        [params], FileEditRepository,
+        overlaps=True, output_format=output_format)
+
+    output = capsys.readouterr().out
+    message = (
+        '09:30-10:30 overlaps 09:00-10:00 of test_client by 30 minutes')
+    if output_format == 'json':
+        assert json.loads(output) == [
+            {'file': str(data_path), 'line': 6, 'message': message}]
+    else:
+        assert output == f'{data_path}:6:1: {message}\n'
@@ -0,0 +1,55 @@
+import datetime as dt
+import json
+from pathlib import Path
+
+from trackie.work.team import (
+    get_member_names,
+    get_summaries,
+    get_team_files,
+    reduce_summaries,
+)
+
+
+def test_team_summaries_are_reduced_and_cached(tmp_path, make_params):
+    team_dir = tmp_path / 'team'
+    team_dir.mkdir()
+    (team_dir / 'alice.otl').write_text(
+        '2025-03-03\n\tTask\n\t\t30\n\tTask\n\t\t15\n')
+    (team_dir / 'bob.otl').write_text(
+        '2025-03-03\n\tTask\n\t\t60\n2025-03-04\n\tTask\n\t\t10\n')
+    cache_dir = tmp_path / 'cache'
+    params_list = [
+        make_params(
+            data_path, client=data_path.stem, cache_dir=cache_dir)
+        for data_path in get_team_files(str(team_dir))
+    ]
+
+    summaries = get_summaries(params_list, jobs=2)
+    monday = dt.date(2025, 3, 3).toordinal()
+    assert summaries['alice'] == {monday: 45}
+    assert reduce_summaries(summaries) == {monday: 105, monday + 1: 10}
+
+    # unchanged files are not parsed again
+    cache_files = list((cache_dir / 'team').iterdir())
+    assert len(cache_files) == 2
+    for cache_file in cache_files:
+        cached = json.loads(cache_file.read_text())
+        cached['days'] = [[monday, 1]]
+        cache_file.write_text(json.dumps(cached))
+    summaries = get_summaries(params_list, jobs=2)
+    assert reduce_summaries(summaries) == {monday: 2}
+
+
+def test_team_files_from_glob(tmp_path):
+    (tmp_path / 'a.otl').write_text('')
+    (tmp_path / 'b.txt').write_text('')
+    assert get_team_files(str(tmp_path / '*.otl')) == [tmp_path / 'a.otl']
+
+
+def test_member_names_are_unique():
+    assert get_member_names([
+        Path('team/alice/work.otl'),
+        Path('team/bob/work.otl'),
+        Path('team/carol.otl'),
+        Path('team/work.otl'),
+    ]) == ['alice/work', 'bob/work', 'carol', 'team/work']
@@ -0,0 +1,56 @@
+import dataclasses
+import datetime as dt
+
+from trackie.repositories.file_edit import FileEditRepository
+from trackie.work.logic import get_interval_stats
+from trackie.work.timeline import get_timeline, get_timeline_minutes
+
+
+def make_clients(tmp_path, make_params, chronological=True):
+    (tmp_path / 'alice.otl').write_text(
+        '2025-03-03\n\tA1\n\t\t30\n2025-03-05\n\tA2\n\t\t15\n')
+    (tmp_path / 'bob.otl').write_text(
+        '2025-03-03\n\tB1\n\t\t60\n2025-03-04\n\tB2\n\t\t10\n')
+    return [
+        (make_params(
+            tmp_path / name,
+            client=name.removesuffix('.otl'),
+            start_date=dt.date(2025, 3, 3),
+            end_date=dt.date(2025, 3, 5),
+            minutes_per_day=60,
+            minutes_per_week=300,
+            chronological=chronological,
+        ), FileEditRepository)
+        for name in ('alice.otl', 'bob.otl')
+    ]
+
+
+def test_timeline_merges_clients_by_date(tmp_path, make_params):
+    assert [
+        (work_unit.date.day, work_unit.client, work_unit.description.strip())
+        for work_unit in get_timeline(make_clients(tmp_path, make_params))
+    ] == [
+        (3, 'alice', 'A1'),
+        (3, 'bob', 'B1'),
+        (4, 'bob', 'B2'),
+        (5, 'alice', 'A2'),
+    ]
+
+
+def test_unordered_files_are_sorted_before_merging(tmp_path, make_params):
+    clients = make_clients(tmp_path, make_params, chronological=False)
+    (tmp_path / 'alice.otl').write_text(
+        '2025-03-05\n\tA2\n\t\t15\n2025-03-03\n\tA1\n\t\t30\n')
+    assert [
+        (work_unit.date.day, work_unit.description.strip())
+        for work_unit in get_timeline(clients)
+    ] == [(3, 'A1'), (3, 'B1'), (4, 'B2'), (5, 'A2')]
+
+
+def test_timeline_is_balanced_against_one_day(tmp_path, make_params):
+    clients = make_clients(tmp_path, make_params)
+    params = dataclasses.replace(clients[0][0], mode='aggregate')
+    stats = get_interval_stats(get_timeline_minutes(clients), params)
+    assert [
+        (stat.minutes, stat.diff, stat.carryover) for stat in stats
+    ] == [(90, 30, 30), (10, -50, -20), (15, -45, -65)]
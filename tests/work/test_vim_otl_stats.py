@@ -1,5 +1,9 @@
 import datetime as dt
-from trackie.work.logic import get_daily_stats
+from trackie.work.logic import (
+    get_daily_stats,
+    get_date_minutes,
+    get_weekly_stats,
+)
 
 
 def test_get_daily_stats(single_work_unit):
@@ -7,7 +11,7 @@ def test_get_daily_stats(single_work_unit):
     start_date = dt.date(2025, 1, 10)
     end_date = dt.date(2025, 1, 11)
     daily_stats = get_daily_stats(
-        single_work_unit,
+        get_date_minutes(single_work_unit),
         start_date=start_date,
         minutes_per_day=1,
         end_date=end_date,
@@ -16,3 +20,24 @@ def test_get_daily_stats(single_work_unit):
     day_stat = daily_stats[0]
     assert day_stat.minutes == 1
     assert day_stat.diff == 0
+
+
+def test_get_weekly_stats_across_new_year_in_week_order():
+    # out of order, 2024-12-30 is in week 1 of 2025, 2026-01-01 in week 1
+    # of 2026
+    date_minutes = [
+        (dt.date(2026, 1, 1), 30),
+        (dt.date(2024, 12, 30), 10),
+        (dt.date(2025, 12, 29), 20),
+    ]
+    week_stats = get_weekly_stats(
+        date_minutes,
+        start_date=dt.date(2024, 12, 23),
+        minutes_per_week=10,
+        end_date=dt.date(2026, 1, 4),
+    )
+    assert len(week_stats) == 54
+    assert [
+        (stat.year, stat.week, stat.minutes, stat.carryover)
+        for stat in week_stats[:2] + week_stats[-1:]
+    ] == [(2024, 52, 0, -10), (2025, 1, 10, -10), (2026, 1, 50, -480)]
@@ -0,0 +1,101 @@
+import datetime as dt
+
+import pytest
+
+from trackie.utils import TrackieFormatException
+from trackie.work.logic import (
+    get_daily_stats,
+    get_date_minutes,
+    get_weekly_stats,
+)
+from trackie.work.models import WorkUnit
+from trackie.work.workdays import get_expected_minutes, parse_calendar
+
+
+def test_calendar_compiles_to_expected_minutes_per_day():
+    calendar = parse_calendar({
+        'holidays': [dt.date(2025, 3, 5)],
+        'vacations': [['2025-03-06', '2025-03-07']],
+        'weekday_minutes': [60, 60, 60, 60, 30, 0, 0],
+    })
+    expected_minutes = get_expected_minutes(
+        calendar,
+        first_day=dt.date(2025, 3, 3),
+        last_day=dt.date(2025, 3, 16),
+    )
+    assert list(expected_minutes.minutes) == [
+        60, 60, 0, 0, 0, 0, 0,
+        60, 60, 60, 60, 30, 0, 0,
+    ]
+    assert expected_minutes.for_day(dt.date(2025, 3, 14)) == 30
+    assert expected_minutes.for_days(
+        dt.date(2025, 3, 10), dt.date(2025, 3, 16)) == 270
+
+
+def test_calendar_without_quotas_uses_minutes_per_day():
+    calendar = parse_calendar({'holidays': ['2025-03-04']})
+    expected_minutes = get_expected_minutes(
+        calendar,
+        first_day=dt.date(2025, 3, 3),
+        last_day=dt.date(2025, 3, 9),
+        minutes_per_day=480,
+    )
+    assert list(expected_minutes.minutes) == [480, 0, 480, 480, 480, 0, 0]
+
+
+@pytest.mark.parametrize('table', [
+    {'holidays': ['2025-13-01']},
+    {'vacations': [['2025-03-07', '2025-03-06']]},
+    {'weekday_minutes': [60, 60]},
+])
+def test_invalid_calendar_errors(table):
+    with pytest.raises(TrackieFormatException):
+        parse_calendar(table)
+
+
+def test_holidays_are_no_deficit():
+    calendar = parse_calendar({'holidays': ['2025-03-04']})
+    expected_minutes = get_expected_minutes(
+        calendar,
+        first_day=dt.date(2025, 3, 3),
+        last_day=dt.date(2025, 3, 9),
+        minutes_per_day=60,
+    )
+    work_units = [
+        WorkUnit(dt.date(2025, 3, 3), 'client', 60, 'work'),
+    ]
+    day_stats = get_daily_stats(
+        get_date_minutes(work_units),
+        start_date=dt.date(2025, 3, 3),
+        minutes_per_day=60,
+        end_date=dt.date(2025, 3, 5),
+        expected_minutes=expected_minutes,
+    )
+    assert [day_stat.carryover for day_stat in day_stats] == [0, 0]
+    assert day_stats[1].expected == 0
+
+    week_stats = get_weekly_stats(
+        get_date_minutes(work_units),
+        start_date=dt.date(2025, 3, 3),
+        minutes_per_week=300,
+        end_date=dt.date(2025, 3, 9),
+        expected_minutes=expected_minutes,
+    )
+    assert week_stats[0].expected == 240
+    assert week_stats[0].carryover == -180
+
+
+def test_weekly_figures_keep_minutes_per_week():
+    calendar = parse_calendar({'holidays': ['2025-03-04']})
+    kwargs = dict(
+        first_day=dt.date(2025, 3, 3),
+        last_day=dt.date(2025, 3, 16),
+        minutes_per_day=420,
+        minutes_per_week=2402,
+    )
+    daily = get_expected_minutes(calendar, **kwargs)
+    assert daily.for_days(dt.date(2025, 3, 10), dt.date(2025, 3, 16)) == 2100
+    weekly = get_expected_minutes(calendar, interval='week', **kwargs)
+    assert weekly.for_days(dt.date(2025, 3, 10), dt.date(2025, 3, 16)) == 2402
+    # the holiday's share of the week is not expected
+    assert weekly.for_days(dt.date(2025, 3, 3), dt.date(2025, 3, 9)) == 1921